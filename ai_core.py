@@ -1,83 +1,162 @@
 import os
 import io
 import base64
-import cv2
 import math
+import threading
 import numpy as np
 import pandas as pd
-import requests
-import urllib3
-import plotly.graph_objects as go
-import traceback
-from dash import html
+from dash import html, Patch
 from PIL import Image, ImageOps
-from functools import lru_cache
-from db_manager import run_query, BASE_DIR
+from db_manager import run_query, fetch_scalar, slot_hour_expr, rollups_ready, BASE_DIR, SCENARIO_CACHE_TTL
+from utils.nms import grid_nms
+from utils.matching import match_detections
+from utils.detection_cache import DETECTION_CACHE, file_digest, make_key, box_key
+from utils.image_pyramid import PYRAMID_ENABLED, get_or_build_pyramid, open_pyramid
+from utils.display_cache import display_token, display_url, lookup_display, store_display
+from utils.byte_cache import ByteBudgetCache, image_nbytes
+from utils.http_fetch import fetch_to_mirror, mirror_stamp
+from utils.prefetch import Prefetcher
+from utils.job_queue import JOB_QUEUE, JOB_QUEUE_ENABLED, PRIORITY_BACKGROUND, job_key
+from utils.inference_backend import resolve_model_path, artifact_digest
+from utils import tile_filter, change_detection, tile_shard, rollups
 from datetime import datetime, timedelta
-from PIL import ImageEnhance
-from ultralytics import YOLO
-
-# SSL 경고 무시
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # [1. AI 모델 로드]
+# 모델(ultralytics/torch)은 처음 쓰일 때 한 번만 로드합니다. 페이지 import만으로는 로드하지 않으므로
+# 로그인 화면 등은 모델 없이 바로 뜹니다. gunicorn은 gunicorn.conf.py에서 preload_models()를
+# 마스터에서 호출해 fork된 워커들이 모델 메모리를 copy-on-write로 공유하게 할 수 있습니다.
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
-DET_MODEL = None
+DET_MODEL = None         # 미리 넣어 두면(벤치마크의 가짜 모델 등) 로더가 그대로 사용
 CLS_MODEL = None
+DET_MODEL_DIGEST = None  # 탐지 캐시 키에 들어가는 가중치 해시 (det_best.pt 교체 시 자동 무효화)
+CLS_MODEL_DIGEST = None  # 분류 결과 캐시 키
 
-try:
-    from ultralytics import YOLO
-    
-    det_path = os.path.join(MODELS_DIR, 'det_best.pt')
-    cls_path = os.path.join(MODELS_DIR, 'cls_best.pt')
-    
-    if os.path.exists(det_path):
-        try: DET_MODEL = YOLO(det_path)
-        except: pass
-    if os.path.exists(cls_path):
-        try: CLS_MODEL = YOLO(cls_path)
-        except: pass
+_model_lock = threading.Lock()
+# ultralytics predictor는 스레드 안전하지 않음 (predictor 상태/배치 설정/fuse 공유)
+# 요청 스레드와 프리페치/분류 백그라운드 스레드가 같은 모델 객체를 쓰므로 모델별로 추론을 직렬화
+_det_predict_lock = threading.Lock()
+_cls_predict_lock = threading.Lock()
+_model_paths = {}
+_load_attempted = set()
+
+def _model_path(stem):
+    # INFERENCE_BACKEND(torch/onnx/openvino)에 맞는 산출물을 고르고, 없으면 .pt 사용
+    if stem not in _model_paths:
+        _model_paths[stem] = resolve_model_path(MODELS_DIR, stem)
+    return _model_paths[stem]
 
-except ImportError:
-    pass
+def _load_yolo(stem, task):
+    path = _model_path(stem)
+    if not path: return None
+    try:
+        from ultralytics import YOLO
+        return YOLO(path, task=task)
+    except Exception as e:
+        print(f"[Model Load Error] {stem}: {e}")
+        return None
+
+def get_det_model():
+    """탐지 모델 (첫 호출 시 로드, 스레드 안전). 모델 파일이 없거나 로드 실패 시 None"""
+    global DET_MODEL
+    if DET_MODEL is None and 'det' not in _load_attempted:
+        with _model_lock:
+            if DET_MODEL is None and 'det' not in _load_attempted:
+                DET_MODEL = _load_yolo('det_best', 'detect')
+                _load_attempted.add('det')
+    return DET_MODEL
+
+def get_cls_model():
+    """분류 모델 (첫 호출 시 로드, 스레드 안전)"""
+    global CLS_MODEL
+    if CLS_MODEL is None and 'cls' not in _load_attempted:
+        with _model_lock:
+            if CLS_MODEL is None and 'cls' not in _load_attempted:
+                CLS_MODEL = _load_yolo('cls_best', 'classify')
+                _load_attempted.add('cls')
+    return CLS_MODEL
+
+def get_det_digest():
+    """탐지 모델 산출물 해시. 모델을 로드하지 않아도 되므로 캐시 조회만 할 때는 추론 준비 비용이 없습니다."""
+    global DET_MODEL_DIGEST
+    if DET_MODEL_DIGEST is None:
+        path = _model_path('det_best')
+        # 백엔드 산출물 해시 -> 백엔드/가중치가 바뀌면 탐지 캐시가 자동으로 분리됨
+        if path: DET_MODEL_DIGEST = artifact_digest(path)
+    return DET_MODEL_DIGEST
+
+def get_cls_digest():
+    global CLS_MODEL_DIGEST
+    if CLS_MODEL_DIGEST is None:
+        path = _model_path('cls_best')
+        if path: CLS_MODEL_DIGEST = artifact_digest(path)
+    return CLS_MODEL_DIGEST
+
+def preload_models():
+    """두 모델과 해시를 미리 준비합니다. (gunicorn 마스터의 preload 훅, 오프라인 CLI용)"""
+    det, cls = get_det_model(), get_cls_model()
+    get_det_digest(); get_cls_digest()
+    return det is not None, cls is not None
 
 # --- [2. 이미지 로더] ---
-@lru_cache(maxsize=32)
+def clean_image_path(path):
+    return str(path).strip().strip("'").strip('"')
+
+def resolve_local_path(clean_path):
+    return clean_path if os.path.isabs(clean_path) else os.path.join(BASE_DIR, 'assets', 'images', clean_path)
+
+# 원본 이미지와 표시용 인코딩 결과가 함께 쓰는 메모리 예산 (워커당, MB)
+IMAGE_CACHE = ByteBudgetCache(int(os.getenv("IMAGE_CACHE_MB", 1024)) * 1024 * 1024, name='image')
+
 def load_image_from_path(path):
     if not path: return None
-    clean_path = str(path).strip().strip("'").strip('"')
+    clean_path = clean_image_path(path)
+    # 경로 + 원본 스탬프(크기/수정시각, 원격은 ETag 등) -> 같은 경로의 파일이 바뀌면 다시 읽음
+    cache_key = ('image', clean_path, _source_stamp(clean_path))
+    img = IMAGE_CACHE.get(cache_key)
+    if img is not None: return img
+
     print(f"[AWS DOWNLOAD] {clean_path}", flush=True)
     
     try:
         if clean_path.startswith('http'):
-            response = requests.get(clean_path, stream=True, timeout=10, verify=False)
-            if response.status_code == 200:
-                img = Image.open(io.BytesIO(response.content))
-                return img
+            # 공용 세션 + 디스크 미러: 변경되지 않은 이미지는 다시 다운로드하지 않음
+            local_path = fetch_to_mirror(clean_path)
+            if local_path:
+                img = Image.open(local_path)
         else:
-            full_path = clean_path if os.path.isabs(clean_path) else os.path.join(BASE_DIR, 'assets', 'images', clean_path)
+            full_path = resolve_local_path(clean_path)
             if os.path.exists(full_path):
-                return Image.open(full_path)
+                img = Image.open(full_path)
+
+        if img is not None:
+            # 지연 디코딩을 여기서 끝내야 캐시가 실제 메모리 크기를 알 수 있습니다.
+            img.load()
+            IMAGE_CACHE.put(cache_key, img, image_nbytes(img))
+            return img
     except Exception:
         pass
     return None
 
+def get_image_cache_stats():
+    """이미지/표시 인코딩 캐시의 적중/미스/바이트 카운터"""
+    return IMAGE_CACHE.stats()
+
 def get_db_image_path(base, date_str, time_str):
     try: target_hour = int(time_str.split(':')[0])
     except: target_hour = 12 
     
     # [이미지] 시나리오 데이터면 날짜 무시하고 해당 시간대 이미지 가져옴
-    query = """
+    query = f"""
     SELECT img_path FROM tb_scenario s
     JOIN tb_scene sc ON s.scene_id = sc.scene_id
     WHERE sc.scene_name = :bn
       AND s.data_type = 'SCENARIO'
-      AND HOUR(s.timestamp) = :hr
+      AND {slot_hour_expr('s')} = :hr
     LIMIT 1
     """
-    df = run_query(query, params={'bn': base, 'hr': target_hour})
-    if not df.empty and df.iloc[0]['img_path']:
-        return str(df.iloc[0]['img_path']).strip().strip("'").strip('"')
+    img_path = fetch_scalar(query, params={'bn': base, 'hr': target_hour}, cache_ttl=SCENARIO_CACHE_TTL)
+    if img_path:
+        return str(img_path).strip().strip("'").strip('"')
     return None
 
 # --- [3. AI Logic] ---
@@ -86,191 +165,652 @@ def get_center_dist(boxA, boxB):
     cxB, cyB = (boxB[0]+boxB[2])/2, (boxB[1]+boxB[3])/2
     return math.sqrt((cxA-cxB)**2 + (cyA-cyB)**2)
 
-def py_cpu_nms(dets, thresh=0.5):
-    if len(dets) == 0: return []
-    x1, y1, x2, y2 = dets[:, 0], dets[:, 1], dets[:, 2], dets[:, 3]
-    scores = dets[:, 4]
-    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
-    order = scores.argsort()[::-1]
-    keep = []
-    while order.size > 0:
-        i = order[0]
-        keep.append(i)
-        xx1 = np.maximum(x1[i], x1[order[1:]])
-        yy1 = np.maximum(y1[i], y1[order[1:]])
-        xx2 = np.minimum(x2[i], x2[order[1:]])
-        yy2 = np.minimum(y2[i], y2[order[1:]])
-        w = np.maximum(0.0, xx2 - xx1 + 1)
-        h = np.maximum(0.0, yy2 - yy1 + 1)
-        inter = w * h
-        ovr = inter / (areas[i] + areas[order[1:]] - inter)
-        inds = np.where(ovr <= thresh)[0]
-        order = order[inds + 1]
-    return keep
-
-DEBUG_SAVE_DIR = "debug_crops"  # 이 폴더에 진단 이미지가 저장됩니다.
-if not os.path.exists(DEBUG_SAVE_DIR):
-    os.makedirs(DEBUG_SAVE_DIR)
-
-@lru_cache(maxsize=32)
-def cached_detection(path):
+# [타일링 설정] 로컬 학습 환경과 동일한 값
+TILE_SIZE = 1280
+STRIDE = 1000
+DET_CONF = 0.35
+NMS_THRESH = 0.45
+# 한 번의 predict 호출에 묶어 보낼 타일 수 (노드 메모리에 맞게 환경변수로 조정)
+DET_BATCH_SIZE = max(1, int(os.getenv("DET_BATCH_SIZE", 8)))
+
+def get_tile_grid(W, H, tile_size=TILE_SIZE, stride=STRIDE):
+    """이미지 전체를 덮는 타일 좌상단 좌표 목록 [(x, y), ...]"""
+    x_steps = list(range(0, W - tile_size, stride))
+    if (W - tile_size) % stride != 0: x_steps.append(max(0, W - tile_size))
+    if not x_steps and W <= tile_size: x_steps = [0]
+
+    y_steps = list(range(0, H - tile_size, stride))
+    if (H - tile_size) % stride != 0: y_steps.append(max(0, H - tile_size))
+    if not y_steps and H <= tile_size: y_steps = [0]
+
+    return [(x, y) for y in y_steps for x in x_steps]
+
+def _predict_tile_batch(chunk, crops, all_dets):
+    # 리스트로 넘기면 ultralytics가 전처리/추론을 배치로 수행하며,
+    # 결과는 입력 순서대로 타일당 하나씩 반환됩니다.
+    with _det_predict_lock:
+        results = get_det_model().predict(crops, conf=DET_CONF, verbose=False, imgsz=TILE_SIZE)
+    if not results: return
+
+    for (x, y), r in zip(chunk, results):
+        if r.boxes is None: continue
+        for box in r.boxes:
+            bx1, by1, bx2, by2 = box.xyxy[0].tolist()
+            conf = float(box.conf[0])
+            cls = int(box.cls[0])
+
+            # 타일 경계선 노이즈 제거 (로컬 로직)
+            if (bx2 - bx1) < TILE_SIZE * 0.98 and (by2 - by1) < TILE_SIZE * 0.98:
+                all_dets.append((bx1 + x, by1 + y, bx2 + x, by2 + y, conf, cls))
+
+def detect_tiles(get_crop, tiles, batch_size=DET_BATCH_SIZE, prefilter=None, progress=None):
+    """
+    타일 목록을 batch_size 단위로 묶어 DET_MODEL.predict 한 번에 추론하고,
+    결과를 전역 좌표 (x1, y1, x2, y2, conf, cls) 목록으로 돌려줍니다.
+    get_crop(x, y): 좌상단 (x, y)의 TILE_SIZE 타일을 PIL 이미지로 반환하는 함수
+    prefilter: 빈 타일(지형/수면/구름) 건너뛰기 여부 (None이면 TILE_PREFILTER 설정값)
+    progress(done, total): 배치가 끝날 때마다 호출 (작업 큐 진행률 표시용)
+    """
+    if prefilter is None: prefilter = tile_filter.TILE_PREFILTER
+    all_dets = []
+    skipped = 0
+    chunk, crops = [], []
+    for i, (x, y) in enumerate(tiles):
+        crop = get_crop(x, y)
+        if prefilter and not tile_filter.is_informative(crop):
+            skipped += 1
+            continue
+        chunk.append((x, y)); crops.append(crop)
+        if len(crops) >= batch_size:
+            _predict_tile_batch(chunk, crops, all_dets)
+            chunk, crops = [], []
+            if progress: progress(i + 1, len(tiles))
+    if crops:
+        _predict_tile_batch(chunk, crops, all_dets)
+    if progress: progress(len(tiles), len(tiles))
+
+    if prefilter:
+        tile_filter.record_stats(len(tiles), skipped)
+        print(f"[Tile Filter] {skipped}/{len(tiles)} tiles skipped", flush=True)
+    return all_dets
+
+def image_content_digest(path):
+    """이미지 내용 해시 (로컬 파일 또는 원격 이미지의 디스크 미러 바이트). 이미지를 찾을 수 없으면 None"""
+    if not path: return None
+    clean_path = clean_image_path(path)
+    try:
+        if clean_path.startswith('http'):
+            local_path = fetch_to_mirror(clean_path)
+            return file_digest(local_path) if local_path else None
+        full_path = resolve_local_path(clean_path)
+        return file_digest(full_path) if os.path.exists(full_path) else None
+    except Exception as e:
+        print(f"[Digest Error] {e}")
+        return None
+
+def _detector_params():
+    # 결과에 영향을 주는 탐지 설정 -> 하나라도 바뀌면 캐시 키가 달라짐
+    return dict(tile=TILE_SIZE, stride=STRIDE, conf=DET_CONF, nms=NMS_THRESH, prefilter=tile_filter.prefilter_params())
+
+def detection_config_key():
+    """모델 가중치 + 타일링 파라미터만으로 만든 키 (이미지와 무관한 '탐지 설정' 식별자)"""
+    model_digest = get_det_digest()
+    if not model_digest: return None
+    return make_key(None, model_digest, **_detector_params())
+
+def detection_cache_key(path):
+    img_digest = image_content_digest(path)
+    model_digest = get_det_digest()
+    if not img_digest or not model_digest: return None
+    return make_key(img_digest, model_digest, **_detector_params())
+
+def _source_stamp(clean_path):
+    # 로컬 파일은 (크기, 수정시각), 원격은 미러 재검증 결과(ETag/Last-Modified)로 변경 여부 확인
+    # 원격을 확보하지 못하면(네트워크 장애) None -> 기존 색인을 그대로 사용
+    if clean_path.startswith('http'): return mirror_stamp(clean_path)
+    full_path = resolve_local_path(clean_path)
+    if not os.path.exists(full_path): return None
+    st = os.stat(full_path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def _indexed_key(path):
+    """경로 색인에 기록된 현재 설정의 캐시 키 (원본이 바뀌었거나 없으면 None)"""
+    if not path: return None
+    clean_path = clean_image_path(path)
+    config_key = detection_config_key()
+    if not config_key: return None
+    return DETECTION_CACHE.lookup_path(clean_path, config_key, _source_stamp(clean_path))
+
+def lookup_detection(path):
+    """사전 계산(또는 이전 요청)으로 저장된 결과를 추론 없이 조회. 없으면 None"""
+    key = _indexed_key(path)
+    return DETECTION_CACHE.get(key) if key else None
+
+def cached_detection(path, progress=None):
+    """
+    1) 경로 색인(사전 계산 결과) -> 2) 내용 해시 캐시 -> 3) 타일 추론 순으로 찾습니다.
+    영구 캐시 키 = 이미지 내용 + 가중치 + 타일링 파라미터
+    """
+    # 캐시 조회에는 모델 해시만 필요 -> 모델 로드는 실제 추론(run_tiled_detection) 때
+    if not path or not get_det_digest(): return [], 0, 0
+
+    hit = lookup_detection(path)
+    if hit: return hit
+
+    key = detection_cache_key(path)
+    if key:
+        hit = DETECTION_CACHE.get(key)
+        if not hit:
+            dets, W, H = run_tiled_detection(path, progress=progress)
+            if not (W and H): return dets, W, H
+            DETECTION_CACHE.put(key, dets, W, H)
+            hit = (dets, W, H)
+        clean_path = clean_image_path(path)
+        DETECTION_CACHE.record_path(clean_path, detection_config_key(), key, _source_stamp(clean_path))
+        return hit
+
+    return run_tiled_detection(path, progress=progress)
+
+PYRAMID_BUILDER = Prefetcher(max_workers=1, max_pending=16)  # 작업 큐가 없을 때 피라미드 생성 전용
+
+def get_image_pyramid(path):
+    """
+    IMAGE_PYRAMID=1일 때 이미 만들어진 이미지의 타일 피라미드. 없으면 None (호출 측은 원본으로 처리)
+    요청 스레드에서 원본 전체를 디코딩하지 않도록 생성은 schedule_pyramid로 백그라운드에 맡깁니다.
+    """
+    if not PYRAMID_ENABLED or not path: return None
+    digest = image_content_digest(path)
+    if not digest: return None
+    pyr = open_pyramid(digest)
+    if pyr is None: schedule_pyramid(path, digest)
+    return pyr
+
+def build_image_pyramid(path):
+    """피라미드를 없으면 지금 만듭니다 (작업 워커/사전 계산/백그라운드 전용)"""
+    if not PYRAMID_ENABLED or not path: return None
+    digest = image_content_digest(path)
+    if not digest: return None
+    try:
+        return get_or_build_pyramid(digest, lambda: load_image_from_path(path), source=clean_image_path(path))
+    except Exception as e:
+        print(f"[Pyramid Error] {e}")
+        return None
+
+def schedule_pyramid(path, digest):
+    """작업 큐 모드에서는 작업 워커에, 아니면 프로세스 내 백그라운드 스레드에 피라미드 생성을 맡김"""
+    if JOB_QUEUE_ENABLED:
+        JOB_QUEUE.enqueue(job_key('pyramid', digest=digest), 'pyramid', {'path': path}, priority=PRIORITY_BACKGROUND)
+        return
+    PYRAMID_BUILDER.submit(('pyr', digest), lambda p, is_cancelled: build_image_pyramid(p), path)
+
+def _region_reader(path):
+    """
+    box -> RGB PIL 이미지 함수 (피라미드가 있으면 해당 타일만 읽음). 이미지를 읽을 수 없으면 None
+    원본은 한 번만 열고, RGB 변환은 잘라낸 작은 영역에만 적용 (RGBA 원본 전체 복사 방지)
+    """
+    pyr = get_image_pyramid(path)
+    if pyr: return pyr.region_image
+    im = load_image_from_path(path)
+    if not im: return None
+    if im.mode == "RGB": return im.crop
+    return lambda box: im.crop(box).convert("RGB")
+
+def crop_image_region(path, box):
+    """원본 좌표 (x1, y1, x2, y2) 영역을 RGB PIL 이미지로 반환"""
+    read = _region_reader(path)
+    return read(box) if read else None
+
+def _tile_source(path):
+    """
+    탐지용 타일 공급 함수 get_crop(x, y), 원본 크기 (W, H), 분산 탐지용 공유 소스 생성 함수.
+    이미지를 읽을 수 없으면 None
+    """
+    pyr = get_image_pyramid(path)
+    if pyr:
+        # [피라미드 경로] 원본 전체를 디코딩하지 않고 타일 영역만 memmap으로 읽습니다.
+        # AutoContrast는 빌드 시 저장한 원본 히스토그램으로 만든 LUT를 타일마다 적용 -> 결과 동일
+        W, H = pyr.size
+        lut = pyr.autocontrast_lut(cutoff=1)
+        get_crop = lambda x, y: pyr.region_image((x, y, x + TILE_SIZE, y + TILE_SIZE)).point(lut)
+        return get_crop, W, H, lambda: tile_shard.pyramid_spec(pyr, lut)
+
     # 1. 이미지 로드 (S3/Local 공통)
     im = load_image_from_path(path)
-    if not im or not DET_MODEL: return [], 0, 0
+    if not im: return None
+
+    # -----------------------------------------------------------
+    # [Step 1] 로컬 코드와 동일한 전처리 파이프라인
+    # -----------------------------------------------------------
+
+    # 1. 무조건 RGB 변환 (로컬 코드: if im.mode != "RGB": im = im.convert("RGB"))
+    # (투명 배경 처리 로직도 굳이 넣지 않습니다. 로컬 코드가 그냥 convert('RGB')로 잘 됐다면 그게 정답입니다.)
+    if im.mode != "RGB":
+        im = im.convert("RGB")
+
+    # 2. [핵심 복구] AutoContrast 적용
+    # 파일이 62MB 원본이므로, 이제 이 기능은 '독'이 아니라 '약'이 됩니다.
+    # 위성 사진의 대비를 높여 비행기를 선명하게 만듭니다.
+    im_proc = ImageOps.autocontrast(im, cutoff=1)
+    W, H = im.size
+    return (lambda x, y: im_proc.crop((x, y, x + TILE_SIZE, y + TILE_SIZE))), W, H, lambda: tile_shard.SharedImage(im_proc)
+
+def _finalize_detections(all_dets):
+    """타일별 (x1, y1, x2, y2, conf, cls) -> NMS -> [x1, y1, x2, y2, label, conf, idx, 'STATIC']"""
+    final_parsed = []
+    if len(all_dets) > 0:
+        dets_arr = np.array(all_dets)
+        keep_idxs = grid_nms(dets_arr, NMS_THRESH)
+
+        final_dets = dets_arr[keep_idxs]
+        for i, d in enumerate(final_dets):
+            x1, y1, x2, y2, conf, cls = d
+            label = get_det_model().names[int(cls)]
+            final_parsed.append([x1, y1, x2, y2, label, conf, i, 'STATIC'])
+    return final_parsed
+
+def run_tiled_detection(path, prefilter=None, progress=None):
+    if not get_det_model(): return [], 0, 0
 
     try:
+        source = _tile_source(path)
+        if not source: return [], 0, 0
+        get_crop, W, H, shared_source = source
+
         # -----------------------------------------------------------
-        # [Step 1] 로컬 코드와 동일한 전처리 파이프라인
-        # -----------------------------------------------------------
-        
-        # 1. 무조건 RGB 변환 (로컬 코드: if im.mode != "RGB": im = im.convert("RGB"))
-        # (투명 배경 처리 로직도 굳이 넣지 않습니다. 로컬 코드가 그냥 convert('RGB')로 잘 됐다면 그게 정답입니다.)
-        if im.mode != "RGB":
-            im = im.convert("RGB")
-
-        # 2. [핵심 복구] AutoContrast 적용
-        # 파일이 62MB 원본이므로, 이제 이 기능은 '독'이 아니라 '약'이 됩니다.
-        # 위성 사진의 대비를 높여 비행기를 선명하게 만듭니다.
-        im_proc = ImageOps.autocontrast(im, cutoff=1)
-        
-        # -----------------------------------------------------------
-        # [Step 2] 타일링 및 탐지 (로컬 설정값 완벽 준수)
+        # [Step 2] 타일링 및 배치 탐지 (로컬 설정값 완벽 준수)
         # -----------------------------------------------------------
-        W, H = im.size
-        TILE_SIZE = 1280  # 로컬 코드 값
-        STRIDE = 1000     # 로컬 코드 값
-        
-        all_dets = []
-        
-        x_steps = list(range(0, W - TILE_SIZE, STRIDE))
-        if (W - TILE_SIZE) % STRIDE != 0: x_steps.append(max(0, W - TILE_SIZE))
-        if not x_steps and W <= TILE_SIZE: x_steps = [0]
-            
-        y_steps = list(range(0, H - TILE_SIZE, STRIDE))
-        if (H - TILE_SIZE) % STRIDE != 0: y_steps.append(max(0, H - TILE_SIZE))
-        if not y_steps and H <= TILE_SIZE: y_steps = [0]
-        
-        for y in y_steps:
-            for x in x_steps:
-                # 3. 크롭 (PIL Image 그대로 사용)
-                crop = im_proc.crop((x, y, x + TILE_SIZE, y + TILE_SIZE))
-                
-                # 4. 예측 (로컬과 동일한 conf=0.35)
-                # BGR 변환 같은 건 하지 않습니다. 로컬에서도 안 했으니까요.
-                results = DET_MODEL.predict(crop, conf=0.35, verbose=False, imgsz=TILE_SIZE)
-                
-                if not results: continue
-                
-                for r in results:
-                    if r.boxes is None: continue
-                    for box in r.boxes:
-                        bx1, by1, bx2, by2 = box.xyxy[0].tolist()
-                        conf = float(box.conf[0])
-                        cls = int(box.cls[0])
-                        
-                        gx1, gy1 = bx1 + x, by1 + y
-                        gx2, gy2 = bx2 + x, by2 + y
-                        
-                        # 타일 경계선 노이즈 제거 (로컬 로직)
-                        if (bx2 - bx1) < TILE_SIZE * 0.98 and (by2 - by1) < TILE_SIZE * 0.98:
-                            all_dets.append((gx1, gy1, gx2, gy2, conf, cls))
-                            
-        final_parsed = []
-        if len(all_dets) > 0:
-            dets_arr = np.array(all_dets)
-            keep_idxs = py_cpu_nms(dets_arr, 0.45)
-            
-            final_dets = dets_arr[keep_idxs]
-            for i, d in enumerate(final_dets):
-                x1, y1, x2, y2, conf, cls = d
-                label = DET_MODEL.names[int(cls)]
-                final_parsed.append([x1, y1, x2, y2, label, conf, i, 'STATIC'])
-                
-        return final_parsed, W, H
+        tiles = get_tile_grid(W, H)
+        pool = tile_shard.get_shard_pool() if len(tiles) >= tile_shard.SHARD_MIN_TILES else None
+        if pool:
+            # 대형 영상: 타일을 워커 프로세스들에 나눠 추론 (공유 메모리로 전달) -> NMS로 합침
+            with shared_source() as spec:
+                all_dets = pool.detect(spec, tiles, prefilter=prefilter, progress=progress, batch_size=DET_BATCH_SIZE)
+        else:
+            all_dets = detect_tiles(get_crop, tiles, prefilter=prefilter, progress=progress)
+        return _finalize_detections(all_dets), W, H
         
     except Exception as e:
         print(f"Det Error: {e}")
         return [], 0, 0
 
-def run_detection_and_compare(path_t1, path_t2):
-    dets1, w1, h1 = cached_detection(path_t1)
-    dets2, w2, h2 = cached_detection(path_t2)
-    import copy
-    d1_copy = copy.deepcopy(dets1) if dets1 else []
-    d2_copy = copy.deepcopy(dets2) if dets2 else []
-    for i, d1 in enumerate(d1_copy):
-        match = False
-        for d2 in d2_copy:
-            if get_center_dist(d1[:4], d2[:4]) < 60: match = True; break
-        if not match: d1_copy[i][7] = 'VANISHED'
-    for i, d2 in enumerate(d2_copy):
-        match = False
-        for d1 in d1_copy:
-            if get_center_dist(d2[:4], d1[:4]) < 60: match = True; break
-        if not match: d2_copy[i][7] = 'NEW'
-    return d1_copy, w1, h1, d2_copy, w2, h2
+def _overview_gray(path):
+    """변화 검출용 1/CHANGE_SCALE 회색조 영상 (피라미드가 있으면 해당 축소 레벨을 그대로 사용)"""
+    s = change_detection.CHANGE_SCALE
+    pyr = get_image_pyramid(path)
+    if pyr:
+        level = min(int(math.log2(s)), len(pyr.levels) - 1)
+        info = pyr.levels[level]
+        im = pyr.region_image((0, 0, info['width'], info['height']), level)
+        # PIL reduce와 같은 크기(올림)로 맞춰야 피라미드가 없는 쪽 영상과 비교 가능
+        target = (-(-pyr.width // s), -(-pyr.height // s))
+        if im.size != target: im = im.resize(target, Image.BILINEAR)
+        return change_detection.overview_gray(im, scale=1)
+    im = load_image_from_path(path)
+    return change_detection.overview_gray(im, s) if im else None
+
+def _delta_cache_key(t1_path, t2_path):
+    # T2 결과가 T1 결과에 의존하므로 두 이미지 해시 + 변화 검출 설정을 모두 키에 넣음
+    d1, d2 = image_content_digest(t1_path), image_content_digest(t2_path)
+    model_digest = get_det_digest()
+    if not (d1 and d2 and model_digest): return None
+    return make_key(d2, model_digest, **_detector_params(), delta_from=d1, change=change_detection.change_params())
+
+def detect_with_changes(t1_path, t2_path, dets1, W1, H1, progress=None):
+    """
+    T2 탐지를 변화 영역으로 한정합니다.
+    두 영상을 정합해 변화 마스크를 만들고, 변화가 있는 타일만 T2에서 다시 추론한 뒤
+    나머지 영역은 T1 탐지 결과(정합 이동량만큼 평행이동)를 재사용합니다.
+    반환: (dets, W, H) 또는 None (정합 실패/크기 불일치/변화가 너무 많음 -> 전체 탐지로 대체)
+    """
+    if not get_det_model() or not (W1 and H1): return None
+
+    key = _delta_cache_key(t1_path, t2_path)
+    if key:
+        hit = DETECTION_CACHE.get(key)
+        if hit: return hit
+
+    try:
+        source = _tile_source(t2_path)
+        if not source: return None
+        get_crop, W, H, _ = source
+        if (W, H) != (W1, H1): return None
+
+        gray1, gray2 = _overview_gray(t1_path), _overview_gray(t2_path)
+        if gray1 is None or gray2 is None: return None
+        cmap = change_detection.compute_change_map(gray1, gray2)
+        if cmap is None: return None
+
+        tiles = get_tile_grid(W, H)
+        changed = [(x, y) for x, y in tiles if cmap.tile_changed(x, y, TILE_SIZE)]
+        if len(changed) > len(tiles) * change_detection.MAX_CHANGED_RATIO: return None
+
+        all_dets = detect_tiles(get_crop, changed, progress=progress)
+
+        # 변화 타일 밖에 중심이 있는 T1 탐지를 T2 좌표로 옮겨 재사용
+        dx, dy = cmap.shift
+        name_to_cls = {v: k for k, v in get_det_model().names.items()}
+        ch = np.array(changed, dtype=np.float64).reshape(-1, 2)
+        reused = 0
+        for d in dets1:
+            x1, y1, x2, y2 = d[0] + dx, d[1] + dy, d[2] + dx, d[3] + dy
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            if not (0 <= cx < W and 0 <= cy < H): continue
+            inside = (cx >= ch[:, 0]) & (cx < ch[:, 0] + TILE_SIZE) & (cy >= ch[:, 1]) & (cy < ch[:, 1] + TILE_SIZE)
+            if inside.any() or d[4] not in name_to_cls: continue
+            all_dets.append((x1, y1, x2, y2, float(d[5]), name_to_cls[d[4]]))
+            reused += 1
+
+        print(f"[Change] {len(changed)}/{len(tiles)} tiles re-detected, {reused} T1 dets reused "
+              f"(shift={dx:.1f},{dy:.1f} resp={cmap.response:.2f})", flush=True)
+        dets = _finalize_detections(all_dets)
+        if key: DETECTION_CACHE.put(key, dets, W, H)
+        return dets, W, H
+
+    except Exception as e:
+        print(f"[Change Error] {e}")
+        return None
+
+def _has_full_detection(path):
+    # 존재 여부만 확인 (탐지 목록 JSON을 읽지 않음)
+    key = _indexed_key(path)
+    if key and DETECTION_CACHE.has(key): return True
+    key = detection_cache_key(path)
+    return bool(key and DETECTION_CACHE.has(key))
+
+def _det_boxes(dets):
+    return np.array([d[:4] for d in dets], dtype=np.float64).reshape(-1, 4)
+
+def _stage_progress(progress, start, end, label):
+    # 단계별 타일 진행률(done/total)을 전체 작업 진행률 구간 [start, end]로 변환
+    if not progress: return None
+    return lambda done, total: progress(start + (end - start) * done / max(1, total), f"{label} 탐지 {done}/{total} 타일")
+
+def run_detection_and_compare(path_t1, path_t2, progress=None):
+    """progress(fraction, message): 작업 큐에서 실행할 때의 진행률 보고 함수"""
+    dets1, w1, h1 = cached_detection(path_t1, progress=_stage_progress(progress, 0.0, 0.45, "T1"))
+    delta = None
+    t2_progress = _stage_progress(progress, 0.45, 0.9, "T2")
+    if change_detection.CHANGE_DETECTION and not _has_full_detection(path_t2):
+        # T2 전체 탐지 결과가 이미 있으면 그대로 쓰고, 없을 때만 변화 영역 탐지
+        delta = detect_with_changes(path_t1, path_t2, dets1, w1, h1, progress=t2_progress)
+    dets2, w2, h2 = delta if delta else cached_detection(path_t2, progress=t2_progress)
+    if progress: progress(0.9, "T1/T2 비교")
+
+    # 중심 거리 60px 이내 1:1 최적 매칭 -> T1에서 짝이 없으면 VANISHED, T2에서 짝이 없으면 NEW
+    # 캐시된 리스트는 건드리지 않고 상태만 바꾼 새 행을 만듭니다 (deepcopy 불필요).
+    m1, m2 = match_detections(_det_boxes(dets1), _det_boxes(dets2), max_dist=60)
+    d1_out = [d[:7] + ['STATIC' if ok else 'VANISHED'] for d, ok in zip(dets1, m1)]
+    d2_out = [d[:7] + ['STATIC' if ok else 'NEW'] for d, ok in zip(dets2, m2)]
+    return d1_out, w1, h1, d2_out, w2, h2
+
+# --- [분석 작업 큐 연동] ---
+def comparison_cached(path_t1, path_t2):
+    """두 이미지의 탐지 결과가 모두 캐시에 있어 요청 안에서 바로 비교해도 되는지"""
+    if path_t1 and not _has_full_detection(path_t1): return False
+    if path_t2 and not _has_full_detection(path_t2):
+        if not change_detection.CHANGE_DETECTION: return False
+        key = _delta_cache_key(path_t1, path_t2)
+        return bool(key and DETECTION_CACHE.has(key))
+    return True
+
+def compare_job_key(path_t1, path_t2):
+    # 탐지 설정이 바뀌면 다른 작업으로 취급
+    return job_key('compare', t1=clean_image_path(path_t1) if path_t1 else None, t2=clean_image_path(path_t2) if path_t2 else None,
+                   config=detection_config_key(), change=change_detection.CHANGE_DETECTION)
+
+def run_compare_job(payload, progress):
+    """작업 워커(job_worker.py)에서 실행: 탐지 + 비교 + 박스 분류까지 끝낸 결과를 JSON으로 반환"""
+    t1, t2 = payload.get('t1'), payload.get('t2')
+    d1, w1, h1, d2, w2, h2 = run_detection_and_compare(t1, t2, progress=progress)
+    progress(0.95, "박스 분류")
+    classify_detections(t2, d2)
+    classify_detections(t1, d1)
+    plain = lambda dets: [[float(x1), float(y1), float(x2), float(y2), str(label), float(conf), int(i), status]
+                          for x1, y1, x2, y2, label, conf, i, status in dets]
+    return {'t1': {'dets': plain(d1), 'w': w1, 'h': h1}, 't2': {'dets': plain(d2), 'w': w2, 'h': h2}}
+
+JOB_HANDLERS = {'compare': run_compare_job}
+
+CLS_BATCH_SIZE = max(1, int(os.getenv("CLS_BATCH_SIZE", 32)))
+CLS_TOPK = 3
+CLASSIFIER = Prefetcher(max_workers=1, max_pending=16)  # 분석 후 백그라운드 분류 전용
+
+def _cls_input(crop_img):
+    # 작은 물체가 많아 2배 확대 후 분류 (클릭 시 경로와 동일한 전처리)
+    w, h = crop_img.size
+    return crop_img.resize((w*2, h*2), Image.LANCZOS)
+
+def _classify_batch(crops, progress=None):
+    """crop 목록 -> 각 crop의 [[라벨, 확률], ...] (CLS_BATCH_SIZE 단위 배치 추론)"""
+    model = get_cls_model()
+    out = []
+    for i in range(0, len(crops), CLS_BATCH_SIZE):
+        chunk = [_cls_input(c) for c in crops[i:i + CLS_BATCH_SIZE]]
+        # 배치 단위로 잠금 -> 백그라운드 분류 중에도 클릭 분류가 배치 사이에 끼어들 수 있음
+        with _cls_predict_lock:
+            results = model.predict(chunk, verbose=False)
+        for r in results:
+            probs = r.probs
+            out.append([[model.names[int(probs.top5[k])], float(probs.top5conf[k])] for k in range(min(CLS_TOPK, len(probs.top5)))])
+        if progress: progress(len(out) / len(crops), f"박스 분류 {len(out)}/{len(crops)}")
+    return out
+
+def format_classification(topk):
+    """저장된 top-k -> 상세 패널용 dict"""
+    if not topk: return {"cls_top1": "Error", "cls_conf": "-", "cls_top5": []}
+    top5 = [html.Li(f"{name}: {score*100:.1f}%") for name, score in topk]
+    return {"cls_top1": topk[0][0], "cls_conf": f"{topk[0][1]*100:.1f}%", "cls_top5": top5}
 
 def run_classification(crop_img):
-    if not CLS_MODEL: return {"cls_top1": "-", "cls_conf": "-", "cls_top5": []}
+    """클릭한 박스 1개를 즉시 분류 (사전 분류 결과가 없을 때의 대체 경로)"""
+    if not get_cls_model(): return {"cls_top1": "-", "cls_conf": "-", "cls_top5": []}
     try:
         w, h = crop_img.size
         if w == 0 or h == 0: return {"cls_top1": "Error", "cls_conf": "-", "cls_top5": []}
-        crop_img = crop_img.resize((w*2, h*2), Image.LANCZOS)
-        res = CLS_MODEL.predict(crop_img, verbose=False)
-        probs = res[0].probs
-        top5 = []
-        for i in range(min(3, len(probs.top5))):
-            idx = int(probs.top5[i])
-            score = float(probs.top5conf[i])
-            top5.append(html.Li(f"{CLS_MODEL.names[idx]}: {score*100:.1f}%"))
-        top1_idx = int(probs.top1)
-        return {"cls_top1": CLS_MODEL.names[top1_idx], "cls_conf": f"{float(probs.top1conf)*100:.1f}%", "cls_top5": top5}
+        return format_classification(_classify_batch([crop_img])[0])
     except Exception:
         return {"cls_top1": "Error", "cls_conf": "-", "cls_top5": []}
 
-def create_figure(img_path, dets, selected_idx=None):
+def classify_detections(path, dets, is_cancelled=None, progress=None):
+    """
+    이미지의 모든 탐지 박스를 한 번에 배치 분류해 영구 캐시에 저장합니다.
+    이미 분류된 박스는 건너뜁니다. 반환: {box_key: [[라벨, 확률], ...]}
+    """
+    model_digest = get_cls_digest()
+    if not model_digest or not dets: return {}
+    image_key = image_content_digest(path)
+    if not image_key: return {}
+
+    done = DETECTION_CACHE.get_classifications(image_key, model_digest)
+    todo = {}  # 입력 순서 유지 + O(1) 중복 확인
+    for d in dets:
+        x1, y1, x2, y2 = map(int, d[:4])
+        key = box_key(d)
+        if x2 > x1 and y2 > y1 and key not in done: todo.setdefault(key, None)
+    if not todo or (is_cancelled and is_cancelled()) or not get_cls_model(): return done
+
+    read = _region_reader(path)
+    if not read: return done
+    valid = [(k, read(tuple(int(v) for v in k.split(",")))) for k in todo]
+    try:
+        results = dict(zip([k for k, _ in valid], _classify_batch([c for _, c in valid], progress)))
+    except Exception as e:
+        print(f"[Classify Error] {e}")
+        return done
+    DETECTION_CACHE.put_classifications(image_key, model_digest, results)
+    print(f"[Classify] {len(results)} boxes classified", flush=True)
+    done.update(results)
+    return done
+
+def schedule_classification(path, dets):
+    """
+    분석 직후 백그라운드에서 classify_detections 실행 (클릭 전에 결과를 준비)
+    작업 큐 모드에서는 웹 프로세스에 모델을 올리지 않도록 작업 워커에 맡깁니다.
+    """
+    if not get_cls_digest() or not path or not dets: return
+    if JOB_QUEUE_ENABLED:
+        boxes = [[int(v) for v in d[:4]] for d in dets]
+        key = job_key('classify', path=clean_image_path(path), model=get_cls_digest(), boxes=sorted(map(box_key, boxes)))
+        JOB_QUEUE.enqueue(key, 'classify', {'path': path, 'boxes': boxes}, priority=PRIORITY_BACKGROUND)
+        return
+    CLASSIFIER.submit(('cls', clean_image_path(path)), classify_detections, path, dets)
+
+def run_classify_job(payload, progress):
+    """작업 워커에서 실행: 박스 좌표 목록을 배치 분류해 캐시에 저장"""
+    # 배치마다 진행률(= 작업 하트비트) 갱신 -> 긴 분류가 JOB_STALE_SEC 뒤 다른 워커에 다시 잡히지 않음
+    done = classify_detections(payload['path'], payload['boxes'], progress=progress)
+    return {'classified': len(done)}
+
+JOB_HANDLERS['classify'] = run_classify_job
+
+def run_pyramid_job(payload, progress):
+    """작업 워커에서 실행: 이미지 타일 피라미드 생성"""
+    pyr = build_image_pyramid(payload['path'])
+    return {'built': pyr is not None}
+
+JOB_HANDLERS['pyramid'] = run_pyramid_job
+
+def lookup_classification(path, box):
+    """저장된 분류 결과 (상세 패널용 dict). 아직 없으면 None"""
+    model_digest = get_cls_digest()
+    if not model_digest: return None
+    image_key = image_content_digest(path)
+    if not image_key: return None
+    topk = DETECTION_CACHE.get_classifications(image_key, model_digest).get(box_key(box))
+    return format_classification(topk) if topk else None
+
+def encode_display_image(img_path, max_side=3000, quality=85):
+    """
+    웹 표시용 JPEG의 URL과 원본 크기를 반환합니다. (img_source, orig_w, orig_h) 또는 None
+    (이미지 해시, 크기, 화질)별로 한 번만 인코딩해 cache/display에 저장하고 /display/<token>.jpg 로 서빙합니다.
+    디스크에 쓸 수 없으면 예전처럼 data URI로 인라인합니다.
+    """
+    if not img_path: return None
+    clean_path = clean_image_path(img_path)
+    cache_key = ('display', clean_path, _source_stamp(clean_path), max_side, quality)
+    cached = IMAGE_CACHE.get(cache_key)
+    if cached is not None: return cached
+
+    digest = image_content_digest(img_path)
+    if not digest: return None
+    token = display_token(digest, max_side, quality)
+    size = lookup_display(token)
+    if size:
+        # 다른 워커나 이전 실행에서 이미 인코딩됨 -> 디코딩 없이 URL만
+        result = (display_url(token), *size)
+        IMAGE_CACHE.put(cache_key, result, 256)
+        return result
+
     # 1. [수정] get_safe_image_path -> load_image_from_path
     # S3 URL이나 로컬 경로 모두 처리 가능한 통합 로더를 사용합니다.
-    im = load_image_from_path(img_path)
-    
-    fig = go.Figure()
-    
-    # 이미지가 없으면 빈 그래프 반환
-    if not im:
-        fig.add_annotation(text="이미지 데이터 없음", showarrow=False)
-        fig.update_layout(xaxis={'visible':False}, yaxis={'visible':False})
-        return fig
+    # 피라미드가 있으면 원본 대신 표시 크기에 맞는 축소 레벨만 읽습니다.
+    pyr = get_image_pyramid(img_path)
+    im = None if pyr else load_image_from_path(img_path)
+    if not pyr and not im: return None
 
-    # 원본 크기 변수 초기화
-    orig_w, orig_h = 0, 0
-    
     try:
-        # load_image_from_path는 이미 PIL.Image 객체를 반환하므로 with open()이 필요 없습니다.
-        # 원본 보호를 위해 복사본을 생성하여 리사이징합니다.
-        im_display = im.copy()
-        
-        if im_display.mode != "RGB": 
-            im_display = im_display.convert("RGB")
-            
-        # 1. 원본 크기 저장 (좌표계 유지를 위해 필수!)
-        orig_w, orig_h = im_display.size
-        
         # 2. 웹 표시용 해상도 조절 (QHD급 3000px)
         # 원본(62MB)을 그대로 Base64로 만들면 브라우저가 멈추므로 리사이징합니다.
-        target_size = (3000, 3000)
-        im_display.thumbnail(target_size, Image.LANCZOS)
-        
-        # 3. JPEG 압축하여 전송
-        buffer = io.BytesIO()
-        im_display.save(buffer, format="JPEG", quality=85) 
-        
-        encoded_image = base64.b64encode(buffer.getvalue()).decode()
-        img_source = f"data:image/jpeg;base64,{encoded_image}"
+        target_size = (max_side, max_side)
+
+        if pyr:
+            # 1. 원본 크기 저장 (좌표계 유지를 위해 필수!)
+            orig_w, orig_h = pyr.size
+            im_display = pyr.thumbnail(max_side)
+        else:
+            # load_image_from_path는 이미 PIL.Image 객체를 반환하므로 with open()이 필요 없습니다.
+            # 원본 보호를 위해 복사본을 생성하여 리사이징합니다.
+            im_display = im.copy()
             
+            if im_display.mode != "RGB": 
+                im_display = im_display.convert("RGB")
+                
+            # 1. 원본 크기 저장 (좌표계 유지를 위해 필수!)
+            orig_w, orig_h = im_display.size
+            im_display.thumbnail(target_size, Image.LANCZOS)
+        
+        # 3. JPEG 저장 후 URL로 참조
+        try:
+            store_display(token, im_display, orig_w, orig_h, quality)
+            img_source = display_url(token)
+        except OSError as e:
+            print(f"[Display Cache Error] {e}")
+            buffer = io.BytesIO()
+            im_display.save(buffer, format="JPEG", quality=quality) 
+            encoded_image = base64.b64encode(buffer.getvalue()).decode()
+            img_source = f"data:image/jpeg;base64,{encoded_image}"
     except Exception as e:
         print(f"이미지 처리 실패: {e}")
+        return None
+
+    result = (img_source, orig_w, orig_h)
+    IMAGE_CACHE.put(cache_key, result, len(img_source))
+    return result
+
+def _status_color(status):
+    if status == 'NEW':        return '#ff4757'
+    elif status == 'VANISHED': return "#bddb4e"
+    return '#00d2d3'
+
+def _selection_props(dets, selected_idx):
+    """선택 박스 강조 트레이스(x, y)와 라벨 주석 속성. 선택이 없으면 빈 트레이스 + 숨김 주석"""
+    match = next((d for d in dets if d[6] == selected_idx), None) if selected_idx is not None else None
+    if not match:
+        return dict(x=[], y=[]), dict(x=0, y=0, text="", visible=False)
+    x1, y1, x2, y2, label, conf, _, status = match
+    return (
+        dict(x=[x1, x2, x2, x1, x1], y=[y1, y1, y2, y2, y1]),
+        dict(x=x1, y=y1, text=f"{label} {conf:.2f}", bgcolor=_status_color(status), visible=True)
+    )
+
+# create_figure 트레이스 순서: 상태별 박스 3개 -> 클릭 마커 -> NEW 라벨 -> 선택 강조
+BOX_STATUSES = ('STATIC', 'VANISHED', 'NEW')
+BOX_FILLS = {'STATIC': "rgba(0,0,0,0)", 'VANISHED': "rgba(0,0,0,0)", 'NEW': "rgba(255, 71, 87, 0.2)"}
+SELECTION_TRACE_POS = len(BOX_STATUSES) + 2
+
+def _packed_boxes(dets):
+    """
+    박스 여러 개를 NaN으로 끊은 폴리라인 하나로 묶습니다. (박스당 꼭짓점 5개 + NaN 1개)
+    반환: xs, ys, customdata(점마다 탐지 idx, 끊김 자리는 -1)
+    """
+    if not dets: return [], [], []
+    b = np.array([d[:4] for d in dets], dtype=np.float64)
+    x1, y1, x2, y2 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    gap = np.full(len(b), np.nan)
+    xs = np.column_stack([x1, x2, x2, x1, x1, gap]).ravel()
+    ys = np.column_stack([y1, y1, y2, y2, y1, gap]).ravel()
+    idx = np.array([d[6] for d in dets], dtype=np.int64)
+    custom = np.column_stack([np.repeat(idx[:, None], 5, axis=1), np.full(len(b), -1)]).ravel()
+    return xs, ys, custom
+
+def select_box_patch(dets, selected_idx):
+    """
+    create_figure로 그린 그림에서 선택 강조만 바꾸는 부분 업데이트(Patch).
+    트레이스 수가 고정이라 선택 트레이스 위치(SELECTION_TRACE_POS)와 주석 위치(0)가 항상 같습니다.
+    이미지가 있는 그림에만 해당 -> "이미지 데이터 없음" 그림에는 호출하지 않습니다.
+    """
+    sel_trace, sel_ann = _selection_props(dets, selected_idx)
+    patched = Patch()
+    for k, v in sel_trace.items():
+        patched['data'][SELECTION_TRACE_POS][k] = v
+    for k, v in sel_ann.items():
+        patched['layout']['annotations'][0][k] = v
+    return patched
+
+def create_figure(img_path, dets, selected_idx=None):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    display = encode_display_image(img_path)
+    
+    # 이미지가 없으면 빈 그래프 반환
+    if not display:
+        fig.add_annotation(text="이미지 데이터 없음", showarrow=False)
+        fig.update_layout(xaxis={'visible':False}, yaxis={'visible':False})
         return fig
 
+    # 원본 크기 (좌표계 유지를 위해 필수!)
+    img_source, orig_w, orig_h = display
+
     # [중요] 이미지는 축소했지만, 레이아웃 좌표는 '62MB 원본 크기'로 설정
     fig.add_layout_image(
         dict(
@@ -285,31 +825,42 @@ def create_figure(img_path, dets, selected_idx=None):
         )
     )
 
-    # 박스 그리기 (기존 로직 동일)
-    for d in dets:
-        x1, y1, x2, y2, label, conf, idx, status = d
-        is_sel = (idx == selected_idx)
-        
-        if status == 'NEW':      base_color = '#ff4757'
-        elif status == 'VANISHED': base_color = "#bddb4e"
-        else:                      base_color = '#00d2d3'
-        
-        color = '#ffffff' if is_sel else base_color
-        width = 3 if is_sel else 2
-        fill = f"rgba(255, 71, 87, 0.2)" if status == 'NEW' else "rgba(0,0,0,0)"
-        dash_style = 'dot' if status == 'VANISHED' else 'solid'
-
+    # 박스 그리기: 상태별 트레이스 1개씩 (박스 수와 무관하게 트레이스 수 고정)
+    # 테두리 꼭짓점도 클릭 대상 (customdata = 탐지 idx): hoverinfo='none'은 라벨만 숨기고 클릭 이벤트는 전달
+    # fill="toself"의 기본 hoveron('fills')은 점 정보가 없으므로 'points'로 지정
+    for status in BOX_STATUSES:
+        group = [d for d in dets if d[7] == status]
+        xs, ys, custom = _packed_boxes(group)
         fig.add_trace(go.Scatter(
-            x=[x1, x2, x2, x1, x1], y=[y1, y1, y2, y2, y1],
-            fill="toself", fillcolor=fill, 
-            mode='lines', 
-            line=dict(color=color, width=width, dash=dash_style),
-            hoverinfo='text', text=f"{label} [{status}]", 
-            customdata=[idx], showlegend=False
+            x=xs, y=ys, customdata=custom,
+            fill="toself", fillcolor=BOX_FILLS[status],
+            mode='lines', connectgaps=False,
+            line=dict(color=_status_color(status), width=2, dash='dot' if status == 'VANISHED' else 'solid'),
+            hoverinfo='none', hoveron='points', showlegend=False, name=status
         ))
-        
-        if is_sel or status == 'NEW':
-            fig.add_annotation(x=x1, y=y1, text=f"{label} {conf:.2f}", showarrow=False, yshift=-15, font=dict(color="white", size=12), bgcolor=base_color)
+
+    # 클릭/호버 대상: 박스 중심의 투명 마커 (customdata = 탐지 idx)
+    fig.add_trace(go.Scatter(
+        x=np.array([(d[0] + d[2]) / 2 for d in dets], dtype=np.float64),
+        y=np.array([(d[1] + d[3]) / 2 for d in dets], dtype=np.float64),
+        customdata=np.array([d[6] for d in dets], dtype=np.int64),
+        hovertext=[f"{d[4]} [{d[7]}]" for d in dets], hoverinfo='text',
+        mode='markers', marker=dict(size=14, opacity=0), showlegend=False
+    ))
+
+    # NEW 라벨: 주석 대신 텍스트 트레이스 하나
+    new_dets = [d for d in dets if d[7] == 'NEW']
+    fig.add_trace(go.Scatter(
+        x=[d[0] for d in new_dets], y=[d[1] for d in new_dets],
+        text=[f"{d[4]} {d[5]:.2f}" for d in new_dets],
+        mode='text', textposition='top right', textfont=dict(color=_status_color('NEW'), size=12),
+        hoverinfo='skip', showlegend=False
+    ))
+
+    # 선택 강조: 마지막 트레이스 + 유일한 주석 -> 클릭 시 select_box_patch로 이 둘만 갱신
+    sel_trace, sel_ann = _selection_props(dets, selected_idx)
+    fig.add_trace(go.Scatter(mode='lines', line=dict(color='#ffffff', width=3), hoverinfo='skip', showlegend=False, **sel_trace))
+    fig.add_annotation(showarrow=False, yshift=-15, font=dict(color="white", size=12), **sel_ann)
 
     # 축 범위도 원본 크기에 맞춤
     fig.update_xaxes(showgrid=False, range=[0, orig_w], visible=False)
@@ -318,6 +869,57 @@ def create_figure(img_path, dets, selected_idx=None):
     
     return fig
 
+# --- [인접 시간대 프리페치] ---
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCHER = Prefetcher(max_workers=int(os.getenv("PREFETCH_WORKERS", 2)))
+# T(와 T-2h)를 본 다음 조작은 대부분 ±2h 이동:
+# T+2h 비교에는 T+2h 이미지가, T-2h 비교에는 T-4h 이미지가 새로 필요합니다.
+PREFETCH_OFFSETS_HOURS = (2, -4)
+
+def _warm_slot(base, date_str, time_str, is_cancelled, progress=None):
+    path = get_db_image_path(base, date_str, time_str)
+    if not path or is_cancelled(): return
+    build_image_pyramid(path)  # 백그라운드이므로 여기서 바로 생성 (IMAGE_PYRAMID=1일 때)
+    encode_display_image(path)  # 원본 다운로드/디코딩 + 표시용 인코딩 캐시
+    if is_cancelled(): return
+    dets, _, _ = cached_detection(path, progress=progress)  # 영구 탐지 캐시
+    if is_cancelled(): return
+    classify_detections(path, dets, is_cancelled, progress=progress)
+
+def run_prefetch_job(payload, progress):
+    """작업 워커에서 실행: 인접 시간대 하나 예열 (대기열 작업은 취소하지 않음)"""
+    _warm_slot(payload['base'], payload['date'], payload['time'], lambda: False, progress=progress)
+    return {}
+
+JOB_HANDLERS['prefetch'] = run_prefetch_job
+
+def prefetch_adjacent_slots(base, date_str, time_str):
+    """
+    분석 요청 직후 같은 기지의 인접 시간대 이미지/탐지 캐시를 백그라운드로 예열합니다.
+    작업 큐 모드에서는 탐지/분류를 웹 프로세스에서 돌리지 않도록 작업 워커에 맡깁니다.
+    """
+    if not PREFETCH_ENABLED or not base: return
+    try:
+        curr_dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return
+
+    slots = []
+    for offset in PREFETCH_OFFSETS_HOURS:
+        dt = curr_dt + timedelta(hours=offset)
+        slots.append(('slot', base, dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M")))
+
+    if JOB_QUEUE_ENABLED:
+        for _, b, d, t in slots:
+            key = job_key('prefetch', base=b, date=d, time=t, config=detection_config_key())
+            JOB_QUEUE.enqueue(key, 'prefetch', {'base': b, 'date': d, 'time': t}, priority=PRIORITY_BACKGROUND)
+        return
+
+    # 같은 기지에서 이전 위치 기준으로 걸어둔 예열은 더 이상 필요 없으므로 취소
+    PREFETCHER.cancel_group(base, keep=slots)
+    for key in slots:
+        PREFETCHER.submit(key, _warm_slot, base, key[2], key[3], group=base)
+
 # [최종 단순화: 지휘관님 요청대로 DB 값 그대로 더해서 출력]
 def get_trend_data(mode='today', base_name='Sunan'):
     all_slots = [f"{h:02d}:00" for h in range(0, 24, 2)]
@@ -362,28 +964,48 @@ def get_trend_data(mode='today', base_name='Sunan'):
         else:
             return pd.DataFrame({'time': all_slots, 'count': [0]*12})
 
-        query = """
-        SELECT s.timestamp,
-               (COALESCE(s.cnt_fighter, 0) + COALESCE(s.cnt_bomber, 0) + COALESCE(s.cnt_transport, 0)) as total
-        FROM tb_scenario s
-        JOIN tb_scene sc ON s.scene_id = sc.scene_id
-        WHERE sc.scene_name = :bn
-          AND s.timestamp BETWEEN :start AND :end
-          AND s.data_type = 'HISTORY'
-        ORDER BY s.timestamp ASC
-        """
-        df_db = run_query(query, params={'bn': base_name, 'start': start_date, 'end': end_date})
-        
-        if not df_db.empty:
-            df_db['dt'] = pd.to_datetime(df_db['timestamp'])
-            df_db['hour'] = df_db['dt'].dt.hour
-            df_db['time'] = df_db['hour'].apply(lambda h: f"{h - (h % 2):02d}:00")
-            
-            # 과거 데이터는 평균
-            df_agg = df_db.groupby('time')['total'].mean().reset_index()
-            df_agg.rename(columns={'total': 'count'}, inplace=True)
+        if rollups_ready():
+            # 집계 테이블: 슬롯별 합/개수만 읽어 평균 (1년도 월 버킷 12개 x 슬롯 12개 수준)
+            source, params = rollups.range_union(
+                start_date[:10], end_date[:10], ['slot_hour', 'n', 'total_sum'],
+                where="data_type = 'HISTORY' AND scene_id IN (SELECT scene_id FROM tb_scene WHERE scene_name = :bn)")
+            query = f"""
+            SELECT r.slot_hour, SUM(r.total_sum) as total_sum, SUM(r.n) as n
+            FROM {source} r
+            GROUP BY r.slot_hour
+            """
+            df_db = run_query(query, params={'bn': base_name, **params})
+            if not df_db.empty:
+                df_agg = pd.DataFrame({
+                    'time': [f"{int(h):02d}:00" for h in df_db['slot_hour']],
+                    'count': df_db['total_sum'].astype(float) / df_db['n'].astype(float),
+                })
+            else:
+                df_agg = pd.DataFrame(columns=['time', 'count'])
+
         else:
-            df_agg = pd.DataFrame(columns=['time', 'count'])
+            query = """
+            SELECT s.timestamp,
+                   (COALESCE(s.cnt_fighter, 0) + COALESCE(s.cnt_bomber, 0) + COALESCE(s.cnt_transport, 0)) as total
+            FROM tb_scenario s
+            JOIN tb_scene sc ON s.scene_id = sc.scene_id
+            WHERE sc.scene_name = :bn
+              AND s.timestamp BETWEEN :start AND :end
+              AND s.data_type = 'HISTORY'
+            ORDER BY s.timestamp ASC
+            """
+            df_db = run_query(query, params={'bn': base_name, 'start': start_date, 'end': end_date})
+            
+            if not df_db.empty:
+                df_db['dt'] = pd.to_datetime(df_db['timestamp'])
+                df_db['hour'] = df_db['dt'].dt.hour
+                df_db['time'] = df_db['hour'].apply(lambda h: f"{h - (h % 2):02d}:00")
+                
+                # 과거 데이터는 평균
+                df_agg = df_db.groupby('time')['total'].mean().reset_index()
+                df_agg.rename(columns={'total': 'count'}, inplace=True)
+            else:
+                df_agg = pd.DataFrame(columns=['time', 'count'])
 
     # 3. 빈 시간 채우기 (공통)
     df_base = pd.DataFrame({'time': all_slots})
@@ -2,6 +2,8 @@ import dash
 from dash import html, dcc, Input, Output, State, clientside_callback, no_update, callback
 import dash_bootstrap_components as dbc
 from db_manager import log_action
+from utils.image_pyramid import register_pyramid_routes
+from utils.display_cache import register_display_routes
 import time
 
 # [설정] 로고 경로
@@ -41,6 +43,10 @@ app = dash.Dash(
     ]
 )
 server = app.server
+# 피라미드 타일 서빙 (/pyramid/<id>/<level>/<x>/<y>.jpg)
+register_pyramid_routes(server)
+# 분석 화면 배경 이미지 서빙 (/display/<token>.jpg)
+register_display_routes(server)
 
 # --- [Top Navbar] ---
 navbar = dbc.Navbar(
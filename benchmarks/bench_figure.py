@@ -0,0 +1,71 @@
+"""
+분석 화면 오버레이 렌더링 벤치마크: 박스당 트레이스 1개(기존) vs 상태별 트레이스 묶음(create_figure)
+
+실행: python -m benchmarks.bench_figure
+ - 그림 생성 시간, JSON 직렬화 시간과 크기(= Dash 콜백 응답 크기)를 비교합니다.
+ - 배경 이미지는 URL로 고정해 오버레이 비용만 측정합니다.
+"""
+import time
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import ai_core
+
+SIZES = [1000, 5000]
+REPEAT = 3
+IMG_W, IMG_H = 20000, 15000
+
+def make_dets(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, IMG_W - 80, n)
+    y1 = rng.uniform(0, IMG_H - 80, n)
+    size = rng.uniform(20, 80, n)
+    status = rng.choice(['STATIC', 'NEW', 'VANISHED'], n, p=[0.8, 0.1, 0.1])
+    return [[float(x1[i]), float(y1[i]), float(x1[i] + size[i]), float(y1[i] + size[i]),
+             'Fighter', 0.9, i, str(status[i])] for i in range(n)]
+
+def legacy_figure(dets):
+    """변경 전 create_figure의 오버레이: 박스마다 Scatter 1개 + NEW 주석"""
+    fig = go.Figure()
+    fig.add_layout_image(dict(source='/display/bench.jpg', xref="x", yref="y", x=0, y=0,
+                              sizex=IMG_W, sizey=IMG_H, sizing="stretch", layer="below"))
+    for x1, y1, x2, y2, label, conf, idx, status in dets:
+        color = ai_core._status_color(status)
+        fig.add_trace(go.Scatter(
+            x=[x1, x2, x2, x1, x1], y=[y1, y1, y2, y2, y1],
+            fill="toself", fillcolor=ai_core.BOX_FILLS[status], mode='lines',
+            line=dict(color=color, width=2, dash='dot' if status == 'VANISHED' else 'solid'),
+            hoverinfo='text', text=f"{label} [{status}]", customdata=[idx], showlegend=False
+        ))
+        if status == 'NEW':
+            fig.add_annotation(x=x1, y=y1, text=f"{label} {conf:.2f}", showarrow=False, yshift=-15,
+                               font=dict(color="white", size=12), bgcolor=color)
+    return fig
+
+def measure(build, dets):
+    best_build = best_json = float('inf')
+    size = 0
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fig = build(dets)
+        t1 = time.perf_counter()
+        payload = pio.to_json(fig, validate=False)
+        t2 = time.perf_counter()
+        best_build, best_json = min(best_build, t1 - t0), min(best_json, t2 - t1)
+        size = len(payload)
+    return best_build, best_json, size, len(fig.data)
+
+def main():
+    # 배경 인코딩은 측정 대상이 아니므로 고정 URL 사용
+    ai_core.encode_display_image = lambda path, *a, **k: ('/display/bench.jpg', IMG_W, IMG_H)
+    packed = lambda dets: ai_core.create_figure('bench', dets)
+
+    print(f"{'boxes':>6} | {'renderer':>8} | {'traces':>6} | {'build(s)':>8} | {'json(s)':>8} | {'size(KB)':>9}")
+    for n in SIZES:
+        dets = make_dets(n)
+        for name, build in (('legacy', legacy_figure), ('packed', packed)):
+            t_build, t_json, size, n_traces = measure(build, dets)
+            print(f"{n:>6} | {name:>8} | {n_traces:>6} | {t_build:>8.3f} | {t_json:>8.3f} | {size / 1024:>9.1f}", flush=True)
+
+if __name__ == '__main__':
+    main()
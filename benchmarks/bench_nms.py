@@ -0,0 +1,52 @@
+"""
+NMS 마이크로 벤치마크: 기존 py_cpu_nms vs 클래스별 격자 NMS(grid_nms)
+
+실행: python -m benchmarks.bench_nms
+"""
+import time
+import numpy as np
+from utils.nms import py_cpu_nms, grid_nms
+
+SIZES = [100, 1000, 10000]
+REPEAT = 3
+
+def make_dets(n, seed=0, n_classes=4):
+    """타일 중복 영역을 흉내 낸 검출 배열: 각 비행기마다 약간 흔들린 박스 2~3개"""
+    rng = np.random.default_rng(seed)
+    n_objects = max(1, n // 2)
+    # 물체 밀도를 일정하게 유지하도록 장면 크기를 박스 수에 맞춰 키움
+    extent = 400 * np.sqrt(n_objects)
+    cx = rng.uniform(0, extent, n_objects)
+    cy = rng.uniform(0, extent, n_objects)
+    size = rng.uniform(20, 60, n_objects)
+    cls = rng.integers(0, n_classes, n_objects)
+
+    pick = rng.integers(0, n_objects, n)
+    jitter = rng.normal(0, 3, (n, 2))
+    half = size[pick] / 2
+    x1 = cx[pick] - half + jitter[:, 0]
+    y1 = cy[pick] - half + jitter[:, 1]
+    return np.column_stack([
+        x1, y1, x1 + size[pick], y1 + size[pick],
+        rng.uniform(0.35, 0.99, n), cls[pick]
+    ])
+
+def best_of(fn, dets):
+    best = float('inf')
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn(dets, 0.45)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    print(f"{'boxes':>8} {'py_cpu_nms(ms)':>16} {'grid_nms(ms)':>14} {'speedup':>9} {'kept(old/new)':>15}")
+    for n in SIZES:
+        dets = make_dets(n)
+        t_old = best_of(py_cpu_nms, dets)
+        t_new = best_of(grid_nms, dets)
+        kept = f"{len(py_cpu_nms(dets, 0.45))}/{len(grid_nms(dets, 0.45))}"
+        print(f"{n:>8} {t_old*1000:>16.2f} {t_new*1000:>14.2f} {t_old/t_new:>8.1f}x {kept:>15}")
+
+if __name__ == '__main__':
+    main()
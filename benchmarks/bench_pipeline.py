@@ -0,0 +1,150 @@
+"""
+ai_core 탐지 파이프라인 단계별 벤치마크 (가짜 모델 + 합성 영상, 실제 가중치 불필요)
+
+실행:
+    python -m benchmarks.bench_pipeline --json bench_head.json
+    python -m benchmarks.bench_pipeline --sizes 2000 5000 --latency 0.02 --density 10
+    python -m benchmarks.bench_pipeline --compare bench_base.json bench_head.json
+
+단계:
+    autocontrast  원본 AutoContrast
+    tiling        타일 좌표 계산 + 전체 타일 crop
+    detect        detect_tiles (배치 추론 포함, 가짜 모델 지연 포함)
+    nms           grid_nms + 결과 파싱
+    compare       T1/T2 탐지 매칭 (match_detections)
+    figure        create_figure (배경 인코딩 제외)
+    display       표시용 축소 + JPEG 인코딩
+비교 모드는 단계별 시간 비율을 출력하고, --threshold(기본 1.2배)를 넘는 단계가 있으면 종료 코드 1을 돌려줍니다.
+"""
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from PIL import Image, ImageOps
+import ai_core
+from utils.matching import match_detections
+from benchmarks.fake_model import synthetic_pair, install_fake_models
+
+DEFAULT_SIZES = [2000, 5000, 10000, 20000]
+STAGES = ['autocontrast', 'tiling', 'detect', 'nms', 'compare', 'figure', 'display']
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def _detect_image(im):
+    """run_tiled_detection의 PIL 경로를 단계별로 나눠 측정"""
+    t = {}
+    im_proc, t['autocontrast'] = _timed(lambda: ImageOps.autocontrast(im, cutoff=1))
+    W, H = im.size
+    get_crop = lambda x, y: im_proc.crop((x, y, x + ai_core.TILE_SIZE, y + ai_core.TILE_SIZE))
+
+    def crop_all():
+        tiles = ai_core.get_tile_grid(W, H)
+        for x, y in tiles: get_crop(x, y).load()
+        return tiles
+    tiles, t['tiling'] = _timed(crop_all)
+
+    raw, t['detect'] = _timed(lambda: ai_core.detect_tiles(get_crop, tiles))
+    dets, t['nms'] = _timed(lambda: ai_core._finalize_detections(raw))
+    return dets, t, len(tiles), len(raw)
+
+def _status_dets(dets1, dets2):
+    m1, m2 = match_detections(ai_core._det_boxes(dets1), ai_core._det_boxes(dets2), max_dist=60)
+    d2 = [d[:7] + ['STATIC' if ok else 'NEW'] for d, ok in zip(dets2, m2)]
+    return d2
+
+def _display(im):
+    thumb = im.copy()
+    thumb.thumbnail((3000, 3000), Image.LANCZOS)
+    buf = io.BytesIO()
+    thumb.save(buf, format="JPEG", quality=85)
+    return len(buf.getvalue())
+
+def bench_size(width, args):
+    t1, t2, n_objects = synthetic_pair(width, density=args.density, changed=args.changed, seed=args.seed)
+    dets1, times, n_tiles, n_raw = _detect_image(t1)
+    dets2, times2, _, _ = _detect_image(t2)
+    # T1/T2 두 장의 평균 (비교 한 번에 두 장을 처리하므로 합계는 약 2배)
+    times = {k: (times[k] + times2[k]) / 2 for k in times}
+
+    d2, times['compare'] = _timed(lambda: _status_dets(dets1, dets2))
+    W, H = t2.size
+    ai_core.encode_display_image = lambda path, *a, **k: ('/display/bench.jpg', W, H)
+    _, times['figure'] = _timed(lambda: ai_core.create_figure('bench', d2))
+    _, times['display'] = _timed(lambda: _display(t2))
+
+    row = {'width': W, 'height': H, 'objects': n_objects, 'tiles': n_tiles, 'raw_dets': n_raw,
+           'dets': len(dets2), 'sec': {k: round(times[k], 4) for k in STAGES}}
+    print(f"{W}x{H}: " + ", ".join(f"{k}={row['sec'][k]:.3f}s" for k in STAGES) + f" (dets={len(dets2)})", flush=True)
+    return row
+
+def run(args):
+    install_fake_models(ai_core, det_latency=args.latency, cls_latency=args.latency)
+    # 지연 import(scipy 등)가 첫 측정에 섞이지 않도록 예열
+    match_detections([[0, 0, 1, 1]], [[0, 0, 1, 1]])
+    results = [bench_size(w, args) for w in args.sizes]
+    report = {
+        'meta': {'commit': _git_commit(), 'python': platform.python_version(), 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                 'config': {'latency': args.latency, 'density': args.density, 'changed': args.changed, 'seed': args.seed,
+                            'tile': ai_core.TILE_SIZE, 'stride': ai_core.STRIDE, 'batch': ai_core.DET_BATCH_SIZE}},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 저장: {args.json}")
+    return report
+
+def compare(base_path, head_path, threshold):
+    with open(base_path, encoding='utf-8') as f: base = json.load(f)
+    with open(head_path, encoding='utf-8') as f: head = json.load(f)
+    if base['meta']['config'] != head['meta']['config']:
+        print("⚠️ 두 결과의 설정(config)이 다릅니다. 비율 해석에 주의하세요.")
+
+    base_rows = {r['width']: r for r in base['results']}
+    regressed = []
+    print(f"{base['meta'].get('commit')} -> {head['meta'].get('commit')} (비율 > {threshold} 이면 ❌)")
+    for row in head['results']:
+        ref = base_rows.get(row['width'])
+        if not ref: continue
+        cells = []
+        for k in STAGES:
+            a, b = ref['sec'].get(k), row['sec'].get(k)
+            if not a or b is None: continue
+            ratio = b / a
+            # 아주 짧은 단계(1ms 미만)는 측정 잡음이라 회귀 판정에서 제외
+            bad = ratio > threshold and b > 0.001
+            if bad: regressed.append((row['width'], k, ratio))
+            cells.append(f"{k} {ratio:.2f}x{' ❌' if bad else ''}")
+        print(f"{row['width']}px: " + ", ".join(cells))
+    return not regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 모델로 ai_core 탐지 파이프라인 단계별 시간 측정")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="합성 영상 가로 크기(px), 세로는 절반")
+    parser.add_argument('--latency', type=float, default=0.0, help="가짜 모델 이미지 1장당 지연(초)")
+    parser.add_argument('--density', type=float, default=5.0, help="메가픽셀당 비행기 수")
+    parser.add_argument('--changed', type=float, default=0.1, help="T2에서 바뀐 물체 비율")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help="결과 저장 경로")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help="두 결과 JSON 비교")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare, args.threshold) else 1)
+    run(args)
+
+if __name__ == '__main__':
+    main()
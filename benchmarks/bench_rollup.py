@@ -0,0 +1,110 @@
+"""
+집계(rollup) 테이블 검증 + 기간별 조회 시간 (로컬 SQLite 대역, 운영 DB 불필요)
+
+실행: python -m benchmarks.bench_rollup [--bases 20] [--days 1100]
+ 1. bench_sargable의 SQLite 대역(오늘까지 --days일 HISTORY)을 만들고 마이그레이션 전 원본 집계 결과/시간을 기록
+ 2. migrate + rebuild 후 같은 함수(get_trend_data, fetch_report_data)가 집계 테이블에서 같은 값을 내는지 확인
+ 3. 새 행(일부 기체 수가 NULL)을 넣고 증분 refresh 후 다시 원본과 비교
+ weekly_6h: 시각이 걸친 구간은 집계 대신 원본으로 조회되어야 함 (날짜 단위로 넓어지면 불일치)
+"""
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import text
+import db_manager
+from utils import rollups
+from utils.migrations import migrate
+from benchmarks.bench_sargable import build_standin
+
+TREND_MODES = ['week', 'month', 'year']
+
+def _report_ranges(today):
+    return {
+        'weekly': ((today - timedelta(days=6)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')),
+        'weekly_6h': ((today - timedelta(days=6)).strftime('%Y-%m-%d 06:00:00'), today.strftime('%Y-%m-%d 23:59:59')),
+        'monthly': ((today - timedelta(days=29)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')),
+        'yearly': ((today - timedelta(days=365)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')),
+        'yearly_3y': ((today - timedelta(days=3 * 365)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')),
+    }
+
+def _timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat): out = fn()
+    return out, (time.perf_counter() - t0) / repeat * 1000
+
+def _normalize(df):
+    cols = [c for c in ['dt_day', 'dt_month', 'scene_name', 'min_count', 'avg_count', 'max_count', 'time', 'count'] if c in df.columns]
+    out = df[cols].copy()
+    for c in cols:
+        if c in ('dt_day', 'dt_month', 'scene_name', 'time'): out[c] = out[c].astype(str)
+        else: out[c] = pd.to_numeric(out[c]).astype(float).round(1)
+    return out.sort_values(cols[:2]).reset_index(drop=True)
+
+def measure(base, today, repeat, force_raw=False):
+    import ai_core
+    from utils.report_service import fetch_report_data
+    if force_raw:
+        db_manager._schema.update(version=0, checked=float('inf'))  # 스키마 재확인 안 함 -> 원본 경로
+    else:
+        db_manager._schema['checked'] = 0.0
+        rollups._status['t'] = 0.0
+    out = {}
+    for mode in TREND_MODES:
+        out[f"trend:{mode}"] = _timed(lambda: ai_core.get_trend_data(mode=mode, base_name=base), repeat)
+    for name, (start, end) in _report_ranges(today).items():
+        rtype = name.split('_')[0]
+        out[f"report:{name}"] = _timed(lambda: fetch_report_data(rtype, base, start, end)[0], repeat)
+    return out
+
+def compare(label, raw, rolled):
+    print(f"--- {label}")
+    ok = True
+    for key, (df_raw, ms_raw) in raw.items():
+        df_roll, ms_roll = rolled[key]
+        same = _normalize(df_raw).equals(_normalize(df_roll))
+        ok &= same
+        print(f"{key:<18} 원본 {ms_raw:8.2f}ms  집계 {ms_roll:7.2f}ms  행 {len(df_roll):>3}  {'✅' if same else '❌'}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bases', type=int, default=20)
+    parser.add_argument('--days', type=int, default=1100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--base', default='Base07')
+    args = parser.parse_args()
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    path = os.path.join(tempfile.mkdtemp(), 'standin.sqlite')
+    engine, n = build_standin(path, args.bases, args.days, start=today - timedelta(days=args.days - 1))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE tb_user_settings (user_id TEXT, base_name TEXT, risk_level TEXT, "
+                          "main_aircraft TEXT, special_notes TEXT, updated_at DATETIME)"))
+    db_manager.ENGINE = engine
+    print(f"🗄️ SQLite 대역: tb_scenario {n}행, 기지 {args.bases}곳, {args.days}일")
+
+    raw = measure(args.base, today, args.repeat)
+    migrate(engine, log=lambda *_: None)
+    t0 = time.perf_counter()
+    rollups.rebuild(engine, log=lambda *_: None)
+    print(f"🔄 rebuild {time.perf_counter() - t0:.2f}s")
+    ok = compare("rebuild 후", raw, measure(args.base, today, args.repeat))
+
+    # 증분: 오늘 행 추가 (NULL 기체 수 포함) -> refresh -> 원본과 다시 비교
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO tb_scenario (scene_id, data_type, timestamp, cnt_fighter, cnt_bomber, cnt_transport, cnt_civil, cnt_trainer) "
+            "SELECT scene_id, 'HISTORY', :ts, 50, 1, 1, 0, 0 FROM tb_scene"), {'ts': today.strftime('%Y-%m-%d 12:30:00')})
+        conn.execute(text(
+            "INSERT INTO tb_scenario (scene_id, data_type, timestamp, cnt_fighter, cnt_bomber, cnt_transport, cnt_civil, cnt_trainer) "
+            "SELECT scene_id, 'HISTORY', :ts, 0, NULL, 1, 0, 0 FROM tb_scene"), {'ts': today.strftime('%Y-%m-%d 02:10:00')})
+    print(f"➕ 증분 refresh: {rollups.refresh(engine)}행")
+    rolled = measure(args.base, today, 1)
+    ok &= compare("증분 갱신 후", measure(args.base, today, 1, force_raw=True), rolled)
+    print("✅ 모두 일치" if ok else "❌ 불일치 있음")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+마이그레이션 + 시간 조건 재작성 검증 (로컬 SQLite 대역, 운영 DB 불필요)
+
+실행: python -m benchmarks.bench_sargable [--bases 20] [--days 365]
+ 1. 임시 SQLite에 tb_scene / tb_scenario / tb_audit_log를 만들고 합성 데이터를 채웁니다.
+    MySQL 함수 HOUR(), DATE_FORMAT()은 같은 의미의 파이썬 함수로 등록합니다.
+ 2. 마이그레이션 전/후로 예전 쿼리(컬럼을 함수로 감싼 형태)와 바뀐 쿼리의 실행 계획(SCAN/SEARCH),
+    시간, 결과를 비교합니다. 바뀐 쿼리는 db_manager/ai_core/home_service의 실제 함수를 호출합니다.
+ 3. migrate()를 두 번 돌려 재실행이 안전한지 확인합니다.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, text
+import db_manager
+from utils.migrations import migrate, current_version, MIGRATIONS
+
+SCHEMA = [
+    "CREATE TABLE tb_scene (scene_id INTEGER PRIMARY KEY, scene_name TEXT, name_kor TEXT, lat REAL, lon REAL)",
+    """CREATE TABLE tb_scenario (data_id INTEGER PRIMARY KEY, scene_id INTEGER, data_type TEXT, timestamp DATETIME,
+        status TEXT, cnt_fighter INTEGER, cnt_bomber INTEGER, cnt_transport INTEGER, cnt_civil INTEGER, cnt_trainer INTEGER,
+        img_path TEXT, weather TEXT, wind_speed REAL, moon_phase REAL)""",
+    "CREATE TABLE tb_audit_log (log_id INTEGER PRIMARY KEY, user_id TEXT, action TEXT, details TEXT, timestamp DATETIME)",
+]
+
+# 바뀌기 전 쿼리 (함수로 감싼 시간 조건)
+OLD_QUERIES = {
+    'image_path': ("""SELECT img_path FROM tb_scenario s JOIN tb_scene sc ON s.scene_id = sc.scene_id
+        WHERE sc.scene_name = :bn AND s.data_type = 'SCENARIO' AND HOUR(s.timestamp) = :hr LIMIT 1""",
+        {'bn': 'Base07', 'hr': 14}),
+    'weather': ("""SELECT s.weather, s.wind_speed, s.moon_phase FROM tb_scenario s JOIN tb_scene sc ON s.scene_id = sc.scene_id
+        WHERE DATE_FORMAT(s.timestamp, '%H:00') = :tm AND sc.scene_name = :bn AND s.data_type = 'SCENARIO' LIMIT 1""",
+        {'tm': '14:00', 'bn': 'Base07'}),
+    'history_day': ("""SELECT s.*, c.scene_name as base_name FROM tb_scenario s JOIN tb_scene c ON s.scene_id = c.scene_id
+        WHERE s.data_type = 'HISTORY' AND DATE(s.timestamp) = :d""", None),
+    'audit_alerts': ("""SELECT COUNT(*) FROM tb_audit_log WHERE timestamp >= :t
+        AND (action LIKE '%%FAIL%%' OR action LIKE '%%MACRO%%')""", None),
+}
+
+def _mysql_functions(dbapi_conn, _):
+    def hour(ts):
+        return int(str(ts)[11:13]) if ts else None
+    def date_format(ts, fmt):
+        if not ts: return None
+        return datetime.fromisoformat(str(ts)).strftime(fmt.replace('%i', '%M'))
+    dbapi_conn.create_function('HOUR', 1, hour, deterministic=True)
+    dbapi_conn.create_function('DATE_FORMAT', 2, date_format, deterministic=True)
+
+def build_standin(path, bases, days, seed=0, start=datetime(2025, 1, 1)):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, 'connect', _mysql_functions)
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        for sql in SCHEMA: conn.execute(text(sql))
+        conn.execute(text("INSERT INTO tb_scene VALUES (:i, :n, :k, 39.0, 125.7)"),
+                     [{'i': i, 'n': f"Base{i:02d}", 'k': f"기지{i:02d}"} for i in range(bases)])
+        rows = []
+        for b in range(bases):
+            for h in range(0, 24, 2):
+                rows.append(('SCENARIO', b, start + timedelta(hours=h)))
+            for d in range(days):
+                for h in range(0, 24, 2):
+                    rows.append(('HISTORY', b, start + timedelta(days=d, hours=h)))
+        conn.execute(text(
+            "INSERT INTO tb_scenario (scene_id, data_type, timestamp, cnt_fighter, cnt_bomber, cnt_transport, cnt_civil, cnt_trainer, "
+            "img_path, weather, wind_speed, moon_phase) VALUES (:b, :t, :ts, :f, 0, 0, 0, 0, :img, 'Clear', 3.5, 0)"),
+            [{'b': b, 't': t, 'ts': ts.strftime('%Y-%m-%d %H:%M:%S'), 'f': rng.randint(0, 20),
+              'img': f"base{b:02d}_{ts:%H}.png"} for t, b, ts in rows])
+        actions = ['PAGE_VIEW'] * 8 + ['LOGIN_SUCCESS', 'LOGIN_FAIL_PW']
+        conn.execute(text("INSERT INTO tb_audit_log (user_id, action, details, timestamp) VALUES ('u', :a, '/home', :ts)"),
+                     [{'a': rng.choice(actions), 'ts': (start + timedelta(minutes=7 * i)).strftime('%Y-%m-%d %H:%M:%S')}
+                      for i in range(days * 200)])
+    return engine, len(rows)
+
+def _plan(engine, sql, params):
+    """tb_scenario/tb_audit_log 접근 방식 요약: SCAN(전체 스캔) 또는 SEARCH ... USING INDEX"""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    steps = [r[-1] for r in rows if 'tb_scene ' not in r[-1] and ' sc ' not in r[-1] and ' c ' not in r[-1]]
+    return '; '.join(steps)
+
+class _Capture:
+    """새 쿼리(앱 함수)가 실제로 보낸 SQL을 잡아 실행 계획을 보기 위함"""
+    def __init__(self, engine):
+        self.last = None
+        event.listen(engine, 'before_cursor_execute', self._hook)
+
+    def _hook(self, conn, cursor, statement, parameters, context, executemany):
+        self.last = (statement, parameters)
+
+def _timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat): out = fn()
+    return out, (time.perf_counter() - t0) / repeat * 1000
+
+def run_queries(engine, capture, label, day, repeat):
+    import ai_core
+    from utils.home_service import fetch_daily_data
+    db_manager._schema['checked'] = 0.0  # 스키마 버전 즉시 재확인
+    params = {'history_day': {'d': day}, 'audit_alerts': {'t': day + ' 00:00:00'}}
+    new_calls = {
+        'image_path': lambda: ai_core.get_db_image_path('Base07', day, '14:00'),
+        'weather': lambda: db_manager.get_weather_info('14:00', 'Base07'),
+        'history_day': lambda: len(fetch_daily_data(day)),
+        'audit_alerts': lambda: db_manager.fetch_scalar(OLD_QUERIES['audit_alerts'][0], params['audit_alerts'], default=0),
+    }
+    print(f"--- {label} (schema v{current_version(engine)}, slot 조건: {db_manager.slot_hour_expr('s')})")
+    for name, (sql, p) in OLD_QUERIES.items():
+        p = p or params[name]
+        with engine.connect() as conn:
+            old_rows, old_ms = _timed(lambda: conn.execute(text(sql), p).fetchall(), repeat)
+        old_plan = _plan(engine, *capture.last)
+        new_out, new_ms = _timed(new_calls[name], repeat)
+        new_plan = _plan(engine, *capture.last)
+        print(f"{name:<13} old {old_ms:8.2f}ms  new {new_ms:8.2f}ms  결과 old={_brief(old_rows)} new={_brief(new_out)}")
+        print(f"{'':<13} old: {old_plan}\n{'':<13} new: {new_plan}")
+
+def _brief(v):
+    if isinstance(v, list): return v[0][0] if v and len(v) == 1 else len(v)
+    if isinstance(v, dict): return v.get('weather')
+    return v
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bases', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'standin.sqlite')
+    engine, n = build_standin(path, args.bases, args.days)
+    capture = _Capture(engine)
+    db_manager.ENGINE = engine
+    db_manager.SCENARIO_CACHE_TTL = 0
+    import ai_core, utils.home_service as hs
+    ai_core.SCENARIO_CACHE_TTL = hs.SCENARIO_CACHE_TTL = 0
+    print(f"🗄️ SQLite 대역: tb_scenario {n}행, 기지 {args.bases}곳, {args.days}일")
+
+    day = (datetime(2025, 1, 1) + timedelta(days=args.days // 2)).strftime('%Y-%m-%d')
+    run_queries(engine, capture, "마이그레이션 전", day, args.repeat)
+    applied = migrate(engine)
+    assert applied == [m[0] for m in MIGRATIONS], applied
+    assert migrate(engine) == [], "재실행 시 적용할 단계가 없어야 함"
+    # 운영 DB(TiDB)는 통계를 자동 수집하지만 SQLite는 ANALYZE 전까지 인덱스 선택도를 모름
+    with engine.begin() as conn: conn.execute(text("ANALYZE"))
+    run_queries(engine, capture, "마이그레이션 후", day, args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+타일 분산 탐지(scatter/gather) 확장성 벤치마크: 워커 수별 속도 향상
+
+실행: python -m benchmarks.bench_shard [--width 10000] [--workers 1 2 4 8] [--latency 0.05]
+ - 가짜 모델(타일당 --latency초 지연 + 연결 요소 검출)로 합성 영상 1장을 탐지합니다.
+ - 1 = 기존 단일 프로세스 detect_tiles, 2 이상 = ShardPool(공유 메모리 전달)
+ - 풀 생성(워커 spawn + 모델 로드)은 서버에서 한 번뿐이므로 따로 표시하고 속도 비교에서는 제외합니다.
+ - 결과가 단일 프로세스와 같은지(최종 탐지 수/좌표) 함께 확인합니다.
+"""
+import os
+import time
+import argparse
+from PIL import ImageOps
+import ai_core
+from utils.tile_shard import ShardPool, SharedImage
+from benchmarks.fake_model import synthetic_pair, install_fake_models, init_fake_worker
+
+def _signature(dets):
+    return sorted((round(d[0], 1), round(d[1], 1), d[4]) for d in dets)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=10000, help="합성 영상 가로(px), 세로는 절반")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--latency', type=float, default=0.05, help="가짜 모델 타일 1장당 지연(초)")
+    args = parser.parse_args()
+
+    install_fake_models(ai_core, det_latency=args.latency)
+    im, _, n_objects = synthetic_pair(args.width)
+    im_proc = ImageOps.autocontrast(im, cutoff=1)
+    W, H = im.size
+    tiles = ai_core.get_tile_grid(W, H)
+    get_crop = lambda x, y: im_proc.crop((x, y, x + ai_core.TILE_SIZE, y + ai_core.TILE_SIZE))
+    print(f"🖼️ {W}x{H}, 타일 {len(tiles)}개, 물체 {n_objects}개, CPU {os.cpu_count()}개, 지연 {args.latency}s/타일")
+
+    t0 = time.perf_counter()
+    ref = ai_core._finalize_detections(ai_core.detect_tiles(get_crop, tiles))
+    base = time.perf_counter() - t0
+    print(f"{'workers':>7} | {'startup(s)':>10} | {'detect(s)':>9} | {'speedup':>7} | 결과 일치")
+    print(f"{1:>7} | {'-':>10} | {base:>9.2f} | {1.0:>7.2f} | -")
+
+    for n in sorted(set(args.workers)):
+        if n <= 1: continue
+        t0 = time.perf_counter()
+        pool = ShardPool(n, init_fn=init_fake_worker, init_args=(args.latency,))
+        # 워커 spawn + 초기화가 끝나도록 빈 작업 하나씩 돌림
+        with SharedImage(im_proc) as spec:
+            pool.detect(spec, tiles[:n], batch_size=1)
+        startup = time.perf_counter() - t0
+        try:
+            t0 = time.perf_counter()
+            with SharedImage(im_proc) as spec:
+                raw = pool.detect(spec, tiles, batch_size=ai_core.DET_BATCH_SIZE)
+            dets = ai_core._finalize_detections(raw)
+            elapsed = time.perf_counter() - t0
+        finally:
+            pool.close()
+        same = _signature(dets) == _signature(ref)
+        print(f"{n:>7} | {startup:>10.2f} | {elapsed:>9.2f} | {base / elapsed:>7.2f} | {'✅' if same else '❌'}", flush=True)
+
+if __name__ == '__main__':
+    main()
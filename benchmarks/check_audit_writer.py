@@ -0,0 +1,100 @@
+"""
+감사 로그 기록기(AuditWriter) 실패/보관/재적재 확인 (DB 불필요)
+
+실행: python -m benchmarks.check_audit_writer
+ 1. DB 대신 실패 여부를 바꿀 수 있는 flush_fn으로 batch_size보다 큰 묶음(여러 chunk)을 flush
+ 2. 첫 chunk부터 실패 -> 모든 행이 spill 파일에 남아야 함
+ 3. 중간 chunk에서 실패 -> 앞 chunk는 기록, 나머지는 모두 spill
+ 4. DB 복구 후 다음 flush에서 보관분이 재적재되어 유실/중복이 없어야 함
+ 5. 잘린 줄이 섞인 spill 파일 -> 해당 줄만 건너뛰고 나머지 적재
+ 6. 재적재 중 보관까지 실패 -> 재적재 파일을 지우지 않고 다음 flush에서 이어서 적재
+ 7. 죽은 프로세스가 남긴 재적재 파일도 가져와 적재
+"""
+import os
+import json
+import tempfile
+from utils.audit_writer import AuditWriter
+
+class FlakyDB:
+    """fail_from번째 호출부터 예외를 던지는 flush_fn 대역"""
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+        self.fail_from = None
+
+    def __call__(self, chunk):
+        self.calls += 1
+        if self.fail_from is not None and self.calls >= self.fail_from:
+            raise ConnectionError("DB down")
+        self.rows.extend(chunk)
+
+def _spilled(path):
+    if not os.path.exists(path): return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['n'] for line in f if line.strip()]
+
+def main():
+    spill = os.path.join(tempfile.mkdtemp(), 'audit_spill.jsonl')
+    db = FlakyDB()
+    writer = AuditWriter(db, spill, batch_size=10)
+
+    # 첫 chunk부터 실패: 25행 모두 보관
+    db.fail_from = 1
+    writer._flush([{'n': i} for i in range(25)])
+    assert _spilled(spill) == list(range(25)), _spilled(spill)
+    print(f"✅ 전체 실패: 25행 중 {len(_spilled(spill))}행 보관")
+
+    # 복구 후 새 묶음 -> 보관분 재적재
+    db.fail_from = None
+    writer._flush([{'n': i} for i in range(25, 30)])
+    assert not os.path.exists(spill)
+    assert sorted(r['n'] for r in db.rows) == list(range(30))
+    print(f"✅ 복구 후 재적재: DB {len(db.rows)}행, spill 없음")
+
+    # 두 번째 chunk에서 실패: 앞 10행 기록, 나머지 15행 보관
+    db.rows, db.calls, db.fail_from = [], 0, 2
+    writer._flush([{'n': i} for i in range(100, 125)])
+    assert [r['n'] for r in db.rows] == list(range(100, 110))
+    assert _spilled(spill) == list(range(110, 125)), _spilled(spill)
+    print(f"✅ 중간 실패: 기록 {len(db.rows)}행, 보관 {len(_spilled(spill))}행")
+
+    db.fail_from = None
+    writer._flush([])
+    assert sorted(r['n'] for r in db.rows) == list(range(100, 125))
+    print(f"✅ 유실/중복 없음 (written={writer.written}, spilled={writer.spilled})")
+
+    # 비정상 종료로 잘린 줄: 건너뛰고 나머지 적재, 스레드 예외 없음
+    with open(spill, 'w', encoding='utf-8') as f:
+        f.write('{"n": 200}\n{"n": 2\n{"n": 202}\n')
+    db.rows = []
+    writer._flush([])
+    assert [r['n'] for r in db.rows] == [200, 202], db.rows
+    assert not os.path.exists(spill)
+    print("✅ 잘린 줄 건너뜀: 나머지 2행 적재")
+
+    # 재적재 실패 + 보관 실패(디렉터리를 파일로 막음) -> 재적재 파일 유지
+    db.rows, db.calls, db.fail_from = [], 0, 1
+    writer._spill([{'n': i} for i in range(300, 305)])
+    replay = spill + f'.{os.getpid()}.replay'
+    os.replace(spill, replay)
+    blocker = os.path.join(os.path.dirname(spill), 'blocker')
+    open(blocker, 'w').close()
+    orig_spill, writer.spill_path = writer.spill_path, os.path.join(blocker, 'audit_spill.jsonl')
+    writer._replay_file(replay)
+    assert os.path.exists(replay), "보관 실패 시 재적재 파일은 남아야 함"
+    writer.spill_path, db.fail_from = orig_spill, None
+    writer._flush([])
+    assert [r['n'] for r in db.rows] == list(range(300, 305)) and not os.path.exists(replay)
+    print("✅ 보관 실패: 재적재 파일 유지 후 다음 flush에서 적재")
+
+    # 죽은 프로세스(존재하지 않는 pid)가 남긴 재적재 파일
+    orphan = spill + '.999999999.replay'
+    with open(orphan, 'w', encoding='utf-8') as f:
+        f.write('{"n": 400}\n')
+    db.rows = []
+    writer._flush([])
+    assert [r['n'] for r in db.rows] == [400] and not os.path.exists(orphan)
+    print("✅ 남은 재적재 파일 회수")
+
+if __name__ == '__main__':
+    main()
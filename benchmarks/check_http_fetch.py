@@ -0,0 +1,86 @@
+"""
+원격 이미지 페치 계층(utils/http_fetch) 요청 수 확인 (로컬 http.server 대역, S3 불필요)
+
+실행: python -m benchmarks.check_http_fetch
+ 1. 임시 디렉터리를 서빙하는 http.server를 띄우고 서버가 받은 요청(200/304)을 셉니다.
+ 2. 처음 요청 -> 전체 다운로드 1회
+ 3. MIRROR_MAX_AGE 안의 재요청 -> 서버 요청 없음 (fresh hit)
+ 4. MIRROR_MAX_AGE가 지난 재요청 -> 조건부 요청 304, 본문 재다운로드 없음
+ 5. 원격 파일이 바뀐 뒤 재요청 -> 다시 전체 다운로드, 미러 내용과 mirror_stamp 갱신
+ 6. 서버가 내려간 뒤 -> 이전 미러를 그대로 사용
+"""
+import os
+import time
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import utils.http_fetch as http_fetch
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    """응답 코드별 요청 수를 세는 정적 파일 핸들러 (If-Modified-Since -> 304 지원)"""
+    counts = {}
+    lock = threading.Lock()
+
+    def send_response(self, code, message=None):
+        with self.lock:
+            self.counts[code] = self.counts.get(code, 0) + 1
+        super().send_response(code, message)
+
+    def log_message(self, *args):
+        pass
+
+def _expect(label, stats_before, server_before, body_path, content, **expected):
+    stats = http_fetch.get_fetch_stats()
+    delta = {k: stats[k] - stats_before[k] for k in ('requests', 'downloads', 'not_modified', 'fresh_hits')}
+    server = {code: CountingHandler.counts.get(code, 0) - server_before.get(code, 0) for code in (200, 304)}
+    got = {**delta, 'server_200': server[200], 'server_304': server[304]}
+    for k, v in expected.items():
+        assert got[k] == v, f"{label}: {k}={got[k]} (기대 {v}) {got}"
+    with open(body_path, 'rb') as f:
+        assert f.read() == content, f"{label}: 미러 내용 불일치"
+    print(f"✅ {label:<22} {got}")
+
+def main():
+    root = tempfile.mkdtemp()
+    http_fetch.MIRROR_DIR = tempfile.mkdtemp()
+    src = os.path.join(root, 'scene.png')
+    with open(src, 'wb') as f: f.write(b'v1' * 50000)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(CountingHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/scene.png"
+
+    def step(label, content, **expected):
+        before, server_before = http_fetch.get_fetch_stats(), dict(CountingHandler.counts)
+        path = http_fetch.fetch_to_mirror(url)
+        assert path, f"{label}: 미러 경로 없음"
+        _expect(label, before, server_before, path, content, **expected)
+
+    http_fetch.MIRROR_MAX_AGE = 300
+    step("첫 요청: 전체 다운로드", b'v1' * 50000, requests=1, downloads=1, server_200=1, server_304=0)
+    step("재요청: fresh hit", b'v1' * 50000, requests=0, fresh_hits=1, server_200=0, server_304=0)
+    stamp_v1 = http_fetch.mirror_stamp(url)
+
+    http_fetch.MIRROR_MAX_AGE = 0
+    step("만료 후: 304 재검증", b'v1' * 50000, requests=1, not_modified=1, downloads=0, server_200=0, server_304=1)
+
+    # Last-Modified는 초 단위 -> 수정 시각이 확실히 달라지도록 미래로 설정
+    with open(src, 'wb') as f: f.write(b'v2' * 50000)
+    later = time.time() + 5
+    os.utime(src, (later, later))
+    step("원격 변경: 재다운로드", b'v2' * 50000, requests=1, downloads=1, server_200=1, server_304=0)
+    stamp_v2 = http_fetch.mirror_stamp(url)
+    assert stamp_v1 != stamp_v2, "원격이 바뀌면 mirror_stamp도 바뀌어야 함"
+    print(f"✅ mirror_stamp 갱신       {stamp_v1} -> {stamp_v2}")
+
+    server.shutdown()
+    server.server_close()
+    before = http_fetch.get_fetch_stats()
+    path = http_fetch.fetch_to_mirror(url, timeout=2)
+    assert path and http_fetch.get_fetch_stats()['errors'] == before['errors'] + 1
+    with open(path, 'rb') as f: assert f.read() == b'v2' * 50000
+    print("✅ 서버 중단: 이전 미러 사용")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+빈 타일 사전 필터 평가: 건너뛴 타일 수와 기준 이미지 세트에서의 재현율(recall) 변화
+
+실행: python -m benchmarks.eval_tile_filter [이미지 ...] [--json 결과.json]
+ - 이미지를 생략하면 assets/images 전체를 기준 세트로 사용합니다.
+ - 탐지 모델이 없으면 타일 스킵 비율만 계산합니다.
+ - 기준(필터 OFF) 탐지 중 필터 ON 결과에 같은 라벨 + 중심거리 10px 이내 짝이 있는 비율이 재현율입니다.
+"""
+import os
+import json
+import time
+import argparse
+import ai_core
+from ai_core import load_image_from_path, get_tile_grid, run_tiled_detection, TILE_SIZE
+from PIL import ImageOps
+from utils import tile_filter
+from utils.matching import match_detections
+
+MATCH_DIST = 10
+
+def count_skipped(path):
+    im = load_image_from_path(path)
+    if im is None: return None
+    im = ImageOps.autocontrast(im.convert("RGB"), cutoff=1)
+    tiles = get_tile_grid(*im.size)
+    skipped = sum(1 for x, y in tiles if not tile_filter.is_informative(im.crop((x, y, x + TILE_SIZE, y + TILE_SIZE))))
+    return len(tiles), skipped
+
+def recall_against(ref, test):
+    if not ref: return len(ref), 0
+    hit = 0
+    for label in {d[4] for d in ref}:
+        r = [d[:4] for d in ref if d[4] == label]
+        t = [d[:4] for d in test if d[4] == label]
+        m, _ = match_detections(r, t, max_dist=MATCH_DIST)
+        hit += int(m.sum())
+    return len(ref), hit
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('images', nargs='*')
+    parser.add_argument('--json', default=None)
+    args = parser.parse_args()
+
+    images = args.images or sorted(
+        f for f in os.listdir(os.path.join(ai_core.BASE_DIR, 'assets', 'images')) if f.lower().endswith(('.png', '.jpg', '.tif'))
+    )
+    rows = []
+    for path in images:
+        counted = count_skipped(path)
+        if counted is None:
+            print(f"⚠️ 로드 실패: {path}")
+            continue
+        row = {'image': path, 'tiles': counted[0], 'skipped': counted[1]}
+
+        if ai_core.get_det_model():
+            t0 = time.perf_counter(); ref, _, _ = run_tiled_detection(path, prefilter=False); t_off = time.perf_counter() - t0
+            t0 = time.perf_counter(); test, _, _ = run_tiled_detection(path, prefilter=True); t_on = time.perf_counter() - t0
+            n_ref, n_hit = recall_against(ref, test)
+            row.update({'dets_off': n_ref, 'dets_on': len(test), 'matched': n_hit, 'sec_off': round(t_off, 2), 'sec_on': round(t_on, 2)})
+        rows.append(row)
+        print(row, flush=True)
+
+    total = sum(r['tiles'] for r in rows)
+    skipped = sum(r['skipped'] for r in rows)
+    summary = {'images': len(rows), 'tiles': total, 'skipped': skipped,
+               'skip_rate': round(skipped / total, 3) if total else 0.0,
+               'params': {'factor': tile_filter.PREFILTER_FACTOR, 'std': tile_filter.MIN_STD, 'edge': tile_filter.MIN_EDGE_DENSITY}}
+    if rows and 'dets_off' in rows[0]:
+        n_ref = sum(r['dets_off'] for r in rows)
+        n_hit = sum(r['matched'] for r in rows)
+        summary['recall'] = round(n_hit / n_ref, 4) if n_ref else 1.0
+        summary['speedup'] = round(sum(r['sec_off'] for r in rows) / max(1e-9, sum(r['sec_on'] for r in rows)), 2)
+
+    print("\n[Summary]", summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'images': rows}, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+벤치마크용 가짜 YOLO 모델과 합성 위성 영상
+
+ - FakeDetector: 밝은 사각형(합성 비행기)을 연결 요소로 찾아 ultralytics 결과와 같은 모양으로 돌려줍니다.
+   같은 물체가 겹치는 타일마다 잡히므로 실제처럼 NMS 입력에 중복이 생깁니다.
+ - FakeClassifier: crop 평균 밝기로 정해지는 결정적 top-5
+ - latency: 이미지(타일/crop) 1장당 추가 지연(초) -> 실제 모델 추론 시간 흉내
+"""
+import time
+import zlib
+import cv2
+import numpy as np
+from PIL import Image
+
+DET_NAMES = {0: 'Fighter', 1: 'Bomber', 2: 'Transport', 3: 'Civil'}
+OBJECT_VALUE = 255     # 합성 비행기 밝기 (배경은 40~170)
+DETECT_THRESH = 235
+
+class _Boxes(list):
+    pass
+
+class _Box:
+    def __init__(self, x1, y1, x2, y2, conf, cls):
+        self.xyxy = np.array([[x1, y1, x2, y2]], dtype=np.float32)
+        self.conf = np.array([conf], dtype=np.float32)
+        self.cls = np.array([cls], dtype=np.float32)
+
+class _Probs:
+    def __init__(self, order, scores):
+        self.top5 = order[:5]
+        self.top5conf = scores[:5]
+        self.top1 = order[0]
+        self.top1conf = scores[0]
+
+class _Result:
+    def __init__(self, boxes=None, probs=None):
+        self.boxes = boxes
+        self.probs = probs
+
+class FakeDetector:
+    def __init__(self, latency=0.0, names=DET_NAMES):
+        self.latency = latency
+        self.names = dict(names)
+
+    def _detect(self, crop, conf):
+        gray = np.asarray(crop.convert('L'))
+        mask = (gray >= DETECT_THRESH).astype(np.uint8)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        boxes = _Boxes()
+        for x, y, w, h, area in stats[1:n]:
+            if area < 16: continue
+            score = 0.5 + (int(area) % 50) / 100.0
+            if score < conf: continue
+            boxes.append(_Box(x, y, x + w, y + h, score, int(w + h) % len(self.names)))
+        return boxes
+
+    def predict(self, images, conf=0.25, verbose=False, imgsz=None):
+        if not isinstance(images, (list, tuple)): images = [images]
+        out = []
+        for im in images:
+            if self.latency: time.sleep(self.latency)
+            out.append(_Result(boxes=self._detect(im, conf)))
+        return out
+
+class FakeClassifier:
+    def __init__(self, latency=0.0, n_classes=12):
+        self.latency = latency
+        self.names = {i: f'Type-{i:02d}' for i in range(n_classes)}
+
+    def predict(self, images, verbose=False):
+        if not isinstance(images, (list, tuple)): images = [images]
+        out = []
+        for im in images:
+            if self.latency: time.sleep(self.latency)
+            seed = zlib.crc32(np.asarray(im.convert('L').reduce(4)).tobytes())
+            scores = np.random.default_rng(seed).dirichlet(np.ones(len(self.names)))
+            order = np.argsort(scores)[::-1]
+            out.append(_Result(probs=_Probs([int(i) for i in order], scores[order])))
+        return out
+
+def synthetic_pair(width, height=None, density=5.0, changed=0.1, seed=0):
+    """
+    합성 T1/T2 영상 (RGB PIL)과 물체 수.
+    density: 메가픽셀당 비행기 수, changed: T2에서 사라지거나 새로 생긴 물체 비율
+    """
+    height = height or width // 2
+    rng = np.random.default_rng(seed)
+
+    # 저해상도 잡음을 확대한 지형 배경 (40~170)
+    small = rng.integers(40, 170, (max(2, height // 64), max(2, width // 64), 3), dtype=np.uint8)
+    base = np.asarray(Image.fromarray(small).resize((width, height), Image.BILINEAR)).copy()
+
+    n = max(1, int(density * width * height / 1e6))
+    sizes = rng.integers(12, 60, n)
+    xs = rng.integers(0, width - 60, n)
+    ys = rng.integers(0, height - 60, n)
+    moved = rng.random(n) < changed
+
+    t1, t2 = base, base.copy()
+    for x, y, s, m in zip(xs, ys, sizes, moved):
+        t1[y:y + s, x:x + s] = OBJECT_VALUE
+        if not m: t2[y:y + s, x:x + s] = OBJECT_VALUE
+    # 사라진 만큼 다른 위치에 새 물체
+    for s in sizes[moved]:
+        x, y = rng.integers(0, width - 60), rng.integers(0, height - 60)
+        t2[y:y + s, x:x + s] = OBJECT_VALUE
+    return Image.fromarray(t1), Image.fromarray(t2), n
+
+def install_fake_models(ai_core, det_latency=0.0, cls_latency=0.0):
+    """ai_core의 탐지/분류 모델을 가짜로 교체합니다. (지연 로더는 이미 채워진 전역을 그대로 사용)"""
+    ai_core.DET_MODEL = FakeDetector(latency=det_latency)
+    ai_core.CLS_MODEL = FakeClassifier(latency=cls_latency)
+    ai_core.DET_MODEL_DIGEST = f"fake-det-{det_latency}"
+    ai_core.CLS_MODEL_DIGEST = f"fake-cls-{cls_latency}"
+
+def init_fake_worker(det_latency=0.0, cls_latency=0.0):
+    """분산 탐지 워커(spawn) 초기화용: 새 프로세스의 ai_core에 가짜 모델 설치"""
+    import ai_core
+    install_fake_models(ai_core, det_latency, cls_latency)
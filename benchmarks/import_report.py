@@ -0,0 +1,54 @@
+"""
+ai_core import 비용 보고서: 워커가 첫 요청을 받기 전에 치르는 시간
+
+실행: python -m benchmarks.import_report [--with-models] [--top 15]
+ - 새 인터프리터에서 `python -X importtime -c "import ai_core"` 를 실행해 누적 시간이 큰 모듈을 보여 줍니다.
+ - 무거운 모듈(ultralytics/torch/cv2/scipy)이 import 단계에서 로드되는지 확인합니다.
+ - --with-models: import 직후 preload_models()까지 측정 (지연 로딩 이전의 import 비용에 해당)
+"""
+import sys
+import argparse
+import subprocess
+
+HEAVY = ('ultralytics', 'torch', 'cv2', 'scipy', 'plotly')
+
+def _run(code):
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line: continue
+        parts = line[len('import time:'):].split('|')
+        try:
+            rows.append((int(parts[1]), parts[2].strip()))
+        except ValueError:
+            continue  # 헤더 줄
+    return rows, proc.stdout.strip()
+
+def report(with_models=False, top=15):
+    code = "import time; t0 = time.perf_counter(); import ai_core; t1 = time.perf_counter()"
+    if with_models:
+        code += "; ai_core.preload_models(); t2 = time.perf_counter(); print(f'{t1 - t0:.3f} {t2 - t1:.3f}')"
+    else:
+        code += "; print(f'{t1 - t0:.3f} 0')"
+    rows, out = _run(code)
+    t_import, t_models = (float(v) for v in out.split()[-2:])
+
+    top_level = {name: us for us, name in rows if '.' not in name}
+    print(f"⏱️ import ai_core: {t_import:.2f}s" + (f" + preload_models: {t_models:.2f}s" if with_models else ""))
+    print("\n[무거운 모듈]")
+    for name in HEAVY:
+        us = top_level.get(name)
+        print(f"  {name:<12} {'import 안 됨' if us is None else f'{us / 1e6:.2f}s'}")
+    print(f"\n[누적 시간 상위 {top}개 최상위 모듈]")
+    for name, us in sorted(top_level.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {name:<28} {us / 1e6:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--with-models', action='store_true', help="preload_models()까지 측정")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    report(args.with_models, args.top)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,18 @@
 import os
+import re
+import time
+import functools
+import threading
 import pandas as pd
+from decimal import Decimal
 from datetime import datetime
 from sqlalchemy import create_engine, text
 import pymysql
 import certifi
+from utils.byte_cache import ByteBudgetCache
+from utils.audit_writer import AuditWriter
+from utils.migrations import MIGRATION_TABLE, SLOT_HOUR_VERSION, ROLLUP_VERSION
+from utils import rollups
 
 # [1] DB 접속 정보
 DB_CONFIG = {
@@ -17,6 +26,11 @@ DB_CONFIG = {
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_IMG_DIR = os.path.join(BASE_DIR, 'assets', 'images')
 
+# 하루 몇 번 바뀌는 참조 데이터(기지 목록 / SCENARIO 행 / 기상)의 조회 캐시 유지 시간(초)
+SCENE_CACHE_TTL = int(os.getenv("SCENE_CACHE_TTL", 600))
+SCENARIO_CACHE_TTL = int(os.getenv("SCENARIO_CACHE_TTL", 300))
+SCHEMA_CACHE_TTL = int(os.getenv("SCHEMA_CACHE_TTL", 300))
+
 # [2] DB 엔진 최적화
 DATABASE_URL = f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 
@@ -28,26 +42,114 @@ ENGINE = create_engine(
     max_overflow=20
 )
 
-# [3] 공통 함수 정의
+# [3] 조회 결과 캐시 (opt-in)
+# run_query(..., cache_ttl=초)로 부른 SELECT만 캐시합니다. (기지 목록, SCENARIO 행, 기상 등 하루 몇 번 바뀌는 데이터)
+#  - 키: 공백을 정리한 SQL + 파라미터, 용량은 DataFrame 메모리 합계(QUERY_CACHE_MB)로 제한
+#  - 같은 프로세스에서 INSERT/UPDATE/DELETE가 실행되면 그 테이블을 읽는 항목을 즉시 무효화
+#  - 다른 프로세스(gunicorn 워커, 배치)의 쓰기는 알 수 없으므로 TTL이 최대 지연 시간
+QUERY_CACHE = ByteBudgetCache(int(os.getenv("QUERY_CACHE_MB", 64)) * 1024 * 1024, name='query')
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+`?(\w+)`?', re.IGNORECASE)
+_WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+_cache_lock = threading.Lock()
+_table_keys = {}   # 테이블 -> 그 테이블을 읽는 캐시 키 집합
+_table_gen = {}    # 테이블 -> 무효화 횟수 (조회 중에 쓰기가 끼면 결과를 저장하지 않기 위함)
+_saved = {'sec': 0.0}
+
+def _normalize_sql(query_str):
+    return re.sub(r'\s+', ' ', query_str).strip()
+
+def _query_tables(query_str):
+    return {t.lower() for t in _TABLE_RE.findall(query_str)}
+
+def _cache_key(sql, params, kind='df'):
+    return (kind, sql, repr(sorted(params.items())) if params else '')
+
+def _cache_get(key, ttl):
+    # 저장된 지 ttl초가 지난 항목은 캐시가 지우고 miss로 집계
+    item = QUERY_CACHE.get_fresh(key, ttl)
+    if item is None: return None
+    value, cost = item
+    with _cache_lock:
+        _saved['sec'] += cost
+    # DataFrame은 호출하는 쪽에서 열 추가/수정하는 경우가 있어 사본을 반환 (행 튜플은 불변이라 그대로)
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+def _cache_put(key, gens, value, nbytes, cost):
+    with _cache_lock:
+        if any(_table_gen.get(t, 0) != g for t, g in gens.items()): return
+        for t in gens:
+            _table_keys.setdefault(t, set()).add(key)
+    QUERY_CACHE.put(key, (value, cost), nbytes)
+
+def _cache_begin(query_str, params, kind='df'):
+    """캐시 조회 준비. 반환: (key, 저장 시 확인할 테이블별 무효화 횟수)"""
+    sql = _normalize_sql(query_str)
+    key = _cache_key(sql, params, kind)
+    with _cache_lock:
+        gens = {t: _table_gen.get(t, 0) for t in _query_tables(sql)}
+    return key, gens
+
+def invalidate_tables(tables):
+    """해당 테이블을 읽는 캐시 항목 제거 (쓰기 쿼리 뒤 자동 호출, 외부 적재 뒤 수동 호출용)"""
+    with _cache_lock:
+        keys = set()
+        for t in tables:
+            t = t.lower()
+            _table_gen[t] = _table_gen.get(t, 0) + 1
+            keys |= _table_keys.pop(t, set())
+    for k in keys:
+        QUERY_CACHE.pop(k)
+
+def clear_query_cache():
+    with _cache_lock:
+        for t in _table_keys: _table_gen[t] = _table_gen.get(t, 0) + 1
+        _table_keys.clear()
+    QUERY_CACHE.clear()
+
+def query_cache_stats():
+    """적중률/항목 수/절약한 DB 시간(초: 적중한 항목을 처음 조회할 때 걸린 시간의 합)"""
+    stats = QUERY_CACHE.stats()
+    stats['saved_sec'] = round(_saved['sec'], 3)
+    return stats
+
+@functools.lru_cache(maxsize=512)
+def _stmt(query_str):
+    """같은 SQL 문자열은 같은 text() 객체를 재사용 (SQLAlchemy 컴파일 캐시 적중)"""
+    return text(query_str)
 
-def run_query(query_str, params=None):
+# [4] 공통 함수 정의
+
+def run_query(query_str, params=None, cache_ttl=None):
     """
     쿼리 실행 함수 (SELECT 및 INSERT/UPDATE/DELETE 자동 분기)
+    cache_ttl: 초 단위. 지정하면 SELECT 결과를 캐시에서 재사용 (쓰기 쿼리가 해당 테이블을 건드리면 무효화)
     """
     try:
         # 공백 제거 및 대문자 변환 후 'SELECT'로 시작하는지 확인
         qs = query_str.strip().upper()
-        
+        is_select = qs.startswith('SELECT')
+
+        if is_select and cache_ttl:
+            key, gens = _cache_begin(query_str, params)
+            cached = _cache_get(key, cache_ttl)
+            if cached is not None: return cached
+            started = time.perf_counter()
+
         with ENGINE.connect() as conn:
             # [A] SELECT 문일 경우 -> 데이터 반환
-            if qs.startswith('SELECT'):
-                df = pd.read_sql(text(query_str), conn, params=params)
+            if is_select:
+                df = pd.read_sql(_stmt(query_str), conn, params=params)
+                if cache_ttl:
+                    _cache_put(key, gens, df.copy(), df.memory_usage(deep=True).sum(),
+                               time.perf_counter() - started)
                 return df
             
             # [B] INSERT, UPDATE, DELETE 문일 경우 -> 실행만 하고 커밋
             else:
-                conn.execute(text(query_str), params if params else {})
+                conn.execute(_stmt(query_str), params if params else {})
                 conn.commit()
+                if qs.startswith(_WRITE_PREFIXES):
+                    invalidate_tables(_query_tables(query_str))
                 return pd.DataFrame() # 빈 데이터프레임 반환 (에러 방지)
                 
     except Exception as e:
@@ -58,19 +160,121 @@ def execute_query(query_str, params=None):
     """INSERT/UPDATE/DELETE 전용 (run_query로 통합 가능하나 호환성 유지)"""
     return run_query(query_str, params)
 
+# [5] 가벼운 조회 API (DataFrame을 만들지 않음)
+# 값 하나/행 하나/dict 목록만 필요한 콜백용. run_query와 같이 오류는 출력 후 기본값 반환,
+# cache_ttl도 같은 조회 캐시를 씁니다. DECIMAL 값은 pd.read_sql처럼 float으로 바꿉니다.
+
+def _coerce(row):
+    return tuple(float(v) if isinstance(v, Decimal) else v for v in row)
+
+def _fetch(query_str, params, cache_ttl, limit=None):
+    """반환: (열 이름 튜플, 행 튜플 목록). limit=1이면 첫 행만 읽음"""
+    if cache_ttl:
+        key, gens = _cache_begin(query_str, params, kind=f'rows:{limit}')
+        cached = _cache_get(key, cache_ttl)
+        if cached is not None: return cached
+        started = time.perf_counter()
+
+    with ENGINE.connect() as conn:
+        result = conn.execute(_stmt(query_str), params or {})
+        cols = tuple(result.keys())
+        raw = result.fetchmany(limit) if limit else result.fetchall()
+    out = (cols, [_coerce(r) for r in raw])
+
+    if cache_ttl:
+        # 대략적인 크기: 값 하나당 파이썬 객체 오버헤드 + 문자열 길이
+        nbytes = sum(64 * len(r) + sum(len(v) for v in r if isinstance(v, str)) for r in out[1])
+        _cache_put(key, gens, out, nbytes + 256, time.perf_counter() - started)
+    return out
+
+def fetch_all(query_str, params=None, as_dict=False, cache_ttl=None):
+    """모든 행을 튜플(as_dict=True면 {열: 값}) 목록으로"""
+    try:
+        cols, rows = _fetch(query_str, params, cache_ttl)
+    except Exception as e:
+        print(f"[DB Query Error] {e}")
+        return []
+    # 캐시에 저장된 목록 자체를 돌려주면 호출하는 쪽의 수정이 캐시를 오염시킴 -> 얕은 사본 (행 튜플은 불변)
+    return [dict(zip(cols, r)) for r in rows] if as_dict else list(rows)
+
+def fetch_one(query_str, params=None, as_dict=False, cache_ttl=None):
+    """첫 행 하나 (없거나 오류면 None)"""
+    try:
+        cols, rows = _fetch(query_str, params, cache_ttl, limit=1)
+    except Exception as e:
+        print(f"[DB Query Error] {e}")
+        return None
+    if not rows: return None
+    return dict(zip(cols, rows[0])) if as_dict else rows[0]
+
+def fetch_scalar(query_str, params=None, default=None, cache_ttl=None):
+    """첫 행 첫 열 값 (COUNT(*) 등). 없거나 NULL이면 default"""
+    row = fetch_one(query_str, params, cache_ttl=cache_ttl)
+    if row is None or row[0] is None: return default
+    return row[0]
+
+def fetch_arrow(query_str, params=None, batch_rows=10000):
+    """
+    대량 조회를 pyarrow.Table(열 단위)로. 서버 커서로 batch_rows씩 읽어 메모리 피크를 줄입니다.
+    pyarrow는 선택 의존성이라 이 함수를 쓸 때만 import 합니다.
+    """
+    import pyarrow as pa
+    batches = []
+    with ENGINE.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(_stmt(query_str), params or {})
+        cols = list(result.keys())
+        for part in result.partitions(batch_rows):
+            columns = list(zip(*(_coerce(r) for r in part)))
+            batches.append(pa.RecordBatch.from_pydict(dict(zip(cols, map(list, columns)))))
+    if not batches:
+        return pa.table({c: [] for c in cols})
+    return pa.Table.from_batches(batches)
+
+# [6] 스키마 버전 (migrate.py) - 새 열/인덱스를 쓰는 쿼리는 적용 여부를 보고 분기
+_schema = {'version': 0, 'checked': 0.0}
+
+def schema_version():
+    """적용된 마이그레이션 최고 버전 (SCHEMA_CACHE_TTL마다 다시 확인, 기록 테이블이 없으면 0)"""
+    now = time.time()
+    if now - _schema['checked'] >= SCHEMA_CACHE_TTL:
+        _schema['checked'] = now
+        try:
+            with ENGINE.connect() as conn:
+                v = conn.execute(_stmt(f"SELECT MAX(version) FROM {MIGRATION_TABLE}")).scalar()
+            _schema['version'] = int(v or 0)
+        except Exception:
+            _schema['version'] = 0
+    return _schema['version']
+
+def slot_hour_expr(alias='s'):
+    """tb_scenario의 '시(hour)' 조건식: slot_hour 열(인덱스)이 있으면 그 열, 없으면 HOUR(timestamp)"""
+    if schema_version() >= SLOT_HOUR_VERSION:
+        return f"{alias}.slot_hour"
+    return f"HOUR({alias}.timestamp)"
+
+def rollups_ready():
+    """집계 테이블(migrate 4단계 + rollup.py --rebuild)을 읽어도 되면 True (필요하면 증분 갱신도 여기서)"""
+    if schema_version() < ROLLUP_VERSION: return False
+    return rollups.maybe_refresh(ENGINE)
+
 def get_weather_info(time_str, base_name='Sunan'):
-    query = """
+    # 'HH:00' 슬롯만 일치 (정각이 아닌 시각은 예전 DATE_FORMAT 비교처럼 결과 없음)
+    try:
+        hh, mm = str(time_str).split(':')[:2]
+        hour = int(hh) if mm == '00' else -1
+    except ValueError:
+        hour = -1
+    query = f"""
     SELECT s.weather, s.wind_speed, s.moon_phase
     FROM tb_scenario s
     JOIN tb_scene sc ON s.scene_id = sc.scene_id
-    WHERE DATE_FORMAT(s.timestamp, '%H:00') = :tm 
+    WHERE {slot_hour_expr('s')} = :hr 
       AND sc.scene_name = :bn 
       AND s.data_type = 'SCENARIO' 
     LIMIT 1
     """
-    df = run_query(query, params={'tm': time_str, 'bn': base_name})
-    if not df.empty:
-        r = df.iloc[0]
+    r = fetch_one(query, params={'hr': hour, 'bn': base_name}, as_dict=True, cache_ttl=SCENARIO_CACHE_TTL)
+    if r:
         return {
             'weather': r['weather'] if r['weather'] else 'Clear',
             'wind': r['wind_speed'] if r['wind_speed'] is not None else 0,
@@ -78,20 +282,40 @@ def get_weather_info(time_str, base_name='Sunan'):
         }
     return {'weather': 'Clear', 'wind': 0, 'moon': 0}
 
+# [감사 로그] 기본은 백그라운드 일괄 기록 (AUDIT_ASYNC=0 이면 예전처럼 호출 즉시 단건 INSERT)
+AUDIT_ASYNC = os.getenv("AUDIT_ASYNC", "1") == "1"
+AUDIT_SPILL_PATH = os.path.join(os.getenv("AI_CACHE_DIR", os.path.join(BASE_DIR, 'cache')), 'audit_spill.jsonl')
+
+def _insert_audit_rows(rows):
+    """감사 로그 여러 건을 multi-row INSERT 한 번으로 기록 (실패 시 예외 -> 기록기가 파일에 보관)"""
+    values, params = [], {}
+    for i, r in enumerate(rows):
+        values.append(f"(:uid{i}, :act{i}, :det{i}, :ts{i})")
+        params.update({f'uid{i}': r['uid'], f'act{i}': r['act'], f'det{i}': r['det'], f'ts{i}': r['ts']})
+    sql = "INSERT INTO tb_audit_log (user_id, action, details, timestamp) VALUES " + ", ".join(values)
+    with ENGINE.begin() as conn:
+        conn.execute(text(sql), params)
+    invalidate_tables(['tb_audit_log'])
+
+AUDIT_WRITER = AuditWriter(
+    _insert_audit_rows, AUDIT_SPILL_PATH,
+    batch_size=int(os.getenv("AUDIT_BATCH_SIZE", 50)),
+    interval_ms=int(os.getenv("AUDIT_FLUSH_MS", 1000))
+)
+
 def log_action(user_id, action, details=None):
     try:
-        # 1. 쿼리문에 :det 가 있는지 확인
-        sql = """
-            INSERT INTO tb_audit_log (user_id, action, details, timestamp)
-            VALUES (:uid, :act, :det, NOW())
-        """
-        # 2. 파라미터 딕셔너리에 'det'가 있는지 확인
-        params = {
+        # 시각은 큐에 넣는 시점 기준 (DB NOW()를 쓰면 flush 지연만큼 밀림)
+        event = {
             'uid': user_id, 
             'act': action,
-            'det': details  
+            'det': details,
+            'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        run_query(sql, params) 
+        if AUDIT_ASYNC:
+            AUDIT_WRITER.submit(event)
+        else:
+            _insert_audit_rows([event])
         
     except Exception as e:
         print(f"[Log Error] {e}")
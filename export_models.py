@@ -0,0 +1,125 @@
+"""
+[추론 백엔드 산출물 내보내기 + 정합성 검사]
+models/det_best.pt, models/cls_best.pt 를 ONNX(또는 OpenVINO)로 한 번 내보내고,
+샘플 이미지에서 PyTorch 결과와 박스/Top-1 클래스가 허용 오차 내로 일치하는지 확인합니다.
+
+사용 예:
+    python export_models.py --format onnx
+    python export_models.py --format onnx --int8 --check sunan_t1.png pukchang_t3.png
+    python export_models.py --format openvino --int8 --data calib.yaml
+
+서버에서는 INFERENCE_BACKEND=onnx (INT8은 INFERENCE_INT8=1) 로 선택합니다.
+"""
+import os
+import sys
+import argparse
+from PIL import Image, ImageOps
+from db_manager import BASE_DIR
+from utils.inference_backend import export_model, artifact_path
+
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+IOU_TOL = 0.9      # 같은 물체로 볼 최소 IoU
+CONF_TOL = 0.05    # 신뢰도 허용 오차
+MATCH_RATE = 0.95  # 통과 기준 (박스 매칭률 / Top-1 일치율)
+
+def _box_iou(a, b):
+    w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def _predict_boxes(model, crops, imgsz, conf):
+    out = []
+    for r in model.predict(crops, conf=conf, verbose=False, imgsz=imgsz):
+        boxes = []
+        if r.boxes is not None:
+            for box in r.boxes:
+                boxes.append((*box.xyxy[0].tolist(), float(box.conf[0]), int(box.cls[0])))
+        out.append(boxes)
+    return out
+
+def _match_boxes(ref, test):
+    """ref 박스 중 test에 (같은 클래스, IoU >= IOU_TOL, conf 차이 <= CONF_TOL) 짝이 있는 개수"""
+    used, hit = set(), 0
+    for rb in ref:
+        best, best_j = 0.0, None
+        for j, tb in enumerate(test):
+            if j in used or tb[5] != rb[5]: continue
+            iou = _box_iou(rb, tb)
+            if iou > best: best, best_j = iou, j
+        if best_j is not None and best >= IOU_TOL and abs(test[best_j][4] - rb[4]) <= CONF_TOL:
+            used.add(best_j); hit += 1
+    return hit
+
+def check_parity(backend, int8, sample_paths, max_tiles=8):
+    from ultralytics import YOLO
+    from ai_core import load_image_from_path, get_tile_grid, TILE_SIZE, DET_CONF
+
+    det_path = artifact_path(MODELS_DIR, 'det_best', backend, int8)
+    if not os.path.exists(det_path):
+        print(f"❌ 산출물이 없습니다: {det_path}")
+        return False
+    det_ref = YOLO(artifact_path(MODELS_DIR, 'det_best', 'torch'))
+    det_test = YOLO(det_path, task='detect')
+
+    cls_path = artifact_path(MODELS_DIR, 'cls_best', backend, int8)
+    has_cls = os.path.exists(cls_path)
+    if has_cls:
+        cls_ref = YOLO(artifact_path(MODELS_DIR, 'cls_best', 'torch'))
+        cls_test = YOLO(cls_path, task='classify')
+
+    n_ref = n_test = n_hit = 0
+    n_cls = n_cls_hit = 0
+    for path in sample_paths:
+        im = load_image_from_path(path)
+        if im is None:
+            print(f"⚠️ 이미지 로드 실패: {path}")
+            continue
+        im = ImageOps.autocontrast(im.convert("RGB"), cutoff=1)
+        tiles = get_tile_grid(*im.size)[:max_tiles]
+        crops = [im.crop((x, y, x + TILE_SIZE, y + TILE_SIZE)) for x, y in tiles]
+
+        ref = _predict_boxes(det_ref, crops, TILE_SIZE, DET_CONF)
+        test = _predict_boxes(det_test, crops, TILE_SIZE, DET_CONF)
+        for crop, rb, tb in zip(crops, ref, test):
+            n_ref += len(rb); n_test += len(tb); n_hit += _match_boxes(rb, tb)
+
+            if not has_cls: continue
+            # 분류 모델: PyTorch 탐지 박스 crop(2배 확대)에서 Top-1 비교
+            for x1, y1, x2, y2, _, _ in rb:
+                if x2 - x1 < 1 or y2 - y1 < 1: continue
+                c = crop.crop((int(x1), int(y1), int(x2), int(y2)))
+                c = c.resize((c.size[0] * 2, c.size[1] * 2), Image.LANCZOS)
+                top_ref = int(cls_ref.predict(c, verbose=False)[0].probs.top1)
+                top_test = int(cls_test.predict(c, verbose=False)[0].probs.top1)
+                n_cls += 1; n_cls_hit += int(top_ref == top_test)
+
+    det_rate = n_hit / n_ref if n_ref else 1.0
+    cls_rate = n_cls_hit / n_cls if n_cls else 1.0
+    print(f"📦 탐지: PyTorch {n_ref}건 / {backend} {n_test}건 / 일치 {n_hit}건 ({det_rate*100:.1f}%)")
+    if has_cls:
+        print(f"🏷️ 분류 Top-1 일치: {n_cls_hit}/{n_cls} ({cls_rate*100:.1f}%)")
+    ok = det_rate >= MATCH_RATE and cls_rate >= MATCH_RATE and abs(n_test - n_ref) <= max(1, n_ref * (1 - MATCH_RATE))
+    print("✅ 정합성 통과" if ok else "❌ 정합성 기준 미달")
+    return ok
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="탐지/분류 모델 CPU 백엔드 내보내기")
+    parser.add_argument('--format', choices=['onnx', 'openvino'], default='onnx')
+    parser.add_argument('--int8', action='store_true', help="INT8 양자화 산출물도 생성")
+    parser.add_argument('--data', default=None, help="OpenVINO INT8 보정용 데이터셋 yaml")
+    parser.add_argument('--check', nargs='*', default=None, help="정합성 검사용 이미지 경로 (assets/images 기준 가능)")
+    parser.add_argument('--skip-export', action='store_true', help="내보내기 없이 검사만 수행")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        for stem, imgsz in (('det_best', 1280), ('cls_best', None)):
+            if not os.path.exists(artifact_path(MODELS_DIR, stem, 'torch')):
+                print(f"⚠️ {stem}.pt 없음 (건너뜀)")
+                continue
+            out = export_model(MODELS_DIR, stem, args.format, int8=args.int8, imgsz=imgsz, data=args.data)
+            print(f"✅ {stem} -> {out}")
+
+    if args.check:
+        sys.exit(0 if check_parity(args.format, args.int8, args.check) else 1)
@@ -0,0 +1,26 @@
+"""
+[gunicorn 설정]
+실행: gunicorn -c gunicorn.conf.py
+
+PRELOAD_MODELS=1 이면 마스터 프로세스가 앱을 import하고 YOLO 모델까지 로드한 뒤 워커를 fork합니다.
+ - 워커들은 모델 가중치 메모리를 copy-on-write로 공유 -> 워커 수만큼 모델 메모리가 늘지 않음
+ - 첫 분석 요청이 모델 로드를 기다리지 않음
+기본값(0)은 워커마다 첫 추론 시점에 모델을 로드합니다. (로그인 화면 등은 모델 없이 바로 응답)
+"""
+import os
+
+wsgi_app = "app:server"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8050")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 300))
+
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"
+preload_app = PRELOAD_MODELS
+
+def on_starting(server):
+    # preload_app이면 이 시점에 앱이 이미 마스터에 import되어 있음 (fork 전)
+    if not PRELOAD_MODELS: return
+    import ai_core
+    det_ok, cls_ok = ai_core.preload_models()
+    server.log.info(f"모델 사전 로드: 탐지={'OK' if det_ok else '없음'}, 분류={'OK' if cls_ok else '없음'}")
@@ -0,0 +1,90 @@
+"""
+[분석 작업 워커]
+분석 화면이 등록한 탐지/비교 작업(cache/jobs.sqlite)을 웹 서버 밖의 프로세스 풀에서 실행합니다.
+웹은 ANALYSIS_JOB_QUEUE=1 일 때 추론이 필요한 요청을 대기열에 넣고 진행률을 폴링합니다.
+인접 시간대 예열(prefetch), 박스 분류(classify), 타일 피라미드 생성(pyramid)도 이 모드에서는 워커가 실행합니다.
+
+사용 예:
+    ANALYSIS_JOB_QUEUE=1 gunicorn -c gunicorn.conf.py    # 웹
+    python job_worker.py --workers 2                    # 작업 워커 (별도 터미널/서비스)
+
+프로세스마다 모델을 한 번 로드하고 계속 재사용합니다. 워커가 죽으면 하트비트가 끊긴 작업을
+다른 워커가 JOB_STALE_SEC 뒤에 다시 가져갑니다.
+각 워커는 WORKER_HEARTBEAT_SEC마다 살아 있음을 기록하고(화면의 "워커 없음" 안내 기준),
+대기열이 비었을 때 JOB_PURGE_AGE보다 오래된 완료/실패 작업을 정리합니다.
+"""
+import os
+import time
+import socket
+import argparse
+import threading
+import traceback
+from multiprocessing import Process
+
+POLL_SEC = 0.5
+PURGE_EVERY_SEC = 3600
+
+def _heartbeat_loop(queue, name, stop, interval):
+    # 긴 작업(모델 로드, 대형 장면 탐지) 중에도 살아 있음을 기록하도록 별도 스레드
+    while not stop.wait(interval):
+        queue.worker_heartbeat(name)
+
+def worker_loop(worker_id, poll_sec=POLL_SEC, max_jobs=None):
+    import ai_core
+    from utils.job_queue import JOB_QUEUE, WORKER_HEARTBEAT_SEC
+
+    name = f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+    JOB_QUEUE.worker_heartbeat(name)
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat_loop, args=(JOB_QUEUE, name, stop, WORKER_HEARTBEAT_SEC), daemon=True).start()
+    try:
+        ai_core.preload_models()
+        print(f"🛠️ 워커 {name} 대기 중", flush=True)
+        _run_jobs(ai_core, JOB_QUEUE, name, worker_id, poll_sec, max_jobs)
+    finally:
+        stop.set()
+        JOB_QUEUE.worker_exit(name)
+
+def _run_jobs(ai_core, queue, name, worker_id, poll_sec, max_jobs):
+    done = 0
+    last_purge = 0.0
+    while max_jobs is None or done < max_jobs:
+        job = queue.claim(name)
+        if not job:
+            if time.time() - last_purge > PURGE_EVERY_SEC:
+                queue.purge()
+                last_purge = time.time()
+            time.sleep(poll_sec)
+            continue
+
+        key, kind, payload = job
+        handler = ai_core.JOB_HANDLERS.get(kind)
+        started = time.perf_counter()
+        if not handler:
+            queue.fail(key, f"unknown job kind: {kind}")
+            continue
+        try:
+            result = handler(payload, lambda frac, msg=None: queue.progress(key, frac, msg))
+            queue.finish(key, result)
+            print(f"✅ [{worker_id}] {kind} {key} ({time.perf_counter() - started:.1f}s)", flush=True)
+        except Exception as e:
+            traceback.print_exc()
+            queue.fail(key, e)
+            print(f"❌ [{worker_id}] {kind} {key}: {e}", flush=True)
+        done += 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="분석 작업 큐 워커 풀")
+    parser.add_argument('--workers', type=int, default=1, help="작업 프로세스 수")
+    parser.add_argument('--poll', type=float, default=POLL_SEC, help="대기열이 비었을 때 조회 간격(초)")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        worker_loop(0, args.poll)
+    else:
+        procs = [Process(target=worker_loop, args=(i, args.poll), daemon=True) for i in range(args.workers)]
+        for p in procs: p.start()
+        try:
+            for p in procs: p.join()
+        except KeyboardInterrupt:
+            print("\n🛑 종료")
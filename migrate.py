@@ -0,0 +1,56 @@
+"""
+[DB 스키마 마이그레이션]
+utils/migrations.py의 MIGRATIONS 중 아직 적용되지 않은 단계를 순서대로 적용합니다.
+(인덱스, SCENARIO 시간 슬롯 열 등 - 적용 기록은 tb_schema_migrations)
+
+사용 예:
+    python migrate.py --status                       # 적용/대기 상태
+    python migrate.py --dry-run                      # 실행할 SQL만 출력
+    python migrate.py                                # 운영 DB(db_manager 설정)에 적용
+    python migrate.py --to 2                         # 2번까지만
+    python migrate.py --url sqlite:///cache/standin.sqlite   # 로컬 SQLite 대역으로 검증
+
+적용 후 웹/배치 프로세스는 SCHEMA_CACHE_TTL(기본 300초) 안에 새 스키마를 인식합니다.
+"""
+import sys
+import argparse
+from sqlalchemy import create_engine
+from utils.migrations import MIGRATIONS, applied_versions, migrate
+
+def print_status(engine):
+    done = applied_versions(engine)
+    for version, name, _ in MIGRATIONS:
+        mark = f"✅ {done[version]}" if version in done else "⏳ 대기"
+        print(f"{version:04d} {name:<32} {mark}")
+
+def main():
+    parser = argparse.ArgumentParser(description="DB 스키마 마이그레이션")
+    parser.add_argument('--url', default=None, help="대상 DB URL (기본: db_manager의 운영 DB)")
+    parser.add_argument('--to', type=int, default=None, help="이 버전까지만 적용")
+    parser.add_argument('--status', action='store_true', help="상태만 출력")
+    parser.add_argument('--dry-run', action='store_true', help="적용하지 않고 SQL만 출력")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from db_manager import ENGINE as engine
+
+    if args.status:
+        print_status(engine)
+        return
+
+    try:
+        done = migrate(engine, target=args.to, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"❌ 마이그레이션 실패: {e}")
+        sys.exit(1)
+    if not done:
+        print("✨ 적용할 마이그레이션이 없습니다.")
+    elif args.dry_run:
+        print(f"📝 적용 예정: {len(done)}건 (dry-run)")
+    else:
+        print(f"✅ 적용 완료: {done}")
+
+if __name__ == '__main__':
+    main()
@@ -7,17 +7,23 @@ import base64
 import io
 from urllib.parse import parse_qs
 from datetime import datetime, timedelta
-from db_manager import run_query
+from db_manager import run_query, SCENE_CACHE_TTL
 from ai_core import (
     get_db_image_path, run_detection_and_compare, create_figure, 
-    run_classification, get_trend_data, load_image_from_path
+    run_classification, get_trend_data, crop_image_region, prefetch_adjacent_slots,
+    schedule_classification, lookup_classification, select_box_patch,
+    comparison_cached, compare_job_key
 )
+from utils.job_queue import JOB_QUEUE, JOB_QUEUE_ENABLED, WORKER_STALE_SEC
 
 dash.register_page(__name__, path='/analysis')
 
 layout = dbc.Container([
     dcc.Location(id='analysis-url', refresh=False),
     dcc.Store(id='det-store', data={'t1': {}, 't2': {}}), 
+    # 작업 큐 모드: 진행 중인 분석 작업 키 + 1초 간격 진행률 폴링
+    dcc.Store(id='job-store'),
+    dcc.Interval(id='job-poll', interval=1000, disabled=True),
     
     html.Div(className="glass-panel p-3 mb-3", children=[
         dbc.Row([
@@ -25,7 +31,8 @@ layout = dbc.Container([
             dbc.Col([html.Label("2. 날짜 (Date)", className="fw-bold small text-muted mb-1"), dcc.DatePickerSingle(id='sel-date', display_format='YYYY-MM-DD', className="w-100")], width=3),
             dbc.Col([html.Label("3. 시간 (Target Time)", className="fw-bold small text-muted mb-1"), dcc.Dropdown(id='sel-time', placeholder="시간 선택", clearable=False)], width=3),
             dbc.Col([html.Label("Action", className="fw-bold small text-muted mb-1", style={'visibility':'hidden'}), dbc.Button([html.I(className="fas fa-search me-2"), "분석 실행"], id="btn-load", color="primary", className="w-100 fw-bold")], width=3)
-        ])
+        ]),
+        html.Div(id='job-status')
     ]),
     
     dbc.Row([
@@ -63,7 +70,7 @@ layout = dbc.Container([
 @callback(Output('sel-base', 'options'), Output('sel-base', 'value'), Output('sel-date', 'date'), Output('sel-time', 'options'), Output('sel-time', 'value'), Input('analysis-url', 'search'), Input('sel-date', 'date'))
 def init_controls(search, date_val):
     bases = []
-    df = run_query("SELECT scene_name, name_kor FROM tb_scene WHERE name_kor IS NOT NULL")
+    df = run_query("SELECT scene_name, name_kor FROM tb_scene WHERE name_kor IS NOT NULL", cache_ttl=SCENE_CACHE_TTL)
     if not df.empty:
         bases = [{'label': f"{r['name_kor']} ({r['scene_name']})", 'value': r['scene_name']} for _, r in df.iterrows()]
     base = bases[0]['value'] if bases else 'Sunan'
@@ -83,7 +90,20 @@ def init_controls(search, date_val):
         except: pass
     return bases, base, date, options, time_val
 
-@callback([Output('fig-t1', 'figure'), Output('fig-t2', 'figure'), Output('det-store', 'data')], [Input('btn-load', 'n_clicks'), Input('analysis-url', 'search')], [State('sel-base', 'value'), State('sel-date', 'date'), State('sel-time', 'value')])
+def _job_progress(state):
+    pct = int(round((state.get('progress') or 0) * 100))
+    msg = state.get('message') or ("대기열에서 순서를 기다리는 중" if state.get('status') == 'queued' else "분석 중")
+    return html.Div([
+        dbc.Progress(value=max(pct, 3), label=f"{pct}%", striped=True, animated=True, className="mt-3", style={'height': '18px'}),
+        html.Div(msg, className="small text-muted mt-1")
+    ])
+
+def _finish_analysis(base, date, time, t1_path, t2_path, d1, d2):
+    # 다음 슬라이더 이동(±2h)에 대비해 인접 시간대 캐시 예열 (백그라운드)
+    prefetch_adjacent_slots(base, date, time)
+    return create_figure(t1_path, d1), create_figure(t2_path, d2), {'t1': {'dets': d1, 'path': t1_path}, 't2': {'dets': d2, 'path': t2_path}}
+
+@callback([Output('fig-t1', 'figure'), Output('fig-t2', 'figure'), Output('det-store', 'data'), Output('job-store', 'data'), Output('job-poll', 'disabled'), Output('job-status', 'children')], [Input('btn-load', 'n_clicks'), Input('analysis-url', 'search')], [State('sel-base', 'value'), State('sel-date', 'date'), State('sel-time', 'value')])
 def run_dual_analysis(n, search, base_st, date_st, time_st):
     trig = ctx.triggered_id
     if trig == 'analysis-url' and search:
@@ -93,10 +113,10 @@ def run_dual_analysis(n, search, base_st, date_st, time_st):
             date = qs.get('date', [date_st])[0]
             time = qs.get('time', [time_st])[0]
             if len(time.split(':')[0]) == 1: time = f"0{time}"
-        except: return no_update, no_update, no_update
+        except: return (no_update,) * 6
     elif trig == 'btn-load' and n:
         base, date, time = base_st, date_st, time_st
-    else: return no_update, no_update, no_update
+    else: return (no_update,) * 6
 
     t2_path = get_db_image_path(base, date, time)
     t1_path = None
@@ -106,8 +126,38 @@ def run_dual_analysis(n, search, base_st, date_st, time_st):
         t1_path = get_db_image_path(base, prev_dt.strftime("%Y-%m-%d"), prev_dt.strftime("%H:%M"))
     except: pass
     
+    if JOB_QUEUE_ENABLED and not comparison_cached(t1_path, t2_path):
+        # 추론이 필요한 요청은 작업 워커(job_worker.py)에 맡기고 진행률만 폴링
+        key = JOB_QUEUE.enqueue(compare_job_key(t1_path, t2_path), 'compare', {'t1': t1_path, 't2': t2_path})
+        if key:
+            job = {'key': key, 'base': base, 'date': date, 'time': time, 't1': t1_path, 't2': t2_path}
+            return no_update, no_update, no_update, job, False, _job_progress({'status': 'queued'})
+
     d1, w1, h1, d2, w2, h2 = run_detection_and_compare(t1_path, t2_path)
-    return create_figure(t1_path, d1), create_figure(t2_path, d2), {'t1': {'dets': d1, 'path': t1_path}, 't2': {'dets': d2, 'path': t2_path}}
+    # 박스 클릭 전에 모든 탐지 박스를 백그라운드에서 배치 분류
+    schedule_classification(t2_path, d2)
+    schedule_classification(t1_path, d1)
+    return (*_finish_analysis(base, date, time, t1_path, t2_path, d1, d2), None, True, None)
+
+@callback(Output('fig-t1', 'figure', allow_duplicate=True), Output('fig-t2', 'figure', allow_duplicate=True), Output('det-store', 'data', allow_duplicate=True), Output('job-poll', 'disabled', allow_duplicate=True), Output('job-status', 'children', allow_duplicate=True), Input('job-poll', 'n_intervals'), State('job-store', 'data'), prevent_initial_call=True)
+def poll_analysis_job(n, job):
+    if not job: return no_update, no_update, no_update, True, None
+    state = JOB_QUEUE.get(job['key'])
+    if not state or state['status'] == 'failed':
+        err = state['error'] if state else "작업을 찾을 수 없습니다."
+        return no_update, no_update, no_update, True, dbc.Alert(f"분석 실패: {err}", color="danger", className="small mt-3 mb-0 py-2")
+    if state['status'] != 'done' and JOB_QUEUE.live_workers() == 0:
+        # 하트비트를 남기는 워커(job_worker.py)가 하나도 없으면 작업이 끝나지 않음 -> 폴링을 멈추고 안내
+        # (워커가 바쁜 것뿐이면 계속 기다림)
+        msg = f"실행 중인 작업 워커가 없습니다 (최근 {WORKER_STALE_SEC}초 하트비트 없음). job_worker.py를 실행한 뒤 다시 시도하세요."
+        return no_update, no_update, no_update, True, dbc.Alert(msg, color="warning", className="small mt-3 mb-0 py-2")
+    if state['status'] != 'done':
+        return no_update, no_update, no_update, False, _job_progress(state)
+
+    # 박스 분류는 작업 워커에서 이미 끝남
+    res = state['result']
+    d1, d2 = res['t1']['dets'], res['t2']['dets']
+    return (*_finish_analysis(job['base'], job['date'], job['time'], job['t1'], job['t2'], d1, d2), True, None)
 
 @callback(Output('detail-panel', 'children'), Output('fig-t1', 'figure', allow_duplicate=True), Output('fig-t2', 'figure', allow_duplicate=True), Input('fig-t1', 'clickData'), Input('fig-t2', 'clickData'), State('det-store', 'data'), State('theme-store', 'data'), prevent_initial_call=True)
 def handle_dual_click(click_t1, click_t2, store, theme):
@@ -120,6 +170,8 @@ def handle_dual_click(click_t1, click_t2, store, theme):
     target_info = store.get(target_key, {})
     dets = target_info.get('dets', [])
     img_path = target_info.get('path')
+    # 이미지/탐지가 없으면 create_figure가 선택 트레이스/주석 없는 빈 그림을 그림 -> 부분 업데이트할 위치가 없음
+    if not img_path or not dets: return no_update, no_update, no_update
     
     try:
         custom_data = click_data['points'][0]['customdata']
@@ -129,19 +181,19 @@ def handle_dual_click(click_t1, click_t2, store, theme):
         print(f"[DEBUG] Click Data Error: {e}")
         return no_update, no_update, no_update
     
+    # 박스 테두리 트레이스의 끊김 자리(NaN)는 -1
+    if match_idx < 0: return no_update, no_update, no_update
     match = next((d for d in dets if d[6] == match_idx), None)
     if not match: return no_update, no_update, no_update
     
     crop_b64, cls_res = "", {}
     try:
-        im = load_image_from_path(img_path)
-        if im:
-            if im.mode != "RGB": im = im.convert("RGB")
-            w, h = im.size
-            x1, y1, x2, y2 = map(int, match[:4])
-            if x2 > x1 and y2 > y1:
-                crop = im.crop((x1, y1, x2, y2))
-                cls_res = run_classification(crop)
+        x1, y1, x2, y2 = map(int, match[:4])
+        if x2 > x1 and y2 > y1:
+            crop = crop_image_region(img_path, (x1, y1, x2, y2))
+            if crop:
+                # 사전 분류 결과가 있으면 조회만, 없으면 이 박스만 즉시 분류
+                cls_res = lookup_classification(img_path, (x1, y1, x2, y2)) or run_classification(crop)
                 buf = io.BytesIO(); crop.save(buf, format="PNG"); crop_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
     except Exception as e:
         print(f"[DEBUG] Detail Panel Error: {e}")
@@ -157,7 +209,8 @@ def handle_dual_click(click_t1, click_t2, store, theme):
         dbc.Col([html.H5(cls_res.get('cls_top1'), className=f"fw-bold text-danger {text_cls}"), html.Div(f"Conf: {cls_res.get('cls_conf')}", className="small fw-bold text-success mb-2"), html.Div(html.Ul(cls_res.get('cls_top5', []), className=f"small {text_cls} ps-3 mb-0"))], width=7)
     ], className="g-3 h-100 align-items-center", style={'backgroundColor': bg_panel, 'borderRadius': '8px', 'padding': '10px'})
     
-    new_fig = create_figure(img_path, dets, selected_idx=match_idx)
+    # 그림 전체를 다시 보내지 않고 선택 강조 트레이스/주석만 부분 업데이트
+    new_fig = select_box_patch(dets, match_idx)
     return panel, new_fig if target_key == 't1' else no_update, new_fig if target_key == 't2' else no_update
 
 @callback(Output("trend-chart", "figure"), Input("trend-tabs", "active_tab"), Input("sel-base", "value"), State("theme-store", "data"))
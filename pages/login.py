@@ -1,7 +1,7 @@
 import dash
 from dash import html, dcc, Input, Output, State, callback, no_update
 import dash_bootstrap_components as dbc
-from db_manager import run_query, log_action
+from db_manager import fetch_one, log_action
 
 dash.register_page(__name__, path='/')
 
@@ -68,11 +68,10 @@ def handle_login(n_clicks, user_id, user_pw, security_agreed):
     try:
         # [DB 연결] tb_users 테이블 조회
         query = "SELECT * FROM tb_users WHERE user_id = :uid"
-        df = run_query(query, params={'uid': user_id})
+        row = fetch_one(query, params={'uid': user_id}, as_dict=True)
 
-        if not df.empty:
+        if row:
             # DB 데이터 매핑
-            row = df.iloc[0]
             correct_pw = str(row['password'])
             
             if str(user_pw) == correct_pw:
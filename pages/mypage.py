@@ -4,7 +4,7 @@ import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime, timedelta
-from db_manager import run_query
+from db_manager import run_query, fetch_one, fetch_scalar
 
 dash.register_page(__name__, path='/mypage')
 
@@ -53,8 +53,7 @@ def get_db_stats():
     WHERE timestamp >= :today_start
       AND (action LIKE '%%FAIL%%' OR action LIKE '%%MACRO%%' OR action LIKE '%%WARNING%%')
     """
-    sec_df = run_query(sec_query, {'today_start': today_start})
-    security_alerts = sec_df.iloc[0]['cnt'] if not sec_df.empty else 0
+    security_alerts = fetch_scalar(sec_query, {'today_start': today_start}, default=0)
 
     return date_labels, list(daily_counts.values()), total_count, security_alerts
 
@@ -182,9 +181,8 @@ def update_mypage_content(session_data, pathname, period_hours):
         uid = 'guest'
     else:
         uid = session_data.get('user_id')
-        user_df = run_query("SELECT * FROM tb_users WHERE user_id = :uid", {'uid': uid})
-        if not user_df.empty:
-            row = user_df.iloc[0]
+        row = fetch_one("SELECT `rank`, name, unit, img_path FROM tb_users WHERE user_id = :uid", {'uid': uid}, as_dict=True)
+        if row:
             rank, name, unit = row['rank'], row['name'], row['unit']
             img_path = row['img_path'] if row['img_path'] else 'profile_pic.png'
             img_src = f"/assets/{img_path}"
@@ -3,7 +3,7 @@ from dash import html, dcc, Input, Output, State, callback, no_update, callback_
 import dash_bootstrap_components as dbc
 import base64
 from datetime import datetime, timedelta
-from db_manager import run_query
+from db_manager import run_query, SCENE_CACHE_TTL
 from utils.report_service import fetch_report_data, generate_multi_charts, create_pdf_bytes
 
 dash.register_page(__name__, path='/report')
@@ -93,7 +93,7 @@ def toggle_time_dropdown(rtype):
 @callback(Output('rpt-base', 'options'), Input('rpt-type', 'value'))
 def load_bases_ui(v):
     sql = "SELECT scene_name, name_kor FROM tb_scene WHERE name_kor IS NOT NULL AND name_kor != '' ORDER BY name_kor ASC"
-    df = run_query(sql)
+    df = run_query(sql, cache_ttl=SCENE_CACHE_TTL)
     return [{'label': '전 기지 (ALL)', 'value': 'ALL'}] + [{'label': f"{r['name_kor']} ({r['scene_name']})", 'value': r['scene_name']} for _, r in df.iterrows()]
 
 @callback(
@@ -1,7 +1,7 @@
 import dash
 from dash import html, dcc, Input, Output, State, callback, no_update
 import dash_bootstrap_components as dbc
-from db_manager import run_query, execute_query
+from db_manager import run_query, execute_query, SCENE_CACHE_TTL
 
 dash.register_page(__name__, path='/settings')
 
@@ -129,7 +129,7 @@ def load_base_options(sess):
               AND name_kor != '' 
             ORDER BY name_kor ASC
         """
-        df = run_query(sql)
+        df = run_query(sql, cache_ttl=SCENE_CACHE_TTL)
         
         if df.empty: return []
         
@@ -153,7 +153,7 @@ def load_settings(base, sess):
     df = run_query(sql, {'u': uid, 'b': base})
     
     # 기지 이름 조회
-    info = run_query(f"SELECT name_kor FROM tb_scene WHERE scene_name = '{base}'")
+    info = run_query("SELECT name_kor FROM tb_scene WHERE scene_name = :b", {'b': base}, cache_ttl=SCENE_CACHE_TTL)
     k_name = info.iloc[0]['name_kor'] if not info.empty else base
     
     msg = html.Div([html.Strong(f"[{k_name}]", className="text-primary"), " 설정을 불러왔습니다."])
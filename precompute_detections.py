@@ -0,0 +1,111 @@
+"""
+[오프라인 탐지 사전 계산]
+tb_scenario(SCENARIO/HISTORY)의 모든 img_path에 대해 타일 탐지를 미리 돌려
+영구 탐지 캐시(cache/detections.sqlite)에 저장합니다. 탐지 박스의 분류 결과도 함께 저장합니다.
+IMAGE_PYRAMID=1이면 타일 피라미드도 미리 만들어 둡니다 (화면 요청에서는 만들지 않음).
+분석 화면(run_dual_analysis)은 이 저장소를 먼저 조회하므로 추론 대신 조회만 하게 됩니다.
+
+사용 예:
+    python precompute_detections.py                # 증분: 아직 처리되지 않은 이미지만
+    python precompute_detections.py --workers 4    # 4개 프로세스 병렬
+    python precompute_detections.py --all          # 전체 재검증 (내용이 같으면 캐시 재사용)
+    python precompute_detections.py --prune-days 90      # 90일보다 오래된 결과 정리만 하고 종료
+    python precompute_detections.py --max-rows 200000    # 최신 20만 건만 남기고 정리만 하고 종료
+
+체크포인트: 이미지 1장이 끝날 때마다 결과와 경로 색인이 바로 커밋됩니다.
+중단된 작업은 같은 명령을 다시 실행하면 남은 이미지부터 이어서 처리합니다.
+캐시는 자동으로 줄지 않으므로 cron 등으로 --prune-days / --max-rows 정리를 주기적으로 실행하세요.
+(정리된 이미지는 다음 조회 때 다시 추론하거나, 이 스크립트를 다시 돌리면 채워집니다.)
+"""
+import argparse
+import time
+from multiprocessing import Pool
+from db_manager import run_query
+
+def list_image_paths(data_types=('SCENARIO', 'HISTORY')):
+    type_params = {f't{i}': t for i, t in enumerate(data_types)}
+    type_binds = ", ".join(f":{k}" for k in type_params)
+    query = f"""
+    SELECT DISTINCT img_path FROM tb_scenario
+    WHERE data_type IN ({type_binds})
+      AND img_path IS NOT NULL AND img_path <> ''
+    """
+    df = run_query(query, params=type_params)
+    if df.empty: return []
+    paths = [str(p).strip().strip("'").strip('"') for p in df['img_path']]
+    return sorted({p for p in paths if p})
+
+def _process_one(path):
+    # 워커 프로세스마다 ai_core(모델 포함)를 한 번씩 로드합니다.
+    from ai_core import build_image_pyramid, cached_detection, classify_detections
+    t0 = time.perf_counter()
+    try:
+        build_image_pyramid(path)  # 탐지보다 먼저 -> 탐지도 피라미드 타일로 읽음
+        dets, W, H = cached_detection(path)
+        classify_detections(path, dets)  # 박스 분류도 함께 저장 (클릭 시 조회만)
+        return path, bool(W and H), len(dets), time.perf_counter() - t0, None
+    except Exception as e:
+        return path, False, 0, time.perf_counter() - t0, str(e)
+
+def precompute(workers=1, process_all=False, limit=None, data_types=('SCENARIO', 'HISTORY')):
+    import ai_core
+    if not ai_core.get_det_model():
+        print("❌ 탐지 모델(det_best.pt)을 찾을 수 없습니다.")
+        return
+
+    paths = list_image_paths(data_types)
+    print(f"📂 대상 이미지: {len(paths)}장")
+
+    if not process_all:
+        done = ai_core.DETECTION_CACHE.indexed_paths(ai_core.detection_config_key())
+        paths = [p for p in paths if p not in done]
+        print(f"⏭️ 이미 처리된 이미지 제외 -> 남은 이미지: {len(paths)}장")
+    if limit: paths = paths[:limit]
+    if not paths:
+        print("✨ 처리할 이미지가 없습니다.")
+        return
+
+    ok_cnt, fail_cnt = 0, 0
+    started = time.perf_counter()
+
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            results = pool.imap_unordered(_process_one, paths)
+            for idx, res in enumerate(results):
+                ok_cnt, fail_cnt = _report(idx, len(paths), res, ok_cnt, fail_cnt)
+    else:
+        for idx, path in enumerate(paths):
+            ok_cnt, fail_cnt = _report(idx, len(paths), _process_one(path), ok_cnt, fail_cnt)
+
+    print(f"\n🎉 완료: 성공 {ok_cnt} / 실패 {fail_cnt} ({time.perf_counter() - started:.1f}s)")
+
+def _report(idx, total, res, ok_cnt, fail_cnt):
+    path, ok, n_dets, elapsed, err = res
+    if ok:
+        print(f"[{idx+1}/{total}] ✅ {path} -> {n_dets}건 ({elapsed:.1f}s)", flush=True)
+        return ok_cnt + 1, fail_cnt
+    print(f"[{idx+1}/{total}] ❌ {path} {err or '(이미지 로드 실패)'}", flush=True)
+    return ok_cnt, fail_cnt + 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="tb_scenario 이미지 탐지 결과 사전 계산")
+    parser.add_argument('--workers', type=int, default=1, help="병렬 워커 프로세스 수")
+    parser.add_argument('--all', action='store_true', help="이미 처리된 이미지도 다시 검증")
+    parser.add_argument('--limit', type=int, default=None, help="최대 처리 이미지 수")
+    parser.add_argument('--types', default='SCENARIO,HISTORY', help="대상 data_type (쉼표 구분)")
+    parser.add_argument('--prune-days', type=int, default=None, help="이보다 오래된 탐지/분류 결과 삭제 후 종료")
+    parser.add_argument('--max-rows', type=int, default=None, help="최신 N건의 탐지 결과만 남기고 삭제 후 종료")
+    args = parser.parse_args()
+
+    if args.prune_days is not None or args.max_rows is not None:
+        from utils.detection_cache import DETECTION_CACHE
+        removed = DETECTION_CACHE.prune(max_age_days=args.prune_days, max_rows=args.max_rows)
+        print(f"🧹 탐지 결과 {removed}건 정리")
+        raise SystemExit(0)
+
+    precompute(
+        workers=args.workers,
+        process_all=args.all,
+        limit=args.limit,
+        data_types=tuple(t.strip().upper() for t in args.types.split(',') if t.strip())
+    )
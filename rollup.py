@@ -0,0 +1,47 @@
+"""
+[시나리오 집계 테이블 갱신]
+tb_scenario 원본으로 tb_rollup_slot / tb_rollup_day / tb_rollup_month 를 채웁니다. (utils/rollups.py)
+웹은 ROLLUP_REFRESH_SEC마다 새 행을 자동 반영하므로, 평소에는 처음 한 번 --rebuild 만 하면 됩니다.
+
+사용 예:
+    python migrate.py                    # 집계 테이블 생성 (4번 단계)
+    python rollup.py --rebuild           # 전체 다시 계산
+    python rollup.py                     # 증분: 마지막 반영 이후 새 행만
+    python rollup.py --from 2026-01      # 2026년 1월 이후 버킷만 다시 계산 (원본 수정/늦게 들어온 행 반영)
+    python rollup.py --url sqlite:///cache/standin.sqlite --rebuild
+"""
+import sys
+import time
+import argparse
+from sqlalchemy import create_engine
+from utils.rollups import refresh, rebuild
+
+def main():
+    parser = argparse.ArgumentParser(description="시나리오 집계(rollup) 테이블 갱신")
+    parser.add_argument('--url', default=None, help="대상 DB URL (기본: db_manager의 운영 DB)")
+    parser.add_argument('--rebuild', action='store_true', help="집계를 모두 지우고 다시 계산")
+    parser.add_argument('--from', dest='from_month', default=None, metavar='YYYY-MM', help="이 달 이후만 다시 계산")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from db_manager import ENGINE as engine
+
+    t0 = time.perf_counter()
+    try:
+        if args.rebuild or args.from_month:
+            print(f"🔄 집계 다시 계산 ({'전체' if args.rebuild else args.from_month + ' 이후'})")
+            n = rebuild(engine, from_month=None if args.rebuild else args.from_month)
+            # 다시 계산하는 동안 들어온 행
+            n += refresh(engine, log=print)
+        else:
+            print("➕ 증분 갱신")
+            n = refresh(engine, log=print)
+    except Exception as e:
+        print(f"❌ 집계 갱신 실패: {e}")
+        sys.exit(1)
+    print(f"✅ {n}행 반영 ({time.perf_counter() - t0:.1f}s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import os
+import glob
+import json
+import time
+import queue
+import atexit
+import threading
+
+# ---------------------------------------------------------
+# [비동기 감사 로그 기록기]
+# log_action이 화면 콜백 안에서 DB 왕복(연결 + INSERT + COMMIT)을 하지 않도록
+# 이벤트를 메모리 큐에 넣고 백그라운드 스레드가 여러 행을 한 번에 INSERT 합니다.
+# - batch_size개가 모이거나 interval_ms가 지나면 flush
+# - DB에 못 쓰면 spill 파일(JSON Lines)에 보관했다가 다음 flush 성공 때 다시 적재
+# - 프로세스 종료(atexit) 시 남은 이벤트를 마저 기록
+# - 스레드는 첫 이벤트 때 시작, fork된 자식(gunicorn preload)에서는 새로 시작
+# ---------------------------------------------------------
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # 권한 없음 = 다른 사용자의 살아 있는 프로세스
+    return True
+
+class AuditWriter:
+    def __init__(self, flush_fn, spill_path, batch_size=50, interval_ms=1000, max_queue=10000):
+        """flush_fn(rows): rows는 이벤트 dict 목록. 실패하면 예외를 던져야 합니다."""
+        self.flush_fn = flush_fn
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000.0
+        self.max_queue = max_queue
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self.written = 0
+        self.spilled = 0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid(): return
+        with self._lock:
+            if self._pid == os.getpid(): return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+
+    def submit(self, event):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # DB가 오래 밀려 큐가 찼으면 콜백을 막지 않고 바로 파일로
+            self._spill([event])
+
+    def _take_batch(self, timeout):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while not self._stop.is_set():
+            wait = self.interval if deadline is None else max(0.0, deadline - time.monotonic())
+            got = self._take_batch(wait)
+            if got and deadline is None: deadline = time.monotonic() + self.interval
+            pending.extend(got)
+            if pending and (len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                self._safe_flush(pending)
+                pending, deadline = [], None
+        # 종료 신호: 남은 것 모두 기록
+        while True:
+            got = self._take_batch(0)
+            if not got: break
+            pending.extend(got)
+        if pending: self._safe_flush(pending)
+
+    def _safe_flush(self, rows):
+        # 예상 못 한 오류로 기록 스레드가 죽으면 이후 이벤트가 큐에만 쌓이므로, 보관 후 계속 진행
+        try:
+            self._flush(rows)
+        except Exception as e:
+            print(f"[Audit Log Error] 기록 스레드 오류: {e} -> {len(rows)}건 임시 파일에 보관")
+            self._spill(rows)
+
+    def _flush(self, rows):
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            try:
+                self.flush_fn(chunk)
+                self.written += len(chunk)
+            except Exception as e:
+                # 실패한 묶음부터 뒤의 묶음까지 모두 보관 (다음 flush 때 재적재)
+                print(f"[Audit Log Error] {e} -> {len(rows) - i}건 임시 파일에 보관")
+                self._spill(rows[i:])
+                return
+        self._replay_spill()
+
+    def _spill(self, rows):
+        """rows를 spill 파일에 추가. 반환: 성공 여부"""
+        if not rows: return True
+        try:
+            with self._spill_lock:
+                os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    for r in rows:
+                        f.write(json.dumps(r, ensure_ascii=False, default=str) + '\n')
+            self.spilled += len(rows)
+            return True
+        except OSError as e:
+            print(f"[Audit Log Error] 임시 파일 기록 실패, {len(rows)}건: {e}")
+            return False
+
+    def _claim_replay_files(self):
+        """spill 파일을 이 프로세스 전용 이름으로 옮기고, 죽은 프로세스가 남긴 재적재 파일도 함께 가져옴"""
+        mine = self.spill_path + f'.{os.getpid()}.replay'
+        with self._spill_lock:
+            if os.path.exists(self.spill_path) and not os.path.exists(mine):
+                try:
+                    os.replace(self.spill_path, mine)
+                except OSError:
+                    pass
+        files = []
+        for path in glob.glob(glob.escape(self.spill_path) + '.*.replay'):
+            try:
+                pid = int(path.rsplit('.', 2)[-2])
+            except ValueError:
+                continue
+            if pid == os.getpid() or not _pid_alive(pid):
+                files.append(path)
+        return files
+
+    def _replay_spill(self):
+        """DB가 살아났으면 보관해 둔 이벤트 적재 (실패한 나머지는 다시 보관)"""
+        for replay_path in self._claim_replay_files():
+            self._replay_file(replay_path)
+
+    def _replay_file(self, replay_path):
+        rows, bad = [], 0
+        try:
+            with open(replay_path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip(): continue
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        bad += 1  # 기록 중 비정상 종료로 잘린 줄
+        except OSError as e:
+            print(f"[Audit Log Error] 보관분 읽기 실패: {e}")
+            return
+        if bad: print(f"[Audit Log Warning] 보관분 {replay_path}에서 읽을 수 없는 줄 {bad}개 건너뜀")
+
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            try:
+                self.flush_fn(chunk)
+                self.written += len(chunk)
+            except Exception as e:
+                print(f"[Audit Log Error] 보관분 재적재 실패: {e}")
+                # 나머지를 다시 보관한 뒤에만 원본 삭제 (보관도 실패하면 파일을 남겨 다음에 재시도)
+                if self._spill(rows[i:]): os.remove(replay_path)
+                return
+        # 모두 적재한 뒤에 삭제
+        os.remove(replay_path)
+        print(f"📝 감사 로그 보관분 {len(rows)}건 적재")
+
+    def close(self, timeout=10):
+        """남은 이벤트를 기록하고 스레드 종료 (atexit에서 호출)"""
+        if self._pid != os.getpid() or self._thread is None: return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {'queued': self._queue.qsize() if self._queue else 0, 'written': self.written, 'spilled': self.spilled}
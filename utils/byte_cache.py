@@ -0,0 +1,91 @@
+import time
+import threading
+from collections import OrderedDict
+
+# ---------------------------------------------------------
+# [바이트 예산 LRU 캐시]
+# 항목 개수가 아니라 항목 크기(바이트) 합계로 용량을 제한합니다.
+# ---------------------------------------------------------
+
+def image_nbytes(im):
+    """디코딩된 PIL 이미지가 차지하는 대략적인 메모리 (가로 x 세로 x 채널)"""
+    w, h = im.size
+    return w * h * max(1, len(im.getbands()))
+
+class ByteBudgetCache:
+    def __init__(self, max_bytes, name='cache'):
+        self.max_bytes = int(max_bytes)
+        self.name = name
+        self._items = OrderedDict()  # key -> (value, nbytes, 저장 시각)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def get_fresh(self, key, ttl, default=None):
+        """저장된 지 ttl초 이내인 항목만 반환. 오래된 항목은 지우고 miss로 집계"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and time.time() - item[2] >= ttl:
+                del self._items[key]
+                self._bytes -= item[1]
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, nbytes):
+        """nbytes 크기로 저장. 예산보다 큰 항목은 저장하지 않습니다."""
+        nbytes = int(nbytes)
+        if nbytes > self.max_bytes: return False
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None: self._bytes -= old[1]
+            self._items[key] = (value, nbytes, time.time())
+            self._bytes += nbytes
+            # 가장 오래 안 쓴 항목부터 예산 안으로 들어올 때까지 제거
+            while self._bytes > self.max_bytes and self._items:
+                _, (_, freed, _) = self._items.popitem(last=False)
+                self._bytes -= freed
+                self.evictions += 1
+        return True
+
+    def pop(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None: return None
+            self._bytes -= item[1]
+            return item[0]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._items),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
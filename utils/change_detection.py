@@ -0,0 +1,60 @@
+import os
+import numpy as np
+from PIL import ImageOps
+
+# ---------------------------------------------------------
+# [T1 -> T2 변화 영역 검출]
+# 축소한 두 영상을 위상상관(phase correlation)으로 정합한 뒤 차영상 마스크를 만들고,
+# 변화가 있는 타일만 T2에서 다시 탐지합니다. CHANGE_DETECTION=1 로 켭니다.
+# ---------------------------------------------------------
+CHANGE_DETECTION = os.getenv("CHANGE_DETECTION", "0") == "1"
+CHANGE_SCALE = 8                                              # 1/8 축소 영상에서 비교
+DIFF_THRESH = int(os.getenv("CHANGE_DIFF_THRESH", 30))        # 밝기 차 임계값 (0~255)
+MIN_TILE_CHANGE = float(os.getenv("CHANGE_MIN_TILE", 0.002))  # 타일 내 변화 픽셀 비율 하한
+MAX_CHANGED_RATIO = 0.6                                       # 이보다 많이 바뀌면 전체 재탐지가 낫다
+MIN_REG_RESPONSE = 0.05                                       # 정합 신뢰도가 이보다 낮으면 포기
+
+def change_params():
+    """탐지 캐시 키에 들어갈 변화 검출 설정"""
+    return {'scale': CHANGE_SCALE, 'diff': DIFF_THRESH, 'min_tile': MIN_TILE_CHANGE}
+
+def overview_gray(im, scale=CHANGE_SCALE):
+    """PIL 이미지 -> 축소 + 자동대비 회색조 배열 (조명 차이 완화)"""
+    small = im.convert('L').reduce(scale) if scale > 1 else im.convert('L')
+    return np.asarray(ImageOps.autocontrast(small, cutoff=1))
+
+class ChangeMap:
+    def __init__(self, mask, shift, scale, response):
+        self.mask = mask            # 축소 좌표계의 변화 마스크 (bool)
+        self.shift = shift          # T1 -> T2 평행이동 (원본 픽셀, dx, dy)
+        self.scale = scale
+        self.response = response    # 위상상관 신뢰도
+
+    def tile_changed(self, x, y, tile_size, min_frac=None):
+        min_frac = MIN_TILE_CHANGE if min_frac is None else min_frac
+        s = self.scale
+        region = self.mask[y // s:-(-(y + tile_size) // s), x // s:-(-(x + tile_size) // s)]
+        return region.size > 0 and region.mean() >= min_frac
+
+def compute_change_map(gray1, gray2, scale=CHANGE_SCALE):
+    """
+    gray1, gray2: 같은 축척의 축소 회색조 배열. 크기가 다르면 None.
+    반환: ChangeMap 또는 정합 실패 시 None
+    """
+    if gray1.shape != gray2.shape: return None
+    import cv2  # 무거운 import는 실제 사용 시점으로 미룸 (워커 기동 시간)
+
+    a = gray1.astype(np.float32)
+    b = gray2.astype(np.float32)
+    window = cv2.createHanningWindow((a.shape[1], a.shape[0]), cv2.CV_32F)
+    (dx, dy), response = cv2.phaseCorrelate(a, b, window)
+    if response < MIN_REG_RESPONSE: return None
+
+    # T1을 T2 좌표계로 이동시킨 뒤 차영상
+    M = np.float32([[1, 0, dx], [0, 1, dy]])
+    a_aligned = cv2.warpAffine(gray1, M, (a.shape[1], a.shape[0]), borderMode=cv2.BORDER_REPLICATE)
+    diff = cv2.absdiff(cv2.GaussianBlur(a_aligned, (5, 5), 0), cv2.GaussianBlur(gray2, (5, 5), 0))
+    mask = diff > DIFF_THRESH
+    # 물체 가장자리가 타일 경계에 걸쳐도 놓치지 않도록 팽창
+    mask = cv2.dilate(mask.astype(np.uint8), np.ones((5, 5), np.uint8)) > 0
+    return ChangeMap(mask, (dx * scale, dy * scale), scale, response)
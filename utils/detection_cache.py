@@ -0,0 +1,267 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from db_manager import BASE_DIR
+from utils.byte_cache import ByteBudgetCache
+
+# ---------------------------------------------------------
+# [영구 탐지 캐시]
+# 키 = 이미지 내용 해시 + 모델 가중치 해시 + 타일링 파라미터
+# gunicorn 워커/재시작 간에 같은 SQLite 파일을 공유합니다.
+# 키가 내용 해시라 값이 바뀌지 않으므로, 최근 조회한 결과는 프로세스 메모리(LRU)에도 둡니다.
+# 자동 삭제는 없음: python precompute_detections.py --prune-days N / --max-rows N 으로 정리
+# ---------------------------------------------------------
+CACHE_DIR = os.getenv("AI_CACHE_DIR", os.path.join(BASE_DIR, 'cache'))
+DETECTION_DB_PATH = os.path.join(CACHE_DIR, 'detections.sqlite')
+DET_MEMO_MB = int(os.getenv("DET_MEMO_MB", 32))
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+def file_digest(path, chunk_size=1 << 20):
+    """파일 내용 sha256. (경로, 크기, 수정시각)이 같으면 다시 읽지 않습니다."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo: return _digest_memo[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+def bytes_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def make_key(image_digest, model_digest, **params):
+    """이미지/모델 해시와 파라미터(타일 크기, stride, conf 등)를 하나의 캐시 키로 묶습니다."""
+    payload = json.dumps({'image': image_digest, 'model': model_digest, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class DetectionCache:
+    def __init__(self, db_path=DETECTION_DB_PATH):
+        self.db_path = db_path
+        self._ready = False
+        self._lock = threading.Lock()
+        # cache_key -> (dets, W, H). 반환값은 여러 호출자가 공유하므로 읽기 전용으로 다룹니다.
+        self._memo = ByteBudgetCache(DET_MEMO_MB * 1024 * 1024, name='detections')
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            # WAL: 여러 워커가 동시에 읽는 동안에도 쓰기가 막히지 않음
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS detections (
+                    cache_key TEXT PRIMARY KEY,
+                    width INTEGER,
+                    height INTEGER,
+                    dets TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # 경로 -> 캐시 키 색인: 사전 계산된 이미지는 해시 계산 없이 바로 조회
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS path_index (
+                    img_path TEXT,
+                    config_key TEXT,
+                    cache_key TEXT,
+                    source_stamp TEXT,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (img_path, config_key)
+                )
+            """)
+            # 박스 단위 분류 결과 (이미지 해시 + 분류 모델 해시 + 정수 좌표 박스)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS classifications (
+                    image_key TEXT,
+                    model_key TEXT,
+                    box TEXT,
+                    topk TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (image_key, model_key, box)
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._init_db()
+                    self._ready = True
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        """캐시 적중 시 (dets, W, H), 없으면 None"""
+        hit = self._memo.get(key)
+        if hit is not None: return hit
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT dets, width, height FROM detections WHERE cache_key = ?", (key,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+            return None
+        if not row: return None
+        hit = (json.loads(row[0]), row[1], row[2])
+        self._memo.put(key, hit, len(row[0]) * 2)  # JSON 길이로 대략적인 메모리 크기 추정
+        return hit
+
+    def has(self, key):
+        """결과를 읽지 않고 존재 여부만 확인 (비교 가능 여부 판단용)"""
+        if self._memo.get(key) is not None: return True
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT 1 FROM detections WHERE cache_key = ?", (key,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+            return False
+        return row is not None
+
+    def put(self, key, dets, W, H):
+        # numpy 스칼라도 JSON으로 저장되도록 기본 타입으로 변환
+        rows = [[float(x1), float(y1), float(x2), float(y2), str(label), float(conf), int(i), status]
+                for x1, y1, x2, y2, label, conf, i, status in dets]
+        self._memo.pop(key)
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO detections (cache_key, width, height, dets) VALUES (?, ?, ?, ?)",
+                    (key, int(W), int(H), json.dumps(rows))
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+
+    def lookup_path(self, img_path, config_key, source_stamp=None):
+        """img_path가 현재 설정(config_key)으로 이미 처리되었다면 그 캐시 키, 아니면 None"""
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT cache_key, source_stamp FROM path_index WHERE img_path = ? AND config_key = ?",
+                    (img_path, config_key)
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+            return None
+        if not row: return None
+        # 로컬 파일이 바뀌었으면(크기/수정시각) 색인을 믿지 않음
+        if source_stamp is not None and row[1] != source_stamp: return None
+        return row[0]
+
+    def record_path(self, img_path, config_key, cache_key, source_stamp=None):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO path_index (img_path, config_key, cache_key, source_stamp) VALUES (?, ?, ?, ?)",
+                    (img_path, config_key, cache_key, source_stamp)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+
+    def indexed_paths(self, config_key):
+        """현재 설정으로 이미 처리된 img_path 집합 (증분 사전 계산용)"""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute("SELECT img_path FROM path_index WHERE config_key = ?", (config_key,)).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+            return set()
+        return {r[0] for r in rows}
+
+    def get_classifications(self, image_key, model_key):
+        """{box_key: [[라벨, 확률], ...]} (확률 내림차순 top-k)"""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT box, topk FROM classifications WHERE image_key = ? AND model_key = ?",
+                    (image_key, model_key)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+            return {}
+        return {box: json.loads(topk) for box, topk in rows}
+
+    def put_classifications(self, image_key, model_key, results):
+        """results: {box_key: [[라벨, 확률], ...]}"""
+        if not results: return
+        try:
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO classifications (image_key, model_key, box, topk) VALUES (?, ?, ?, ?)",
+                    [(image_key, model_key, box, json.dumps(topk)) for box, topk in results.items()]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+
+    def prune(self, max_age_days=None, max_rows=None):
+        """
+        오래된 탐지/분류 결과 삭제 (다시 필요하면 추론으로 재계산). 반환: 삭제한 탐지 행 수
+        max_age_days: created_at 기준 이보다 오래된 결과 삭제
+        max_rows: 최신 max_rows개만 남김
+        결과가 사라진 경로 색인은 함께 삭제합니다.
+        """
+        try:
+            conn = self._connect()
+            try:
+                removed = 0
+                if max_age_days is not None:
+                    cutoff = f"-{int(max_age_days)} days"
+                    removed += conn.execute("DELETE FROM detections WHERE created_at < datetime('now', ?)", (cutoff,)).rowcount
+                    conn.execute("DELETE FROM classifications WHERE created_at < datetime('now', ?)", (cutoff,))
+                if max_rows is not None:
+                    removed += conn.execute(
+                        "DELETE FROM detections WHERE cache_key NOT IN "
+                        "(SELECT cache_key FROM detections ORDER BY created_at DESC LIMIT ?)", (int(max_rows),)
+                    ).rowcount
+                conn.execute("DELETE FROM path_index WHERE cache_key NOT IN (SELECT cache_key FROM detections)")
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Detection Cache Error] {e}")
+            return 0
+        self._memo.clear()
+        return removed
+
+def box_key(box):
+    """분류 결과 색인용 박스 키: crop과 같은 정수 좌표 'x1,y1,x2,y2'"""
+    return ",".join(str(int(v)) for v in box[:4])
+
+DETECTION_CACHE = DetectionCache()
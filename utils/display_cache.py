@@ -0,0 +1,70 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+from utils.detection_cache import CACHE_DIR
+
+# ---------------------------------------------------------
+# [표시용 이미지 디스크 캐시]
+# 분석 화면 배경 이미지(축소 JPEG)를 (이미지 해시, 크기, 화질)별로 한 번만 인코딩해
+# cache/display/<token>.jpg 로 저장하고 /display/<token>.jpg 로 서빙합니다.
+# figure에는 base64 대신 URL만 들어가므로 콜백 응답이 수 KB로 줄어듭니다.
+# ---------------------------------------------------------
+DISPLAY_DIR = os.path.join(CACHE_DIR, 'display')
+DISPLAY_URL_PREFIX = '/display'
+
+_TOKEN_RE = re.compile(r'^[0-9a-f]{16,64}$')
+
+def display_token(image_digest, max_side, quality):
+    payload = json.dumps({'image': image_digest, 'max_side': max_side, 'quality': quality}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+def display_url(token):
+    return f"{DISPLAY_URL_PREFIX}/{token}.jpg"
+
+def _paths(token):
+    return os.path.join(DISPLAY_DIR, f"{token}.jpg"), os.path.join(DISPLAY_DIR, f"{token}.json")
+
+def lookup_display(token):
+    """이미 인코딩된 표시 이미지가 있으면 원본 크기 (orig_w, orig_h), 없으면 None"""
+    jpg_path, meta_path = _paths(token)
+    if not (os.path.exists(jpg_path) and os.path.exists(meta_path)): return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        return meta['width'], meta['height']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def store_display(token, im_display, orig_w, orig_h, quality):
+    """축소 이미지를 JPEG로 저장합니다. 메타(json)를 마지막에 써서 완성 표시로 사용합니다."""
+    os.makedirs(DISPLAY_DIR, exist_ok=True)
+    jpg_path, meta_path = _paths(token)
+    # 다른 워커/같은 프로세스의 다른 스레드(프리페치)와 동시에 써도 깨진 파일이 보이지 않도록
+    # 호출마다 고유한 임시 파일 -> rename
+    fd, tmp_jpg = tempfile.mkstemp(dir=DISPLAY_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            im_display.save(f, format="JPEG", quality=quality)
+        os.replace(tmp_jpg, jpg_path)
+    finally:
+        if os.path.exists(tmp_jpg): os.unlink(tmp_jpg)
+    fd, tmp_meta = tempfile.mkstemp(dir=DISPLAY_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'width': orig_w, 'height': orig_h}, f)
+    os.replace(tmp_meta, meta_path)
+
+def register_display_routes(server):
+    """app.server(Flask)에 표시 이미지 라우트 등록: /display/<token>.jpg"""
+    from flask import abort, send_file
+
+    @server.route(f'{DISPLAY_URL_PREFIX}/<token>.jpg')
+    def serve_display_image(token):
+        if not _TOKEN_RE.match(token): abort(404)
+        jpg_path, _ = _paths(token)
+        if not os.path.exists(jpg_path): abort(404)
+        resp = send_file(jpg_path, mimetype='image/jpeg', conditional=True)
+        # 토큰에 이미지 내용 해시가 들어가 있어 변하지 않음 -> 브라우저 장기 캐시
+        resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return resp
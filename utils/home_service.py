@@ -1,6 +1,6 @@
 import pandas as pd
-from datetime import datetime
-from db_manager import run_query
+from datetime import datetime, timedelta
+from db_manager import run_query, fetch_all, SCENARIO_CACHE_TTL
 
 # ---------------------------------------------------------
 # [설정] 시스템이 인식하는 '오늘' (매일매일 여기가 '오늘'이 됩니다)
@@ -18,7 +18,9 @@ def fetch_daily_data(target_date_str):
     else:
         # 특정 과거 날짜의 이력 조회
         try:
-            sql = f"""
+            # DATE(timestamp) = 날짜 대신 하루 범위 조건 -> (data_type, timestamp) 인덱스 사용
+            day_start = datetime.strptime(target_date_str, '%Y-%m-%d')
+            sql = """
                 SELECT 
                     s.*, 
                     c.scene_name as base_name, 
@@ -28,12 +30,9 @@ def fetch_daily_data(target_date_str):
                 FROM TB_SCENARIO s
                 JOIN TB_SCENE c ON s.scene_id = c.scene_id
                 WHERE s.data_type = 'HISTORY'
-                  AND DATE(s.timestamp) = '{target_date_str}'
+                  AND s.timestamp >= :d0 AND s.timestamp < :d1
             """
-            df = run_query(sql)
-            if not df.empty:
-                return df.to_dict('records')
-            return []
+            return fetch_all(sql, {'d0': day_start, 'd1': day_start + timedelta(days=1)}, as_dict=True)
         except Exception as e:
             print(f"[Service Error] Past Date Fetch: {e}")
             return []
@@ -61,10 +60,7 @@ def fetch_live_scenarios():
             WHERE s.data_type = 'SCENARIO'
             ORDER BY s.timestamp DESC
         """
-        df = run_query(sql)
-        if not df.empty:
-            return df.to_dict('records')
-        return []
+        return fetch_all(sql, as_dict=True, cache_ttl=SCENARIO_CACHE_TTL)
     except Exception as e:
         print(f"[Service Error] Scenario Fetch: {e}")
         return []
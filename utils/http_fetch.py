@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.detection_cache import CACHE_DIR
+
+# SSL 경고 무시 (S3 프록시 인증서 문제로 verify=False 사용)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# ---------------------------------------------------------
+# [원격 이미지 페치 계층]
+# - 프로세스 공용 requests.Session (커넥션 풀 재사용)
+# - URL별 로컬 디스크 미러 + ETag/Last-Modified 재검증 (변경 없으면 304, 본문 재다운로드 없음)
+# - 큰 본문은 메모리에 올리지 않고 디스크로 스트리밍
+# ---------------------------------------------------------
+MIRROR_DIR = os.path.join(CACHE_DIR, 'http')
+# 이 시간(초) 안에 재검증한 미러는 서버에 다시 묻지 않고 그대로 사용
+MIRROR_MAX_AGE = int(os.getenv("HTTP_MIRROR_MAX_AGE", 300))
+CHUNK_SIZE = 1 << 20
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+FETCH_STATS = {'requests': 0, 'downloads': 0, 'not_modified': 0, 'fresh_hits': 0, 'bytes': 0, 'errors': 0}
+
+def _count(name, n=1):
+    with _stats_lock:
+        FETCH_STATS[name] += n
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry)
+                s.mount('http://', adapter)
+                s.mount('https://', adapter)
+                s.verify = False
+                _session = s
+    return _session
+
+def mirror_paths(url):
+    key = hashlib.sha256(url.encode()).hexdigest()[:40]
+    return os.path.join(MIRROR_DIR, key), os.path.join(MIRROR_DIR, key + '.json')
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_meta(meta_path, meta):
+    # 다른 워커가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓰고 교체
+    fd, tmp = tempfile.mkstemp(dir=MIRROR_DIR, suffix='.meta')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+def fetch_to_mirror(url, timeout=10):
+    """
+    URL 내용을 로컬 미러 파일로 확보하고 그 경로를 반환합니다. 실패 시 None.
+    미러가 있으면 조건부 요청(If-None-Match / If-Modified-Since)으로 재검증만 합니다.
+    """
+    body_path, meta_path = mirror_paths(url)
+    meta = _read_meta(meta_path)
+    has_body = meta is not None and os.path.exists(body_path)
+
+    if has_body and time.time() - meta.get('checked_at', 0) < MIRROR_MAX_AGE:
+        _count('fresh_hits')
+        return body_path
+
+    headers = {}
+    if has_body:
+        if meta.get('etag'): headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    try:
+        _count('requests')
+        with get_session().get(url, headers=headers, stream=True, timeout=timeout) as resp:
+            if resp.status_code == 304 and has_body:
+                _count('not_modified')
+                meta['checked_at'] = time.time()
+                _write_meta(meta_path, meta)
+                return body_path
+
+            if resp.status_code != 200:
+                print(f"[HTTP Fetch] {resp.status_code} {url}")
+                return body_path if has_body else None
+
+            fd, tmp = tempfile.mkstemp(dir=MIRROR_DIR, suffix='.part')
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+                os.replace(tmp, body_path)
+            finally:
+                if os.path.exists(tmp): os.unlink(tmp)
+
+            _count('downloads'); _count('bytes', size)
+            _write_meta(meta_path, {
+                'url': url,
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+                'size': size,
+                'checked_at': time.time(),
+            })
+            return body_path
+    except requests.RequestException as e:
+        _count('errors')
+        print(f"[HTTP Fetch Error] {e}")
+        # 네트워크 장애 시 이전 미러라도 사용
+        return body_path if has_body else None
+
+def mirror_stamp(url, timeout=10):
+    """
+    원격 이미지의 변경 확인용 문자열 (ETag > Last-Modified > 미러 파일 크기:수정시각).
+    fetch_to_mirror로 재검증한 뒤의 값이므로 같은 URL의 내용이 바뀌면 값도 바뀝니다. 확보 실패 시 None
+    """
+    body_path = fetch_to_mirror(url, timeout=timeout)
+    if not body_path: return None
+    meta = _read_meta(mirror_paths(url)[1]) or {}
+    if meta.get('etag'): return f"etag:{meta['etag']}"
+    if meta.get('last_modified'): return f"lm:{meta['last_modified']}"
+    try:
+        st = os.stat(body_path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def get_fetch_stats():
+    with _stats_lock:
+        return dict(FETCH_STATS)
@@ -0,0 +1,248 @@
+import os
+import io
+import re
+import json
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from utils.detection_cache import CACHE_DIR
+
+# ---------------------------------------------------------
+# [타일 이미지 피라미드]
+# 원본을 한 번만 디코딩해 레벨별(1/2씩 축소) 타일 배열(.npy)로 저장합니다.
+# 각 레벨은 (tiles_y, tiles_x, T, T, 3) uint8 배열이라 memmap으로 필요한 타일만 읽습니다.
+# ---------------------------------------------------------
+PYRAMID_DIR = os.path.join(CACHE_DIR, 'pyramids')
+PYRAMID_TILE = 256
+# 원본 크기 그대로 저장하므로 디스크를 많이 씁니다 -> 환경변수로 켜는 방식
+PYRAMID_ENABLED = os.getenv("IMAGE_PYRAMID", "0") == "1"
+# 프로세스가 동시에 열어 두는 피라미드 수 (레벨마다 memmap 1개 = 파일 핸들 + 주소 공간)
+PYRAMID_OPEN_MAX = max(1, int(os.getenv("PYRAMID_OPEN_MAX", 32)))
+
+_ID_RE = re.compile(r'^[0-9a-f]{16,64}$')
+_open_lock = threading.Lock()
+_open_pyramids = OrderedDict()  # pyramid_id -> ImagePyramid (LRU 순서)
+
+def autocontrast_lut(histogram, cutoff=1):
+    """
+    ImageOps.autocontrast(cutoff=...)와 같은 방식으로 채널별 LUT를 만듭니다.
+    원본 전체 히스토그램을 미리 저장해 두면 타일 단위로 읽어도 결과가 동일합니다.
+    """
+    lut = []
+    for layer in range(0, len(histogram), 256):
+        h = list(histogram[layer:layer + 256])
+        if cutoff:
+            n = sum(h)
+            # 어두운 쪽 cutoff% 제거
+            cut = int(n * cutoff // 100)
+            for lo in range(256):
+                if cut > h[lo]:
+                    cut -= h[lo]; h[lo] = 0
+                else:
+                    h[lo] -= cut; cut = 0
+                if cut <= 0: break
+            # 밝은 쪽 cutoff% 제거
+            cut = int(n * cutoff // 100)
+            for hi in range(255, -1, -1):
+                if cut > h[hi]:
+                    cut -= h[hi]; h[hi] = 0
+                else:
+                    h[hi] -= cut; cut = 0
+                if cut <= 0: break
+        for lo in range(256):
+            if h[lo]: break
+        for hi in range(255, -1, -1):
+            if h[hi]: break
+        if hi <= lo:
+            lut.extend(range(256))
+        else:
+            scale = 255.0 / (hi - lo)
+            offset = -lo * scale
+            lut.extend(min(255, max(0, int(ix * scale + offset))) for ix in range(256))
+    return lut
+
+class ImagePyramid:
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.tile = self.manifest['tile']
+        self.width = self.manifest['width']
+        self.height = self.manifest['height']
+        self.levels = self.manifest['levels']
+        self._arrays = {}
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @classmethod
+    def build(cls, im, root, tile=PYRAMID_TILE, source=None):
+        """PIL 이미지를 피라미드로 변환해 root에 저장합니다. manifest.json이 마지막에 써지므로 완성 표시가 됩니다."""
+        if im.mode != "RGB": im = im.convert("RGB")
+        os.makedirs(root, exist_ok=True)
+
+        levels = []
+        level_im = im
+        while True:
+            w, h = level_im.size
+            tx, ty = -(-w // tile), -(-h // tile)
+            arr = np.lib.format.open_memmap(
+                os.path.join(root, f'level_{len(levels)}.npy'), mode='w+',
+                dtype=np.uint8, shape=(ty, tx, tile, tile, 3)
+            )
+            # 가로 한 줄(타일 높이)씩 변환해 메모리 사용을 제한
+            for j in range(ty):
+                band = np.zeros((tile, tx * tile, 3), dtype=np.uint8)
+                strip = np.asarray(level_im.crop((0, j * tile, w, min(h, (j + 1) * tile))))
+                band[:strip.shape[0], :strip.shape[1]] = strip
+                arr[j] = band.reshape(tile, tx, tile, 3).swapaxes(0, 1)
+            arr.flush()
+            del arr
+            levels.append({'width': w, 'height': h, 'tiles_x': tx, 'tiles_y': ty})
+
+            if max(w, h) <= tile: break
+            level_im = level_im.reduce(2)
+
+        manifest = {
+            'width': im.size[0], 'height': im.size[1], 'tile': tile,
+            'levels': levels, 'histogram': im.histogram(), 'source': source
+        }
+        with open(os.path.join(root, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        return cls(root)
+
+    def close(self):
+        """열어 둔 레벨 memmap 해제 (읽고 있는 스레드가 있으면 그 참조가 끝날 때 닫힘). 다시 읽으면 새로 엶"""
+        self._arrays = {}
+
+    def _level(self, level):
+        arr = self._arrays.get(level)
+        if arr is None:
+            arr = np.load(os.path.join(self.root, f'level_{level}.npy'), mmap_mode='r')
+            self._arrays[level] = arr
+        return arr
+
+    def read_region(self, box, level=0):
+        """
+        (x1, y1, x2, y2) 영역을 (h, w, 3) 배열로 읽습니다. 좌표는 해당 레벨 기준이며,
+        이미지 밖은 PIL crop과 같이 0(검정)으로 채웁니다.
+        """
+        x1, y1, x2, y2 = (int(v) for v in box)
+        info = self.levels[level]
+        arr, T = self._level(level), self.tile
+        out = np.zeros((max(0, y2 - y1), max(0, x2 - x1), 3), dtype=np.uint8)
+
+        cx1, cy1 = max(0, x1), max(0, y1)
+        cx2, cy2 = min(info['width'], x2), min(info['height'], y2)
+        if cx2 <= cx1 or cy2 <= cy1: return out
+
+        for ty in range(cy1 // T, (cy2 - 1) // T + 1):
+            for tx in range(cx1 // T, (cx2 - 1) // T + 1):
+                # 타일과 요청 영역의 교집합만 복사
+                ix1, iy1 = max(cx1, tx * T), max(cy1, ty * T)
+                ix2, iy2 = min(cx2, (tx + 1) * T), min(cy2, (ty + 1) * T)
+                out[iy1 - y1:iy2 - y1, ix1 - x1:ix2 - x1] = arr[ty, tx, iy1 - ty * T:iy2 - ty * T, ix1 - tx * T:ix2 - tx * T]
+        return out
+
+    def region_image(self, box, level=0):
+        return Image.fromarray(self.read_region(box, level))
+
+    def tile_image(self, level, tx, ty):
+        """타일 1장 (가장자리 타일은 실제 이미지 크기로 잘라서 반환)"""
+        info = self.levels[level]
+        if not (0 <= tx < info['tiles_x'] and 0 <= ty < info['tiles_y']): return None
+        T = self.tile
+        w = min(T, info['width'] - tx * T)
+        h = min(T, info['height'] - ty * T)
+        return Image.fromarray(np.ascontiguousarray(self._level(level)[ty, tx, :h, :w]))
+
+    def best_level(self, max_side):
+        """긴 변이 max_side 이상인 가장 작은 레벨 (축소 표시용)"""
+        best = 0
+        for i, info in enumerate(self.levels):
+            if max(info['width'], info['height']) >= max_side: best = i
+        return best
+
+    def thumbnail(self, max_side):
+        level = self.best_level(max_side)
+        info = self.levels[level]
+        im = self.region_image((0, 0, info['width'], info['height']), level)
+        im.thumbnail((max_side, max_side), Image.LANCZOS)
+        return im
+
+    def autocontrast_lut(self, cutoff=1):
+        return autocontrast_lut(self.manifest['histogram'], cutoff)
+
+def open_pyramid(pyramid_id):
+    """완성된 피라미드가 있으면 열어서 반환 (프로세스 내 재사용), 없으면 None"""
+    if not pyramid_id or not _ID_RE.match(pyramid_id): return None
+    with _open_lock:
+        pyr = _open_pyramids.get(pyramid_id)
+        if pyr: _open_pyramids.move_to_end(pyramid_id)
+    if pyr: return pyr
+
+    root = os.path.join(PYRAMID_DIR, pyramid_id)
+    if not os.path.exists(os.path.join(root, 'manifest.json')): return None
+    pyr = ImagePyramid(root)
+    evicted = []
+    with _open_lock:
+        pyr = _open_pyramids.setdefault(pyramid_id, pyr)
+        _open_pyramids.move_to_end(pyramid_id)
+        # 가장 오래 안 쓴 피라미드부터 닫아 열린 memmap 수를 제한
+        while len(_open_pyramids) > PYRAMID_OPEN_MAX:
+            evicted.append(_open_pyramids.popitem(last=False)[1])
+    for old in evicted: old.close()
+    return pyr
+
+def get_or_build_pyramid(pyramid_id, load_image, source=None):
+    """
+    pyramid_id(이미지 내용 해시)로 피라미드를 찾고, 없으면 load_image()로 원본을 읽어 한 번 만듭니다.
+    임시 폴더에 만든 뒤 rename 하므로 여러 워커가 동시에 만들어도 안전합니다.
+    원본 전체를 디코딩하므로 요청 처리 중이 아니라 작업 워커/백그라운드/사전 계산에서 호출합니다.
+    """
+    pyr = open_pyramid(pyramid_id)
+    if pyr or not pyramid_id or not _ID_RE.match(pyramid_id): return pyr
+
+    im = load_image()
+    if im is None: return None
+
+    os.makedirs(PYRAMID_DIR, exist_ok=True)
+    tmp_root = tempfile.mkdtemp(prefix=f'.{pyramid_id}-', dir=PYRAMID_DIR)
+    try:
+        ImagePyramid.build(im, tmp_root, source=source)
+        try:
+            os.rename(tmp_root, os.path.join(PYRAMID_DIR, pyramid_id))
+        except OSError:
+            pass  # 다른 워커가 먼저 완성함
+    finally:
+        if os.path.exists(tmp_root): shutil.rmtree(tmp_root, ignore_errors=True)
+    return open_pyramid(pyramid_id)
+
+def register_pyramid_routes(server):
+    """app.server(Flask)에 피라미드 타일 라우트 등록: /pyramid/<id>/<level>/<x>/<y>.jpg"""
+    from flask import abort, send_file
+
+    @server.route('/pyramid/<pyramid_id>/<int:level>/<int:tx>/<int:ty>.jpg')
+    def serve_pyramid_tile(pyramid_id, level, tx, ty):
+        pyr = open_pyramid(pyramid_id)
+        if not pyr or level >= len(pyr.levels): abort(404)
+        tile = pyr.tile_image(level, tx, ty)
+        if tile is None: abort(404)
+
+        buf = io.BytesIO()
+        tile.save(buf, format="JPEG", quality=85)
+        buf.seek(0)
+        resp = send_file(buf, mimetype='image/jpeg')
+        # 내용 해시 기반 경로라 변하지 않음 -> 브라우저 장기 캐시
+        resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return resp
+
+    @server.route('/pyramid/<pyramid_id>/manifest.json')
+    def serve_pyramid_manifest(pyramid_id):
+        pyr = open_pyramid(pyramid_id)
+        if not pyr: abort(404)
+        return {'width': pyr.width, 'height': pyr.height, 'tile': pyr.tile, 'levels': pyr.levels}
@@ -0,0 +1,87 @@
+import os
+import hashlib
+from utils.detection_cache import file_digest
+
+# ---------------------------------------------------------
+# [추론 백엔드 선택]
+# INFERENCE_BACKEND = torch(기본) | onnx | openvino
+# INFERENCE_INT8    = 1 이면 양자화된 산출물을 우선 사용
+# 내보낸 산출물(export_models.py)이 없으면 PyTorch(.pt)로 되돌아갑니다.
+# ---------------------------------------------------------
+BACKENDS = ('torch', 'onnx', 'openvino')
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").strip().lower()
+INFERENCE_INT8 = os.getenv("INFERENCE_INT8", "0") == "1"
+
+def artifact_path(models_dir, stem, backend, int8=False):
+    """백엔드별 모델 산출물 경로 (예: det_best.onnx, det_best_int8.onnx, det_best_openvino_model/)"""
+    name = f"{stem}_int8" if int8 else stem
+    if backend == 'onnx': return os.path.join(models_dir, f"{name}.onnx")
+    if backend == 'openvino': return os.path.join(models_dir, f"{name}_openvino_model")
+    return os.path.join(models_dir, f"{stem}.pt")
+
+def resolve_model_path(models_dir, stem, backend=None, int8=None):
+    """설정된 백엔드의 산출물을 찾고, 없으면 INT8 -> FP32 -> .pt 순으로 대체합니다."""
+    backend = backend or INFERENCE_BACKEND
+    int8 = INFERENCE_INT8 if int8 is None else int8
+    if backend not in BACKENDS:
+        print(f"[Backend] 알 수 없는 INFERENCE_BACKEND={backend}, torch 사용")
+        backend = 'torch'
+
+    candidates = []
+    if backend != 'torch':
+        if int8: candidates.append(artifact_path(models_dir, stem, backend, int8=True))
+        candidates.append(artifact_path(models_dir, stem, backend))
+    candidates.append(artifact_path(models_dir, stem, 'torch'))
+
+    for path in candidates:
+        if os.path.exists(path):
+            if path != candidates[0]:
+                print(f"[Backend] {os.path.basename(candidates[0])} 없음 -> {os.path.basename(path)} 사용")
+            return path
+    return None
+
+def artifact_digest(path):
+    """모델 산출물 해시. OpenVINO처럼 폴더인 경우 안의 파일들을 이름 순으로 함께 해시합니다."""
+    if os.path.isdir(path):
+        h = hashlib.sha256()
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            if os.path.isfile(full):
+                h.update(name.encode())
+                h.update(file_digest(full).encode())
+        return h.hexdigest()
+    return file_digest(path)
+
+def export_model(models_dir, stem, backend, int8=False, imgsz=None, data=None):
+    """
+    .pt 모델을 ONNX/OpenVINO로 한 번 내보냅니다. 반환: 산출물 경로
+    - ONNX INT8: onnxruntime 동적 양자화(가중치 INT8)로 별도 파일 생성
+    - OpenVINO INT8: ultralytics의 NNCF 양자화 (data= 보정용 데이터셋 yaml 필요)
+    """
+    from ultralytics import YOLO
+
+    pt_path = artifact_path(models_dir, stem, 'torch')
+    model = YOLO(pt_path)
+    kwargs = {'format': backend, 'dynamic': True}  # dynamic: 배치 타일 추론을 위해 배치 축 가변
+    if imgsz: kwargs['imgsz'] = imgsz
+
+    if backend == 'openvino':
+        if int8:
+            kwargs['int8'] = True
+            if data: kwargs['data'] = data
+        exported = model.export(**kwargs)
+        target = artifact_path(models_dir, stem, backend, int8=int8)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            if os.path.exists(target):
+                import shutil
+                shutil.rmtree(target)
+            os.replace(exported, target)
+        return target
+
+    exported = model.export(**kwargs)
+    if not int8: return exported
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    target = artifact_path(models_dir, stem, backend, int8=True)
+    quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+    return target
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from utils.detection_cache import CACHE_DIR
+
+# ---------------------------------------------------------
+# [분석 작업 큐]
+# 무거운 탐지/비교 작업을 웹 요청 밖(job_worker.py 프로세스 풀)에서 실행합니다.
+# 외부 브로커 없이 SQLite 파일 하나로 웹 워커와 작업 워커가 상태를 공유합니다.
+# - 같은 job_key는 한 번만 대기열에 올라감 (여러 분석관이 같은 시간대를 열어도 추론 1회)
+# - 진행률/메시지는 작업 중 갱신 -> 화면은 폴링으로 표시
+# - 하트비트가 끊긴 running 작업은 다른 워커가 다시 가져감 (워커 비정상 종료 대비)
+# - priority가 작은 작업부터 처리: 화면이 기다리는 비교(0) -> 백그라운드 예열/분류(10)
+# - 워커 프로세스는 workers 테이블에 주기적으로 하트비트를 남김 -> 화면은 살아 있는 워커 유무로 안내
+# ---------------------------------------------------------
+JOB_DB_PATH = os.path.join(CACHE_DIR, 'jobs.sqlite')
+JOB_QUEUE_ENABLED = os.getenv("ANALYSIS_JOB_QUEUE", "0") == "1"
+JOB_STALE_SEC = int(os.getenv("JOB_STALE_SEC", 600))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 3600))  # 완료 결과 재사용 시간 (이후 재실행 -> 탐지 캐시로 빠르게 끝남)
+JOB_PURGE_AGE = int(os.getenv("JOB_PURGE_AGE", 86400))  # 이보다 오래된 완료/실패 작업은 워커가 정리
+WORKER_HEARTBEAT_SEC = 5
+WORKER_STALE_SEC = int(os.getenv("WORKER_STALE_SEC", 30))  # 이 시간 동안 하트비트가 없으면 죽은 워커로 간주
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+def job_key(kind, **params):
+    payload = json.dumps({'kind': kind, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+class JobQueue:
+    def __init__(self, db_path=JOB_DB_PATH):
+        self.db_path = db_path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_key TEXT PRIMARY KEY,
+                    kind TEXT,
+                    payload TEXT,
+                    status TEXT,
+                    progress REAL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    created_at REAL,
+                    heartbeat REAL,
+                    priority INTEGER DEFAULT 0
+                )
+            """)
+            # 우선순위 도입 전에 만든 jobs.sqlite
+            cols = [r[1] for r in conn.execute("PRAGMA table_info(jobs)")]
+            if 'priority' not in cols:
+                conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER DEFAULT 0")
+            conn.execute("DROP INDEX IF EXISTS idx_jobs_status")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority, created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS workers (name TEXT PRIMARY KEY, heartbeat REAL)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._init_db()
+                    self._ready = True
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def enqueue(self, key, kind, payload, priority=PRIORITY_INTERACTIVE):
+        """작업 등록. 같은 key가 이미 대기/실행 중이거나 최근 완료되었으면 그대로 두고, 실패/오래된 작업만 다시 대기열에 올립니다."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR IGNORE INTO jobs (job_key, kind, payload, status, created_at, heartbeat, priority) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                    (key, kind, json.dumps(payload), now, now, priority)
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', progress = 0, message = NULL, error = NULL, created_at = ?, heartbeat = ? "
+                    "WHERE job_key = ? AND (status = 'failed' OR (status = 'done' AND heartbeat < ?))",
+                    (now, now, key, now - JOB_RESULT_TTL)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Job Queue Error] {e}")
+            return None
+        return key
+
+    def claim(self, worker):
+        """우선순위가 가장 높은(priority가 작은) 대기 작업 중 가장 오래된 것(또는 하트비트가 끊긴 실행 작업)을 가져옵니다.
+        반환: (key, kind, payload) 또는 None"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                # BEGIN IMMEDIATE: 여러 워커가 같은 작업을 동시에 가져가지 않도록 쓰기 잠금
+                conn.isolation_level = None
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT job_key, kind, payload FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                    "ORDER BY priority, created_at LIMIT 1",
+                    (now - JOB_STALE_SEC,)
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, heartbeat = ?, progress = 0 WHERE job_key = ?",
+                        (worker, now, row[0])
+                    )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Job Queue Error] {e}")
+            return None
+        if not row: return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _update(self, sql, params):
+        try:
+            conn = self._connect()
+            try:
+                conn.execute(sql, params)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Job Queue Error] {e}")
+
+    def progress(self, key, progress, message=None):
+        self._update("UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE job_key = ?",
+                     (float(progress), message, time.time(), key))
+
+    def finish(self, key, result):
+        self._update("UPDATE jobs SET status = 'done', progress = 1, result = ?, heartbeat = ? WHERE job_key = ?",
+                     (json.dumps(result), time.time(), key))
+
+    def fail(self, key, error):
+        self._update("UPDATE jobs SET status = 'failed', error = ?, heartbeat = ? WHERE job_key = ?",
+                     (str(error), time.time(), key))
+
+    def get(self, key):
+        """{'status', 'progress', 'message', 'result', 'error'} 또는 None"""
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT status, progress, message, result, error FROM jobs WHERE job_key = ?", (key,)
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Job Queue Error] {e}")
+            return None
+        if not row: return None
+        return {'status': row[0], 'progress': row[1] or 0.0, 'message': row[2],
+                'result': json.loads(row[3]) if row[3] else None, 'error': row[4]}
+
+    def purge(self, older_than_sec=JOB_PURGE_AGE):
+        """오래된 완료/실패 작업과 멈춘 워커 기록 정리 (결과는 탐지 캐시에 남아 있으므로 다시 요청해도 빠름)"""
+        now = time.time()
+        self._update("DELETE FROM jobs WHERE status IN ('done', 'failed') AND heartbeat < ?", (now - older_than_sec,))
+        self._update("DELETE FROM workers WHERE heartbeat < ?", (now - older_than_sec,))
+
+    def worker_heartbeat(self, worker):
+        self._update("INSERT OR REPLACE INTO workers (name, heartbeat) VALUES (?, ?)", (worker, time.time()))
+
+    def worker_exit(self, worker):
+        self._update("DELETE FROM workers WHERE name = ?", (worker,))
+
+    def live_workers(self, stale_sec=WORKER_STALE_SEC):
+        """최근 stale_sec 안에 하트비트를 남긴 워커 수 (조회 실패 시 None)"""
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT COUNT(*) FROM workers WHERE heartbeat >= ?", (time.time() - stale_sec,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"[Job Queue Error] {e}")
+            return None
+        return row[0]
+
+JOB_QUEUE = JobQueue()
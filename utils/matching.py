@@ -0,0 +1,48 @@
+import numpy as np
+
+# ---------------------------------------------------------
+# [T1/T2 검출 매칭 엔진]
+# 박스 중심 간 거리로 1:1 최적 매칭을 구해 VANISHED / NEW 판정에 사용합니다.
+# ---------------------------------------------------------
+
+# 매칭 불가 쌍에 주는 비용. 실제 거리 합보다 항상 크게 잡아
+# '매칭 개수 최대화'가 '거리 최소화'보다 우선되도록 합니다.
+_NO_MATCH_COST = 1e9
+
+def box_centers(boxes):
+    """(N, 4) 배열의 x1, y1, x2, y2 -> (N, 2) 중심 좌표"""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.column_stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2])
+
+def match_detections(boxes1, boxes2, max_dist=60.0):
+    """
+    두 박스 집합을 중심 거리 기준으로 1:1 매칭합니다.
+    boxes1: (N, 4), boxes2: (M, 4) 배열 (x1, y1, x2, y2)
+    반환: (matched1, matched2) -> 각 박스가 상대편과 매칭되었는지 여부 (bool 배열)
+    """
+    c1, c2 = box_centers(boxes1), box_centers(boxes2)
+    matched1 = np.zeros(len(c1), dtype=bool)
+    matched2 = np.zeros(len(c2), dtype=bool)
+    if len(c1) == 0 or len(c2) == 0:
+        return matched1, matched2
+    # scipy는 비교 시점에만 import (워커 기동 시간)
+    from scipy.optimize import linear_sum_assignment
+    from scipy.spatial import cKDTree
+
+    # 1. KD-Tree로 max_dist 이내 후보 쌍만 추출 (희소)
+    pairs = cKDTree(c1).sparse_distance_matrix(cKDTree(c2), max_dist, output_type='ndarray')
+    pairs = pairs[pairs['v'] < max_dist]
+    if len(pairs) == 0:
+        return matched1, matched2
+
+    # 2. 후보가 있는 행/열만 남긴 작은 비용 행렬에서 최적 할당
+    rows, ri = np.unique(pairs['i'], return_inverse=True)
+    cols, ci = np.unique(pairs['j'], return_inverse=True)
+    cost = np.full((len(rows), len(cols)), _NO_MATCH_COST)
+    cost[ri, ci] = pairs['v']
+
+    r, c = linear_sum_assignment(cost)
+    ok = cost[r, c] < max_dist
+    matched1[rows[r[ok]]] = True
+    matched2[cols[c[ok]]] = True
+    return matched1, matched2
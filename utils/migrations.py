@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import text, inspect
+from utils.rollups import create_table_sql
+
+# ---------------------------------------------------------
+# [스키마 마이그레이션]
+# 버전 번호 순서로 한 번씩만 적용되는 스키마 변경 목록입니다.
+# 적용 기록은 tb_schema_migrations(version, name, applied_at)에 남깁니다.
+# - 각 단계는 (inspector, dialect) -> SQL 목록 함수: 이미 있는 인덱스/열은 건너뜀 (재실행 안전)
+# - MySQL/TiDB DDL은 트랜잭션으로 묶이지 않으므로 단계마다 실행 후 바로 기록
+# - 로컬 검증용 SQLite에서도 같은 단계가 돌도록 방언별 SQL을 씁니다.
+# 실행: python migrate.py (상태: --status, 미리보기: --dry-run)
+# ---------------------------------------------------------
+MIGRATION_TABLE = 'tb_schema_migrations'
+
+def _has_index(insp, table, name):
+    return any(ix['name'] == name for ix in insp.get_indexes(table))
+
+def _has_column(insp, table, column):
+    return any(c['name'] == column for c in insp.get_columns(table))
+
+def _create_index(insp, table, name, columns):
+    if _has_index(insp, table, name): return []
+    return [f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"]
+
+def _scenario_time_index(insp, dialect):
+    # 기지별 SCENARIO/HISTORY 시간 범위 조회 (report/trend)
+    sql = _create_index(insp, 'tb_scenario', 'idx_scenario_scene_type_ts', ['scene_id', 'data_type', 'timestamp'])
+    # 전 기지 하루/기간 조회 (home): scene_id 조건이 없어 위 인덱스의 첫 열을 못 씀
+    return sql + _create_index(insp, 'tb_scenario', 'idx_scenario_type_ts', ['data_type', 'timestamp'])
+
+def _audit_time_index(insp, dialect):
+    # 마이페이지 기간별 로그 / 보안 경보 카운트
+    return _create_index(insp, 'tb_audit_log', 'idx_audit_ts_action', ['timestamp', 'action'])
+
+def _scenario_slot_hour(insp, dialect):
+    # SCENARIO 행은 날짜와 무관하게 "몇 시 슬롯"으로 조회됨 -> HOUR(timestamp)를 미리 계산한 열 + 인덱스
+    # TiDB는 ALTER로 STORED 생성 열을 추가할 수 없어 VIRTUAL (인덱스는 가능)
+    sql = []
+    if not _has_column(insp, 'tb_scenario', 'slot_hour'):
+        if dialect == 'sqlite':
+            expr = "CAST(strftime('%H', timestamp) AS INTEGER)"
+            sql.append(f"ALTER TABLE tb_scenario ADD COLUMN slot_hour INTEGER GENERATED ALWAYS AS ({expr}) VIRTUAL")
+        else:
+            sql.append("ALTER TABLE tb_scenario ADD COLUMN slot_hour TINYINT GENERATED ALWAYS AS (HOUR(timestamp)) VIRTUAL")
+    sql += _create_index(insp, 'tb_scenario', 'idx_scenario_slot', ['scene_id', 'data_type', 'slot_hour'])
+    return sql
+
+def _scenario_rollups(insp, dialect):
+    # 보고서/추세용 집계 테이블 (채우기: python rollup.py --rebuild)
+    return [sql for table, sql in create_table_sql().items() if not insp.has_table(table)]
+
+# (버전, 이름, 함수) - 번호는 바꾸거나 재사용하지 말고 뒤에 추가만 합니다.
+MIGRATIONS = [
+    (1, 'scenario_scene_type_ts_index', _scenario_time_index),
+    (2, 'audit_log_ts_action_index', _audit_time_index),
+    (3, 'scenario_slot_hour', _scenario_slot_hour),
+    (4, 'scenario_rollups', _scenario_rollups),
+]
+SLOT_HOUR_VERSION = 3
+ROLLUP_VERSION = 4
+
+def _ensure_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(128) NOT NULL, applied_at DATETIME NOT NULL)"
+        ))
+
+def applied_versions(engine):
+    """{version: applied_at}. 기록 테이블이 없으면 빈 dict"""
+    if not inspect(engine).has_table(MIGRATION_TABLE): return {}
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT version, applied_at FROM {MIGRATION_TABLE}")).fetchall()
+    return {int(v): at for v, at in rows}
+
+def current_version(engine):
+    return max(applied_versions(engine), default=0)
+
+def pending(engine, target=None):
+    done = applied_versions(engine)
+    return [m for m in MIGRATIONS if m[0] not in done and (target is None or m[0] <= target)]
+
+def migrate(engine, target=None, dry_run=False, log=print):
+    """미적용 단계를 순서대로 적용. 반환: 적용(또는 dry_run이면 적용 예정)한 버전 목록"""
+    if not dry_run: _ensure_table(engine)
+    dialect = engine.dialect.name
+    done = []
+    for version, name, fn in pending(engine, target):
+        # 앞 단계가 스키마를 바꿨을 수 있으므로 단계마다 새로 조회
+        statements = fn(inspect(engine), dialect)
+        log(f"▶️ {version:04d} {name}" + ("" if statements else " (이미 반영됨)"))
+        for sql in statements:
+            log(f"    {sql}")
+        if dry_run:
+            done.append(version)
+            continue
+        with engine.begin() as conn:
+            for sql in statements:
+                conn.execute(text(sql))
+            conn.execute(
+                text(f"INSERT INTO {MIGRATION_TABLE} (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {'v': version, 'n': name, 't': datetime.now()}
+            )
+        done.append(version)
+    return done
@@ -0,0 +1,143 @@
+import numpy as np
+
+# ---------------------------------------------------------
+# [NMS 엔진]
+# 입력은 기존과 동일한 (x1, y1, x2, y2, conf, cls) 배열입니다.
+# ---------------------------------------------------------
+
+def py_cpu_nms(dets, thresh=0.5):
+    """기존 전수 비교 NMS (클래스 무시). 벤치마크 기준값으로 유지합니다."""
+    if len(dets) == 0: return []
+    x1, y1, x2, y2 = dets[:, 0], dets[:, 1], dets[:, 2], dets[:, 3]
+    scores = dets[:, 4]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        w = np.maximum(0.0, xx2 - xx1 + 1)
+        h = np.maximum(0.0, yy2 - yy1 + 1)
+        inter = w * h
+        ovr = inter / (areas[i] + areas[order[1:]] - inter)
+        inds = np.where(ovr <= thresh)[0]
+        order = order[inds + 1]
+    return keep
+
+def _range_pairs(lo, hi, sorted_idx):
+    """각 질의 i에 대해 sorted_idx[lo[i]:hi[i]] 를 (i, j) 쌍 배열로 펼칩니다."""
+    counts = hi - lo
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, sorted_idx[np.repeat(lo, counts) + offsets]
+
+def _candidate_pairs(x1, y1, x2, y2, cell_size=None):
+    """
+    격자(버킷) 인덱스로 서로 겹칠 수 있는 박스 쌍만 뽑습니다.
+    각 박스를 좌상단 좌표가 속한 칸에 넣고, 인접 3x3 칸끼리만 비교합니다.
+    칸 크기는 (최대 변 길이 + 1) 이상이어야 겹치는 쌍이 빠지지 않습니다.
+    """
+    n = len(x1)
+    side = np.maximum(x2 - x1, y2 - y1) + 1
+
+    # 타일 경계에서 생긴 대형 박스 몇 개가 칸 크기를 키우지 않도록 따로 전수 비교
+    large = side > max(np.median(side) * 4.0, 1.0)
+    small_idx = np.where(~large)[0]
+    large_idx = np.where(large)[0]
+
+    pairs_i, pairs_j = [], []
+    if len(small_idx):
+        cell = max(float(side[small_idx].max()), float(cell_size or 0), 1.0)
+        cx = np.floor(x1[small_idx] / cell).astype(np.int64)
+        cy = np.floor(y1[small_idx] / cell).astype(np.int64)
+        cx -= cx.min() - 1
+        cy -= cy.min() - 1
+        span = int(cy.max()) + 2
+        keys = cx * span + cy
+
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                target = keys + dx * span + dy
+                lo = np.searchsorted(sorted_keys, target, side='left')
+                hi = np.searchsorted(sorted_keys, target, side='right')
+                r, c = _range_pairs(lo, hi, order)
+                pairs_i.append(small_idx[r]); pairs_j.append(small_idx[c])
+
+    for i in large_idx:
+        others = np.arange(n)
+        pairs_i.append(np.full(n, i)); pairs_j.append(others)
+        pairs_i.append(others); pairs_j.append(np.full(n, i))
+
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+def _grid_nms_single(boxes, scores, thresh, cell_size=None):
+    """
+    단일 클래스용 격자 NMS.
+    근처 박스 쌍에 대해서만 IoU를 한 번에 계산한 뒤, 점수 순으로 억제 관계를 따라갑니다.
+    결과는 전수 비교 NMS(py_cpu_nms)와 동일합니다.
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+
+    order = scores.argsort()[::-1]
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    # i가 j보다 점수가 높은 쌍만 남김 (i가 j를 억제할 수 있는 방향)
+    pi, pj = _candidate_pairs(x1, y1, x2, y2, cell_size)
+    sel = rank[pi] < rank[pj]
+    pi, pj = pi[sel], pj[sel]
+
+    w = np.maximum(0.0, np.minimum(x2[pi], x2[pj]) - np.maximum(x1[pi], x1[pj]) + 1)
+    h = np.maximum(0.0, np.minimum(y2[pi], y2[pj]) - np.maximum(y1[pi], y1[pj]) + 1)
+    inter = w * h
+    ovr = inter / (areas[pi] + areas[pj] - inter)
+    sel = ovr > thresh
+    pi, pj = pi[sel], pj[sel]
+
+    # 억제 관계를 CSR 형태로 정리: i -> [i가 억제하는 j ...]
+    srt = np.argsort(pi, kind='stable')
+    pi, pj = pi[srt], pj[srt]
+    starts = np.searchsorted(pi, np.arange(len(order)), side='left')
+    ends = np.searchsorted(pi, np.arange(len(order)), side='right')
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]: continue
+        keep.append(int(i))
+        if ends[i] > starts[i]:
+            suppressed[pj[starts[i]:ends[i]]] = True
+    return keep
+
+def grid_nms(dets, thresh=0.5, cell_size=None):
+    """
+    클래스별 + 격자 인덱스 NMS.
+    dets: (N, 6) 배열 (x1, y1, x2, y2, conf, cls). cls 열이 없으면 단일 클래스로 처리합니다.
+    반환: 살아남은 행 인덱스 목록 (점수 내림차순, py_cpu_nms와 같은 형식)
+    """
+    if len(dets) == 0: return []
+    dets = np.asarray(dets, dtype=np.float64)
+    scores = dets[:, 4]
+    classes = dets[:, 5] if dets.shape[1] > 5 else np.zeros(len(dets))
+
+    keep = []
+    for c in np.unique(classes):
+        members = np.where(classes == c)[0]
+        local = _grid_nms_single(dets[members, :4], scores[members], thresh, cell_size)
+        keep.extend(members[local].tolist())
+
+    # 클래스별 결과를 합친 뒤 전체 점수 순으로 정렬 (기존 출력 순서 유지)
+    keep.sort(key=lambda i: -scores[i])
+    return keep
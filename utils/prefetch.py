@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------------------------------------------------
+# [백그라운드 프리페처]
+# 작은 스레드 풀에서 캐시 예열 작업을 돌립니다.
+# - 같은 key는 한 번만 대기열에 올라감 (중복 제거)
+# - 대기 작업 수 상한 (넘치면 새 요청은 버림)
+# - 그룹 단위 취소: 대기 중이면 실행 안 함, 실행 중이면 다음 단계 전에 중단
+# ---------------------------------------------------------
+
+class Prefetcher:
+    def __init__(self, max_workers=2, max_pending=8):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._lock = threading.Lock()
+        self._tasks = {}  # key -> (group, future, cancel_event)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='prefetch')
+        return self._pool
+
+    def submit(self, key, fn, *args, group=None):
+        """
+        fn(*args, is_cancelled) 를 백그라운드로 실행합니다.
+        is_cancelled()가 True가 되면 fn은 남은 단계를 건너뛰어야 합니다.
+        """
+        with self._lock:
+            if key in self._tasks: return False
+            if len(self._tasks) >= self.max_pending: return False
+
+            cancel_event = threading.Event()
+            future = self._executor().submit(self._run, key, fn, args, cancel_event)
+            self._tasks[key] = (group, future, cancel_event)
+        return True
+
+    def _run(self, key, fn, args, cancel_event):
+        try:
+            if not cancel_event.is_set():
+                fn(*args, cancel_event.is_set)
+        except Exception as e:
+            print(f"[Prefetch Error] {key}: {e}")
+        finally:
+            with self._lock:
+                task = self._tasks.get(key)
+                if task and task[2] is cancel_event:
+                    del self._tasks[key]
+
+    def cancel_group(self, group, keep=()):
+        """group에 속한 작업 중 keep에 없는 것들을 취소합니다."""
+        with self._lock:
+            for key, (g, future, cancel_event) in list(self._tasks.items()):
+                if g != group or key in keep: continue
+                cancel_event.set()
+                if future.cancel():
+                    del self._tasks[key]
+
+    def pending(self):
+        with self._lock:
+            return len(self._tasks)
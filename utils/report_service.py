@@ -12,7 +12,8 @@ import matplotlib.font_manager as fm
 from matplotlib.ticker import MaxNLocator
 from datetime import datetime, timedelta
 from fpdf import FPDF
-from db_manager import run_query
+from db_manager import run_query, slot_hour_expr, rollups_ready
+from utils import rollups
 
 # 경고 무시
 warnings.filterwarnings("ignore", category=UserWarning, module="fpdf")
@@ -40,6 +41,9 @@ FONT_PATH, FONT_NAME = configure_font()
 # -----------------------------------------------------------------------------
 # 1. 데이터 조회
 # -----------------------------------------------------------------------------
+# 기간 집계의 기체 수: 빈 값(NULL)은 0으로 (집계 테이블 utils/rollups.py, 추세 그래프와 같은 기준)
+RAW_TOTAL = "(COALESCE(s.cnt_fighter, 0) + COALESCE(s.cnt_bomber, 0) + COALESCE(s.cnt_transport, 0))"
+
 def fetch_report_data(rtype, base, start, end, target_time="12:00"):
     is_comparison_mode = (base == 'ALL')
     base_cond = "AND sc.scene_name = :base" if not is_comparison_mode else ""
@@ -68,10 +72,14 @@ def fetch_report_data(rtype, base, start, end, target_time="12:00"):
             
             params['start_time'] = start_time_str
             params['end_time'] = end_time_str
+            # 시 슬롯 범위로 인덱스를 먼저 타고, 분/초 경계는 TIME() 조건으로 정확히 유지
+            params['start_hour'] = int(start_time_str[:2])
+            params['end_hour'] = int(end_time_str[:2])
             
             query = f"""
             SELECT {select_clause} {from_clause}
             WHERE s.data_type = 'SCENARIO'
+              AND {slot_hour_expr('s')} BETWEEN :start_hour AND :end_hour
               AND TIME(s.timestamp) >= :start_time 
               AND TIME(s.timestamp) <= :end_time
               {base_cond}
@@ -87,6 +95,45 @@ def fetch_report_data(rtype, base, start, end, target_time="12:00"):
             """
 
     # [B. 연간] -> 월별 집계
+    # [C. 주간/월간] -> 일자별 집계
+    # 집계 테이블이 준비되어 있으면 원본 대신 버킷(n/합/최소/최대)을 합침 -> 기간이 길어도 읽는 행 수가 거의 일정
+    # 버킷이 날짜 단위이므로 구간이 날짜 경계에 맞을 때만 사용 (시각이 걸치면 아래 원본 조회)
+    elif rollups.day_range(start, end) and rollups_ready():
+        start_day, end_day = rollups.day_range(start, end)
+        stat_clause = """
+               MIN(r.total_min) as min_count,
+               ROUND(SUM(r.total_sum) * 1.0 / SUM(r.n), 1) as avg_count,
+               MAX(r.total_max) as max_count,
+               COALESCE(us.risk_level, '-') as risk_degree,
+               COALESCE(us.main_aircraft, '-') as main_aircraft,
+               COALESCE(us.special_notes, '') as remarks
+        """
+        join_clause = """
+        JOIN tb_scene sc ON r.scene_id = sc.scene_id
+        LEFT JOIN tb_user_settings us ON sc.scene_name = us.base_name
+        """
+        if rtype == 'yearly':
+            source, range_params = rollups.range_union(
+                start_day, end_day, ['scene_id', 'month', 'n', 'total_sum', 'total_min', 'total_max'], edge_table='tb_rollup_day')
+            params.update(range_params)
+            query = f"""
+            SELECT r.month as dt_month, sc.scene_name, sc.name_kor, {stat_clause}
+            FROM {source} r {join_clause}
+            WHERE 1 = 1 {base_cond}
+            GROUP BY r.month, sc.scene_name, sc.name_kor, us.risk_level, us.main_aircraft, us.special_notes
+            ORDER BY r.month ASC
+            """
+        else:
+            params['start_day'] = start_day; params['end_day'] = end_day
+            query = f"""
+            SELECT r.day as dt_day, sc.scene_name, sc.name_kor, {stat_clause}
+            FROM tb_rollup_day r {join_clause}
+            WHERE r.day BETWEEN :start_day AND :end_day {base_cond}
+            GROUP BY r.day, sc.scene_name, sc.name_kor, us.risk_level, us.main_aircraft, us.special_notes
+            ORDER BY r.day ASC
+            """
+
+    # (집계 테이블 전) 원본에서 직접 집계
     elif rtype == 'yearly':
         if len(start) == 10: start += " 00:00:00"
         if len(end) == 10: end += " 23:59:59"
@@ -95,9 +142,9 @@ def fetch_report_data(rtype, base, start, end, target_time="12:00"):
         query = f"""
         SELECT DATE_FORMAT(s.timestamp, '%Y-%m') as dt_month, 
                sc.scene_name, sc.name_kor,
-               MIN(s.cnt_fighter + s.cnt_bomber + s.cnt_transport) as min_count,
-               ROUND(AVG(s.cnt_fighter + s.cnt_bomber + s.cnt_transport), 1) as avg_count,
-               MAX(s.cnt_fighter + s.cnt_bomber + s.cnt_transport) as max_count,
+               MIN({RAW_TOTAL}) as min_count,
+               ROUND(AVG({RAW_TOTAL}), 1) as avg_count,
+               MAX({RAW_TOTAL}) as max_count,
                COALESCE(us.risk_level, '-') as risk_degree,
                COALESCE(us.main_aircraft, '-') as main_aircraft,
                COALESCE(us.special_notes, '') as remarks
@@ -117,9 +164,9 @@ def fetch_report_data(rtype, base, start, end, target_time="12:00"):
         query = f"""
         SELECT DATE_FORMAT(s.timestamp, '%Y-%m-%d') as dt_day, 
                sc.scene_name, sc.name_kor,
-               MIN(s.cnt_fighter + s.cnt_bomber + s.cnt_transport) as min_count,
-               ROUND(AVG(s.cnt_fighter + s.cnt_bomber + s.cnt_transport), 1) as avg_count,
-               MAX(s.cnt_fighter + s.cnt_bomber + s.cnt_transport) as max_count,
+               MIN({RAW_TOTAL}) as min_count,
+               ROUND(AVG({RAW_TOTAL}), 1) as avg_count,
+               MAX({RAW_TOTAL}) as max_count,
                COALESCE(us.risk_level, '-') as risk_degree,
                COALESCE(us.main_aircraft, '-') as main_aircraft,
                COALESCE(us.special_notes, '') as remarks
@@ -145,6 +192,7 @@ def fetch_report_data(rtype, base, start, end, target_time="12:00"):
             df['val_for_chart'] = df['max_count']
             
         elif 'dt_day' in df.columns: # 주간/월간
+            df['dt_day'] = df['dt_day'].astype(str)  # 집계 테이블은 DATE 타입
             df['dt_obj'] = pd.to_datetime(df['dt_day'])
             df['dt_str'] = df['dt_obj'].dt.strftime('%m-%d')
             df['val_for_chart'] = df['max_count'] 
@@ -0,0 +1,237 @@
+import os
+import time
+import threading
+import pandas as pd
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+
+# ---------------------------------------------------------
+# [시나리오 집계(rollup) 테이블]
+# 보고서/추세 화면이 매번 원본 tb_scenario를 MIN/AVG/MAX 하지 않도록 버킷별 통계를 미리 쌓아 둡니다.
+#   tb_rollup_slot  : 기지 x 유형 x 날짜 x 2시간 슬롯
+#   tb_rollup_day   : 기지 x 유형 x 날짜
+#   tb_rollup_month : 기지 x 유형 x 월 x 2시간 슬롯 (연간 보고서 / 1년 추세)
+# 버킷 값은 (n, total_sum, total_min, total_max) -> 합쳐도 값이 유지되므로 새 행만 더해 갱신 가능
+# total = COALESCE(fighter) + COALESCE(bomber) + COALESCE(transport)
+#
+# 증분 갱신: tb_rollup_state의 마지막 data_id 이후 행만 읽어 upsert (같은 트랜잭션에서 기준점 이동)
+#   TiDB AUTO_INCREMENT는 서버별로 구간을 나눠 받으므로 드물게 늦게 보이는 작은 id가 있을 수 있음
+#   -> 주기적으로 python rollup.py --from YYYY-MM 로 최근 월을 다시 계산
+# 테이블은 migrate.py (4번 단계)로 만듭니다.
+# ---------------------------------------------------------
+ROLLUP_REFRESH_SEC = int(os.getenv("ROLLUP_REFRESH_SEC", 60))  # 조회 시 증분 갱신 간격 (0이면 CLI로만 갱신, 준비 여부만 확인)
+ROLLUP_BATCH_ROWS = 50000
+STATE_KEY = 'scenario'
+ROLLUP_TABLES = ('tb_rollup_slot', 'tb_rollup_day', 'tb_rollup_month')
+
+_KEYS = {
+    'tb_rollup_slot': ['scene_id', 'data_type', 'slot_date', 'slot_hour'],
+    'tb_rollup_day': ['scene_id', 'data_type', 'day'],
+    'tb_rollup_month': ['scene_id', 'data_type', 'month', 'slot_hour'],
+}
+_EXTRA = {'tb_rollup_day': ['month']}  # 키에 딸린 값 (연간 보고서에서 가장자리 날짜를 월로 묶을 때 사용)
+_STATS = ['n', 'total_sum', 'total_min', 'total_max']
+
+def create_table_sql():
+    """마이그레이션에서 쓰는 CREATE TABLE 목록 (MySQL/TiDB/SQLite 공통 문법)"""
+    stat_cols = "n INT NOT NULL, total_sum BIGINT NOT NULL, total_min INT NOT NULL, total_max INT NOT NULL"
+    return {
+        'tb_rollup_slot': "CREATE TABLE tb_rollup_slot (scene_id INT NOT NULL, data_type VARCHAR(16) NOT NULL, "
+                          f"slot_date DATE NOT NULL, slot_hour SMALLINT NOT NULL, {stat_cols}, "
+                          "PRIMARY KEY (scene_id, data_type, slot_date, slot_hour))",
+        'tb_rollup_day': "CREATE TABLE tb_rollup_day (scene_id INT NOT NULL, data_type VARCHAR(16) NOT NULL, "
+                         f"day DATE NOT NULL, month CHAR(7) NOT NULL, {stat_cols}, "
+                         "PRIMARY KEY (scene_id, data_type, day))",
+        'tb_rollup_month': "CREATE TABLE tb_rollup_month (scene_id INT NOT NULL, data_type VARCHAR(16) NOT NULL, "
+                           f"month CHAR(7) NOT NULL, slot_hour SMALLINT NOT NULL, {stat_cols}, "
+                           "PRIMARY KEY (scene_id, data_type, month, slot_hour))",
+        'tb_rollup_state': "CREATE TABLE tb_rollup_state (name VARCHAR(32) PRIMARY KEY, last_data_id BIGINT NOT NULL, "
+                           "updated_at DATETIME NOT NULL)",
+    }
+
+def _upsert_sql(table, dialect):
+    keys = _KEYS[table]
+    cols = keys + _EXTRA.get(table, []) + _STATS
+    insert = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)})"
+    if dialect == 'sqlite':
+        new = lambda c: f"excluded.{c}"
+        least, greatest = 'MIN', 'MAX'
+        conflict = f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+    else:
+        new = lambda c: f"VALUES({c})"
+        least, greatest = 'LEAST', 'GREATEST'
+        conflict = " ON DUPLICATE KEY UPDATE "
+    return insert + conflict + ", ".join([
+        f"n = n + {new('n')}",
+        f"total_sum = total_sum + {new('total_sum')}",
+        f"total_min = {least}(total_min, {new('total_min')})",
+        f"total_max = {greatest}(total_max, {new('total_max')})",
+    ])
+
+def _buckets(df):
+    """원본 행(scene_id, data_type, timestamp, total) -> 테이블별 버킷 통계 레코드"""
+    ts = pd.to_datetime(df['timestamp'])
+    df = df.assign(
+        slot_date=ts.dt.strftime('%Y-%m-%d'),
+        day=ts.dt.strftime('%Y-%m-%d'),
+        month=ts.dt.strftime('%Y-%m'),
+        slot_hour=(ts.dt.hour - ts.dt.hour % 2).astype(int),
+        total=pd.to_numeric(df['total'], errors='coerce').fillna(0).astype(int),
+    )
+    out = {}
+    for table, keys in _KEYS.items():
+        keys = keys + _EXTRA.get(table, [])
+        agg = df.groupby(keys, sort=False)['total'].agg(['count', 'sum', 'min', 'max']).reset_index()
+        agg.columns = keys + _STATS
+        out[table] = [{k: (v.item() if hasattr(v, 'item') else v) for k, v in r.items()} for r in agg.to_dict('records')]
+    return out
+
+_RAW_SQL = """
+    SELECT data_id, scene_id, data_type, timestamp,
+           (COALESCE(cnt_fighter, 0) + COALESCE(cnt_bomber, 0) + COALESCE(cnt_transport, 0)) as total
+    FROM tb_scenario
+    WHERE data_id > :last {extra}
+    ORDER BY data_id
+    LIMIT {limit}
+"""
+
+def _apply_batch(conn, dialect, since_id, extra='', params=None):
+    """since_id 이후 행을 한 묶음 읽어 버킷에 더함. 반환: (처리 행 수, 마지막 data_id)"""
+    rows = conn.execute(text(_RAW_SQL.format(extra=extra, limit=ROLLUP_BATCH_ROWS)),
+                        {'last': since_id, **(params or {})}).fetchall()
+    if not rows: return 0, since_id
+    df = pd.DataFrame(rows, columns=['data_id', 'scene_id', 'data_type', 'timestamp', 'total'])
+    for table, records in _buckets(df).items():
+        conn.execute(text(_upsert_sql(table, dialect)), records)
+    return len(rows), int(df['data_id'].max())
+
+def _read_state(conn, dialect):
+    lock = "" if dialect == 'sqlite' else " FOR UPDATE"
+    row = conn.execute(text(f"SELECT last_data_id FROM tb_rollup_state WHERE name = :k{lock}"), {'k': STATE_KEY}).fetchone()
+    return int(row[0]) if row else None
+
+def _write_state(conn, last_id, existed):
+    params = {'k': STATE_KEY, 'v': last_id, 't': datetime.now()}
+    if existed:
+        conn.execute(text("UPDATE tb_rollup_state SET last_data_id = :v, updated_at = :t WHERE name = :k"), params)
+    else:
+        conn.execute(text("INSERT INTO tb_rollup_state (name, last_data_id, updated_at) VALUES (:k, :v, :t)"), params)
+
+def refresh(engine, log=None):
+    """기준점 이후 새 행만 집계에 반영. 반환: 반영한 행 수"""
+    dialect = engine.dialect.name
+    total = 0
+    while True:
+        # 묶음마다 트랜잭션: 상태 행 잠금(FOR UPDATE)으로 여러 프로세스가 같은 행을 두 번 더하지 않음
+        with engine.begin() as conn:
+            last = _read_state(conn, dialect)
+            n, new_last = _apply_batch(conn, dialect, last or 0)
+            if n or last is None:
+                _write_state(conn, new_last, last is not None)
+        total += n
+        if log and n: log(f"  +{n}행 (data_id ≤ {new_last})")
+        if n < ROLLUP_BATCH_ROWS: return total
+
+def rebuild(engine, from_month=None, log=print):
+    """
+    집계를 원본에서 다시 계산. from_month('YYYY-MM')를 주면 그 달 이후 버킷만 지우고 다시 계산합니다.
+    (월 단위로 자르는 이유: 월 버킷 일부만 다시 더하면 중복 집계)
+    반환: 다시 집계한 행 수
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        last = _read_state(conn, dialect)
+        if from_month and last is not None:
+            # 이미 반영된 행(기준점 이하)만 다시 계산, 그 뒤 행은 다음 refresh가 평소대로 더함
+            start = datetime.strptime(from_month, '%Y-%m').strftime('%Y-%m-%d')
+            conn.execute(text("DELETE FROM tb_rollup_slot WHERE slot_date >= :d"), {'d': start})
+            conn.execute(text("DELETE FROM tb_rollup_day WHERE day >= :d"), {'d': start})
+            conn.execute(text("DELETE FROM tb_rollup_month WHERE month >= :m"), {'m': from_month})
+            extra, params = "AND data_id <= :upto AND timestamp >= :start", {'upto': last, 'start': start}
+        else:
+            upto = conn.execute(text("SELECT MAX(data_id) FROM tb_scenario")).scalar() or 0
+            for table in ROLLUP_TABLES:
+                conn.execute(text(f"DELETE FROM {table}"))
+            _write_state(conn, upto, last is not None)
+            extra, params = "AND data_id <= :upto", {'upto': upto}
+
+        since, done = 0, 0
+        while True:
+            n, since = _apply_batch(conn, dialect, since, extra, params)
+            done += n
+            if n: log(f"  {done}행 집계 (data_id ≤ {since})")
+            if n < ROLLUP_BATCH_ROWS: break
+    return done
+
+_refresh_lock = threading.Lock()
+_status = {'t': 0.0, 'ready': False}
+
+def maybe_refresh(engine):
+    """
+    조회 직전 호출: ROLLUP_REFRESH_SEC마다 한 번 증분 갱신 (다른 스레드가 갱신 중이면 기다리지 않음)
+    반환: 집계가 만들어져 있는지. 아직 --rebuild 전이면 False -> 호출 쪽은 원본 조회로 대체
+    (웹 요청 안에서 전체 집계를 처음부터 만들지 않기 위함)
+    """
+    if time.time() - _status['t'] >= max(ROLLUP_REFRESH_SEC, 1) and _refresh_lock.acquire(blocking=False):
+        try:
+            _status['t'] = time.time()
+            with engine.connect() as conn:
+                _status['ready'] = _read_state(conn, 'sqlite') is not None  # 잠금 없이 존재만 확인
+            if _status['ready'] and ROLLUP_REFRESH_SEC > 0:
+                refresh(engine)
+        except Exception as e:
+            print(f"[Rollup Refresh Error] {e}")
+        finally:
+            _refresh_lock.release()
+    return _status['ready']
+
+def _next_month(d):
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def split_range(start_day, end_day):
+    """
+    [start_day, end_day] (양끝 포함)를 '통째인 달'과 '가장자리 날짜 구간'으로 나눕니다.
+    반환: (첫 달 'YYYY-MM' 또는 None, 마지막 달, [(d0, d1), ...] 가장자리 날짜 구간 - 양끝 포함, 'YYYY-MM-DD')
+    긴 기간도 월 버킷 + 최대 두 달치 일/슬롯 버킷만 읽게 하기 위함
+    """
+    if isinstance(start_day, str): start_day = date.fromisoformat(start_day[:10])
+    if isinstance(end_day, str): end_day = date.fromisoformat(end_day[:10])
+    first_full = start_day if start_day.day == 1 else _next_month(start_day)
+    day_after = end_day + timedelta(days=1)
+    full_end = day_after if day_after.day == 1 else end_day.replace(day=1)  # 통째인 달 구간의 끝 (미포함)
+    fmt = lambda d: d.strftime('%Y-%m-%d')
+    if first_full >= full_end:
+        return None, None, [(fmt(start_day), fmt(end_day))]
+    edges = []
+    if start_day < first_full: edges.append((fmt(start_day), fmt(first_full - timedelta(days=1))))
+    if full_end <= end_day: edges.append((fmt(full_end), fmt(end_day)))
+    return first_full.strftime('%Y-%m'), (full_end - timedelta(days=1)).strftime('%Y-%m'), edges
+
+def day_range(start, end):
+    """
+    'YYYY-MM-DD[ HH:MM:SS]' 구간이 날짜 경계(00:00:00 ~ 23:59:59)에 맞으면 (start_day, end_day), 아니면 None.
+    집계 버킷은 날짜 단위라 시각이 걸친 구간은 원본에서 조회해야 합니다.
+    """
+    start, end = str(start), str(end)
+    start_time = start[11:] or '00:00:00'
+    end_time = end[11:] or '23:59:59'
+    if start_time.startswith('00:00:00') and end_time.startswith('23:59:59'):
+        return start[:10], end[:10]
+    return None
+
+def range_union(start_day, end_day, columns, edge_table='tb_rollup_slot', where='1 = 1'):
+    """
+    [start_day, end_day] 구간 버킷: 통째인 달은 tb_rollup_month, 가장자리 날짜는 edge_table에서 읽는 UNION ALL 서브쿼리.
+    columns: 두 테이블에 공통인 열, where: 두 테이블에 공통으로 거는 조건. 반환: (SQL, params)
+    """
+    edge_col = {'tb_rollup_slot': 'slot_date', 'tb_rollup_day': 'day'}[edge_table]
+    first_month, last_month, edges = split_range(start_day, end_day)
+    cols = ', '.join(columns)
+    parts, params = [], {}
+    if first_month:
+        parts.append(f"SELECT {cols} FROM tb_rollup_month WHERE month BETWEEN :rm0 AND :rm1 AND {where}")
+        params.update(rm0=first_month, rm1=last_month)
+    for i, (d0, d1) in enumerate(edges):
+        parts.append(f"SELECT {cols} FROM {edge_table} WHERE {edge_col} BETWEEN :rd{i}a AND :rd{i}b AND {where}")
+        params.update({f'rd{i}a': d0, f'rd{i}b': d1})
+    return "(" + " UNION ALL ".join(parts) + ")", params
@@ -0,0 +1,45 @@
+import os
+import threading
+import numpy as np
+
+# ---------------------------------------------------------
+# [빈 타일 사전 필터]
+# 축소한 타일의 밝기 표준편차와 에지 밀도로 지형/수면/구름만 있는 타일을 골라
+# YOLO 추론 전에 건너뜁니다. TILE_PREFILTER=1 로 켭니다.
+# ---------------------------------------------------------
+TILE_PREFILTER = os.getenv("TILE_PREFILTER", "0") == "1"
+PREFILTER_FACTOR = 8                                          # 1280px 타일 -> 160px에서 판정
+MIN_STD = float(os.getenv("TILE_MIN_STD", 6.0))               # 밝기 표준편차 하한
+MIN_EDGE_DENSITY = float(os.getenv("TILE_MIN_EDGE", 0.004))   # Canny 에지 픽셀 비율 하한
+
+_stats_lock = threading.Lock()
+TILE_FILTER_STATS = {'tiles': 0, 'skipped': 0}
+
+def prefilter_params():
+    """탐지 캐시 키에 들어갈 필터 설정 (꺼져 있으면 None)"""
+    if not TILE_PREFILTER: return None
+    return {'factor': PREFILTER_FACTOR, 'std': MIN_STD, 'edge': MIN_EDGE_DENSITY}
+
+def tile_score(tile_img):
+    """(밝기 표준편차, 에지 밀도) - 축소된 회색조 픽셀 기준"""
+    import cv2  # 필터가 켜져 있을 때만 필요
+    small = np.asarray(tile_img.convert('L').reduce(PREFILTER_FACTOR))
+    edges = cv2.Canny(small, 50, 150)
+    return float(small.std()), float(np.count_nonzero(edges)) / max(1, edges.size)
+
+def is_informative(tile_img, min_std=None, min_edge=None):
+    std, edge = tile_score(tile_img)
+    min_std = MIN_STD if min_std is None else min_std
+    min_edge = MIN_EDGE_DENSITY if min_edge is None else min_edge
+    return std >= min_std and edge >= min_edge
+
+def record_stats(total, skipped):
+    with _stats_lock:
+        TILE_FILTER_STATS['tiles'] += total
+        TILE_FILTER_STATS['skipped'] += skipped
+
+def get_tile_filter_stats():
+    with _stats_lock:
+        stats = dict(TILE_FILTER_STATS)
+    stats['skip_rate'] = round(stats['skipped'] / stats['tiles'], 3) if stats['tiles'] else 0.0
+    return stats
@@ -0,0 +1,116 @@
+import os
+import atexit
+import threading
+import numpy as np
+from contextlib import nullcontext
+from multiprocessing import get_context, shared_memory
+from PIL import Image
+
+# ---------------------------------------------------------
+# [대형 영상 타일 분산 탐지 (scatter/gather)]
+# 한 장의 타일 목록을 여러 프로세스(각자 모델 1벌)에 나눠 추론하고 결과를 모아 NMS로 합칩니다.
+# 타일은 pickle된 PIL crop이 아니라 공유 메모리로 전달합니다.
+#  - PIL 경로: 전처리(AutoContrast)된 원본 배열을 SharedMemory에 한 번 복사, 워커는 붙어서 슬라이스만 읽음
+#  - 피라미드 경로: 워커가 같은 .npy memmap을 열어 읽음 (OS 페이지 캐시 공유)
+# DET_SHARD_WORKERS=4 처럼 켭니다. (0/1이면 기존 단일 프로세스 경로)
+# ---------------------------------------------------------
+SHARD_WORKERS = int(os.getenv("DET_SHARD_WORKERS", 0))
+SHARD_MIN_TILES = int(os.getenv("DET_SHARD_MIN_TILES", 16))  # 이보다 타일이 적으면 분산 오버헤드가 더 큼
+
+class SharedImage:
+    """PIL 이미지를 공유 메모리에 올리고, with 블록이 끝나면 해제합니다. with 값: 워커에 넘길 spec"""
+    def __init__(self, im):
+        arr = np.asarray(im)
+        self.shm = shared_memory.SharedMemory(create=True, size=arr.nbytes)
+        np.ndarray(arr.shape, dtype=np.uint8, buffer=self.shm.buf)[:] = arr
+        self.spec = ('shm', self.shm.name, arr.shape)
+
+    def __enter__(self):
+        return self.spec
+
+    def __exit__(self, *exc):
+        self.shm.close()
+        self.shm.unlink()
+
+def pyramid_spec(pyr, lut):
+    return nullcontext(('pyramid', pyr.root, lut))
+
+# --- 워커 프로세스 쪽 ---
+def _attach(spec, tile_size):
+    """spec으로 타일 crop 함수를 만듭니다. 반환: (get_crop, 닫을 SharedMemory 또는 None)"""
+    if spec[0] == 'shm':
+        _, name, shape = spec
+        # spawn 워커는 부모의 자원 추적기를 함께 쓰므로 여기서 등록 해제하지 않음 (해제/unlink는 SharedImage 책임)
+        shm = shared_memory.SharedMemory(name=name)
+        arr = np.ndarray(tuple(shape), dtype=np.uint8, buffer=shm.buf)
+        H, W = arr.shape[:2]
+
+        def get_crop(x, y):
+            # PIL crop과 같이 이미지 밖은 0(검정)으로 채움 (복사본이라 공유 메모리를 닫아도 안전)
+            tile = np.zeros((tile_size, tile_size) + arr.shape[2:], dtype=np.uint8)
+            view = arr[y:min(H, y + tile_size), x:min(W, x + tile_size)]
+            tile[:view.shape[0], :view.shape[1]] = view
+            return Image.fromarray(tile)
+        return get_crop, shm
+
+    from utils.image_pyramid import ImagePyramid
+    _, root, lut = spec
+    pyr = ImagePyramid(root)
+    return (lambda x, y: pyr.region_image((x, y, x + tile_size, y + tile_size)).point(lut)), None
+
+def _init_worker(init_fn, init_args):
+    if init_fn:
+        init_fn(*init_args)
+    else:
+        import ai_core
+        ai_core.get_det_model()
+
+def _detect_shard(spec, tiles, prefilter):
+    import ai_core
+    get_crop, shm = _attach(spec, ai_core.TILE_SIZE)
+    try:
+        return ai_core.detect_tiles(get_crop, tiles, prefilter=prefilter), len(tiles)
+    finally:
+        if shm is not None: shm.close()
+
+# --- 메인 프로세스 쪽 ---
+class ShardPool:
+    """
+    타일 분산 추론용 프로세스 풀. 모델은 각 워커의 initializer에서 한 번 로드합니다.
+    spawn으로 만들어 스레드/torch 상태를 가진 부모를 fork하지 않습니다.
+    init_fn: 워커 초기화 함수 (기본: ai_core 모델 로드, 벤치마크는 가짜 모델 설치)
+    """
+    def __init__(self, workers, init_fn=None, init_args=()):
+        self.workers = workers
+        self._pool = get_context('spawn').Pool(workers, initializer=_init_worker, initargs=(init_fn, init_args))
+
+    def detect(self, spec, tiles, prefilter=None, progress=None, batch_size=8):
+        # 워커당 여러 조각으로 나눠 느린 타일이 몰린 워커를 다른 워커가 기다리지 않게 함
+        chunk = max(batch_size, -(-len(tiles) // (self.workers * 4)))
+        jobs = [(spec, tiles[i:i + chunk], prefilter) for i in range(0, len(tiles), chunk)]
+        all_dets, done = [], 0
+        for dets, n in self._pool.imap_unordered(_star_detect_shard, jobs):
+            all_dets.extend(dets)
+            done += n
+            if progress: progress(done, len(tiles))
+        return all_dets
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+def _star_detect_shard(args):
+    return _detect_shard(*args)
+
+_pool_lock = threading.Lock()
+_shared_pool = None
+
+def get_shard_pool():
+    """DET_SHARD_WORKERS > 1일 때 프로세스 공용 풀 (처음 호출 시 생성)"""
+    global _shared_pool
+    if SHARD_WORKERS <= 1: return None
+    with _pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ShardPool(SHARD_WORKERS)
+            atexit.register(_shared_pool.close)
+    return _shared_pool